@@ -39,6 +39,7 @@ class Router(AlternateEnvironmentRouter):
             'completion_aggregator.tasks.update_aggregators': 'lms',
             'openedx.core.djangoapps.content.block_structure.tasks.update_course_in_cache': 'lms',
             'openedx.core.djangoapps.content.block_structure.tasks.update_course_in_cache_v2': 'lms',
+            'refresh_course_progress_counters': 'lms',
         }
 
     @property
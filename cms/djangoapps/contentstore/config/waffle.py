@@ -11,6 +11,7 @@ WAFFLE_NAMESPACE = u'studio'
 
 # Switches
 ENABLE_ACCESSIBILITY_POLICY_PAGE = u'enable_policy_page'
+ENABLE_INCREMENTAL_SEARCH_INDEX = u'enable_incremental_search_index'
 
 
 def waffle():
@@ -7,12 +7,14 @@ from abc import ABCMeta, abstractmethod
 from datetime import timedelta
 
 from django.conf import settings
+from django.core.cache import cache
 from django.urls import resolve
 from django.utils.translation import ugettext as _
 from django.utils.translation import ugettext_lazy
 from eventtracking import tracker
 from search.search_engine_base import SearchEngine
 from six import add_metaclass, string_types, text_type
+from six.moves import range
 
 from contentstore.course_group_config import GroupConfiguration
 from course_modes.models import CourseMode
@@ -20,6 +22,7 @@ from openedx.core.lib.courses import course_image_url
 from xmodule.annotator_mixin import html_to_text
 from xmodule.library_tools import normalize_key_for_search
 from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.mixed import MixedModuleStore
 
 # REINDEX_AGE is the default amount of time that we look back for changes
 # that might have happened. If we are provided with a time at which the
@@ -28,6 +31,11 @@ from xmodule.modulestore import ModuleStoreEnum
 # how far back from the trigger point to look back in order to index
 REINDEX_AGE = timedelta(0, 60)  # 60 seconds
 
+# Maximum number of documents sent to the search engine in one request
+INDEX_BATCH_SIZE = 500
+
+_INDEXED_VERSION_CACHE_KEY = u'courseware_index.indexed_version.{index_name}.{structure_key}'
+
 log = logging.getLogger('edx.modulestore')
 
 
@@ -116,7 +124,7 @@ class SearchIndexerBase(object):
         searcher.remove(cls.DOCUMENT_TYPE, result_ids)
 
     @classmethod
-    def index(cls, modulestore, structure_key, triggered_at=None, reindex_age=REINDEX_AGE):
+    def index(cls, modulestore, structure_key, triggered_at=None, reindex_age=REINDEX_AGE, incremental=False):
         """
         Process course for indexing
 
@@ -132,6 +140,12 @@ class SearchIndexerBase(object):
             which items may need to be removed from the index
             If None, then a full reindex takes place
 
+        incremental (bool) - index only the blocks changed since the last indexed
+            version of the structure, found by comparing that version of the split
+            structure with the current one; triggered_at is then ignored. Falls
+            back to walking the whole structure when the changes cannot be found
+            that way, e.g. for the first index of a structure or in old mongo
+
         Returns:
         Number of items that have been added to the index
         """
@@ -256,11 +270,22 @@ class SearchIndexerBase(object):
                 # First perform any additional indexing from the structure object
                 cls.supplemental_index_information(modulestore, structure)
 
-                # Now index the content
-                for item in structure.get_children():
-                    prepare_item_index(item, groups_usage_info=groups_usage_info)
-                searcher.index(cls.DOCUMENT_TYPE, items_index)
-                cls.remove_deleted_items(searcher, structure_key, indexed_items)
+                changes = cls._get_changed_blocks(modulestore, structure_key, structure) if incremental else None
+                if changes is None:
+                    # Now index the content
+                    for item in structure.get_children():
+                        prepare_item_index(item, groups_usage_info=groups_usage_info)
+                    cls._index_in_batches(searcher, items_index)
+                    cls.remove_deleted_items(searcher, structure_key, indexed_items)
+                else:
+                    # Reindex the subtrees of the changed blocks only, and remove the deleted ones
+                    changed_usage_keys, deleted_usage_keys = changes
+                    for usage_key in changed_usage_keys:
+                        prepare_item_index(modulestore.get_item(usage_key), groups_usage_info=groups_usage_info)
+                    cls._index_in_batches(searcher, items_index)
+                    deleted_ids = [text_type(cls._id_modifier(usage_key)) for usage_key in deleted_usage_keys]
+                    for index in range(0, len(deleted_ids), INDEX_BATCH_SIZE):
+                        searcher.remove(cls.DOCUMENT_TYPE, deleted_ids[index:index + INDEX_BATCH_SIZE])
         except Exception as err:  # pylint: disable=broad-except
             # broad exception so that index operation does not prevent the rest of the application from working
             log.exception(
@@ -273,8 +298,111 @@ class SearchIndexerBase(object):
         if error_list:
             raise SearchIndexingError('Error(s) present during indexing', error_list)
 
+        cls._set_indexed_version(structure_key, structure)
         return indexed_count["count"]
 
+    @classmethod
+    def _index_in_batches(cls, searcher, items_index):
+        """
+        Sends the given item index dictionaries to the search engine, in
+        batches of INDEX_BATCH_SIZE
+        """
+        if not items_index:
+            return
+        for index in range(0, len(items_index), INDEX_BATCH_SIZE):
+            searcher.index(cls.DOCUMENT_TYPE, items_index[index:index + INDEX_BATCH_SIZE])
+
+    @classmethod
+    def _get_indexed_version_cache_key(cls, structure_key):
+        """ Returns the cache key of the last indexed version of the given structure """
+        return _INDEXED_VERSION_CACHE_KEY.format(index_name=cls.INDEX_NAME, structure_key=structure_key)
+
+    @classmethod
+    def _set_indexed_version(cls, structure_key, structure):
+        """
+        Records the version of the given top level item as the last indexed
+        version of the structure, if it is versioned
+        """
+        version = getattr(structure, 'course_version', None)
+        if version is not None:
+            cache.set(cls._get_indexed_version_cache_key(structure_key), text_type(version), None)
+
+    @classmethod
+    def _get_changed_blocks(cls, modulestore, structure_key, structure):
+        """
+        Compares the last indexed version of the split structure with the
+        version of the given top level item, and returns:
+
+            * the usage keys of the roots of the subtrees to reindex, i.e. of the
+              blocks that were added, moved or edited, since the documents of
+              their descendants hold inherited fields and their display names,
+              or of their closest split_test ancestor, whose walk assigns the
+              groups of its children,
+            * the usage keys of the blocks that were deleted.
+
+        Returns None if the whole structure is to be reindexed instead.
+        """
+        previous_version = cache.get(cls._get_indexed_version_cache_key(structure_key))
+        version = getattr(structure, 'course_version', None)
+        if previous_version is None or version is None:
+            return None
+        if modulestore.get_modulestore_type(structure_key) != ModuleStoreEnum.Type.split:
+            return None
+
+        split_modulestore = modulestore
+        if isinstance(modulestore, MixedModuleStore):
+            split_modulestore = modulestore._get_modulestore_by_type(  # pylint: disable=protected-access
+                ModuleStoreEnum.Type.split
+            )
+        previous_split_structure = split_modulestore.get_structure(structure_key, previous_version)
+        split_structure = split_modulestore.get_structure(structure_key, version)
+        if previous_split_structure is None or split_structure is None:
+            return None
+        root = split_structure['root']
+        if previous_split_structure['root'] != root:
+            return None
+
+        previous_blocks = previous_split_structure['blocks']
+        blocks = split_structure['blocks']
+        previous_parents = _get_block_parents(previous_blocks, root)
+        parents = _get_block_parents(blocks, root)
+
+        def get_ancestors(block_key):
+            """ Yields the ancestors of the given block, from its parent up to the root """
+            parent_key = parents[block_key]
+            while parent_key is not None:
+                yield parent_key
+                parent_key = parents[parent_key]
+
+        changed_block_keys = set()
+        for block_key, parent_key in parents.items():
+            if block_key not in previous_parents or previous_parents[block_key] != parent_key:
+                changed_block_keys.add(block_key)
+            elif _get_own_block_data(blocks[block_key]) != _get_own_block_data(previous_blocks[block_key]):
+                changed_block_keys.add(block_key)
+        if root in changed_block_keys:
+            # Course or library settings are inherited by, or shown in, every document
+            return None
+
+        subtree_roots = set()
+        for block_key in changed_block_keys:
+            split_test_key = next(
+                (ancestor for ancestor in get_ancestors(block_key) if blocks[ancestor].block_type == 'split_test'),
+                None
+            )
+            subtree_roots.add(split_test_key or block_key)
+        subtree_roots = [
+            block_key for block_key in subtree_roots
+            if not any(ancestor in subtree_roots for ancestor in get_ancestors(block_key))
+        ]
+        deleted_block_keys = [block_key for block_key in previous_parents if block_key not in parents]
+
+        structure_locator = structure.location.course_key
+        return (
+            [structure_locator.make_usage_key(block_key.type, block_key.id) for block_key in sorted(subtree_roots)],
+            [structure_locator.make_usage_key(block_key.type, block_key.id) for block_key in deleted_block_keys],
+        )
+
     @classmethod
     def _do_reindex(cls, modulestore, structure_key):
         """
@@ -339,6 +467,31 @@ class SearchIndexerBase(object):
         return {}
 
 
+def _get_block_parents(blocks, root):
+    """
+    Returns the map of the keys of the blocks of a split structure reachable
+    from the given root to the keys of their parents, None for the root.
+    """
+    parents = {root: None}
+    stack = [root]
+    while stack:
+        block_key = stack.pop()
+        for child_key in blocks[block_key].fields.get('children', []):
+            if child_key not in parents and child_key in blocks:
+                parents[child_key] = block_key
+                stack.append(child_key)
+    return parents
+
+
+def _get_own_block_data(block):
+    """
+    Returns the data of a split structure block that its documents depend
+    on, i.e. everything but its children and edit info.
+    """
+    fields = {name: value for name, value in block.fields.items() if name != 'children'}
+    return block.block_type, block.definition, fields, block.defaults, block.get_asides()
+
+
 class CoursewareSearchIndexer(SearchIndexerBase):
     """
     Class to perform indexing for courseware search from different modulestores
@@ -0,0 +1,37 @@
+"""
+Script for deleting the content addressed asset blobs which no asset references anymore
+"""
+
+
+import datetime
+import logging
+
+from django.core.management.base import BaseCommand
+
+from xmodule.contentstore.django import contentstore
+from xmodule.contentstore.mongo import BLOB_GRACE_PERIOD
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Delete the asset blobs which no asset references anymore
+    """
+    help = 'Delete the content addressed asset blobs which no asset references anymore'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-period-hours',
+            type=float,
+            default=BLOB_GRACE_PERIOD.total_seconds() / 3600,
+            help='Keep the blobs that a save reused within this many hours',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Execute the command
+        """
+        grace_period = datetime.timedelta(hours=options['grace_period_hours'])
+        blobs_deleted = contentstore().collect_orphaned_blobs(grace_period=grace_period)
+        log.info(u"Total number of asset blobs deleted: {0}".format(blobs_deleted))
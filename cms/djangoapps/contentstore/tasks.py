@@ -11,6 +11,7 @@ import tarfile
 from datetime import datetime
 from math import ceil
 from tempfile import NamedTemporaryFile, mkdtemp
+from time import time
 
 from celery import group
 from celery.task import task
@@ -35,6 +36,7 @@ from six.moves import range
 from user_tasks.models import UserTaskArtifact, UserTaskStatus
 from user_tasks.tasks import UserTask
 
+from contentstore.config.waffle import ENABLE_INCREMENTAL_SEARCH_INDEX, waffle
 from contentstore.courseware_index import CoursewareSearchIndexer, LibrarySearchIndexer, SearchIndexingError
 from contentstore.storage import course_import_export_storage
 from contentstore.utils import initialize_permissions, reverse_usage_url, translation_language
@@ -65,6 +67,8 @@ User = get_user_model()
 LOGGER = get_task_logger(__name__)
 FILE_READ_CHUNK = 1024  # bytes
 FULL_COURSE_REINDEX_THRESHOLD = 1
+# Minimum number of seconds between two updates of the import status with the static content progress
+STATIC_CONTENT_PROGRESS_INTERVAL = 2
 
 
 def clone_instance(instance, field_values):
@@ -180,7 +184,12 @@ def update_search_index(course_id, triggered_time_isoformat):
     """ Updates course search index. """
     try:
         course_key = CourseKey.from_string(course_id)
-        CoursewareSearchIndexer.index(modulestore(), course_key, triggered_at=(_parse_time(triggered_time_isoformat)))
+        CoursewareSearchIndexer.index(
+            modulestore(),
+            course_key,
+            triggered_at=(_parse_time(triggered_time_isoformat)),
+            incremental=waffle().is_enabled(ENABLE_INCREMENTAL_SEARCH_INDEX),
+        )
 
     except SearchIndexingError as exc:
         LOGGER.error(u'Search indexing error for complete course %s - %s', course_id, text_type(exc))
@@ -193,7 +202,12 @@ def update_library_index(library_id, triggered_time_isoformat):
     """ Updates course search index. """
     try:
         library_key = CourseKey.from_string(library_id)
-        LibrarySearchIndexer.index(modulestore(), library_key, triggered_at=(_parse_time(triggered_time_isoformat)))
+        LibrarySearchIndexer.index(
+            modulestore(),
+            library_key,
+            triggered_at=(_parse_time(triggered_time_isoformat)),
+            incremental=waffle().is_enabled(ENABLE_INCREMENTAL_SEARCH_INDEX),
+        )
 
     except SearchIndexingError as exc:
         LOGGER.error(u'Search indexing error for library %s - %s', library_id, text_type(exc))
@@ -365,6 +379,30 @@ class CourseImportTask(UserTask):  # pylint: disable=abstract-method
         return u'Import of {} from {}'.format(key, filename)
 
 
+def _static_content_progress_reporter(status):
+    """
+    Returns a callback reporting the progress of the static content import
+    in the state of the given import task status.
+
+    The state is updated at most every STATIC_CONTENT_PROGRESS_INTERVAL
+    seconds, and set back to 'Updating' once all the files of a static
+    directory are imported.
+    """
+    last_reported = [0]
+
+    def report_progress(file_subpath, imported_count, total_count):  # pylint: disable=unused-argument
+        """
+        Reports the number of static files imported so far.
+        """
+        if imported_count == total_count:
+            status.set_state(u'Updating')
+        elif time() - last_reported[0] >= STATIC_CONTENT_PROGRESS_INTERVAL:
+            status.set_state(u'Updating static content ({}/{})'.format(imported_count, total_count))
+            last_reported[0] = time()
+
+    return report_progress
+
+
 @task(base=CourseImportTask, bind=True)
 def import_olx(self, user_id, course_key_string, archive_path, archive_name, language):
     """
@@ -510,7 +548,9 @@ def import_olx(self, user_id, course_key_string, archive_path, archive_name, lan
             settings.GITHUB_REPO_ROOT, [dirpath],
             load_error_modules=False,
             static_content_store=contentstore(),
-            target_id=courselike_key
+            target_id=courselike_key,
+            static_content_workers=settings.COURSE_IMPORT_STATIC_CONTENT_WORKERS,
+            static_content_progress_callback=_static_content_progress_reporter(self.status),
         )
 
         new_location = courselike_items[0].location
@@ -262,6 +262,10 @@ class TestCoursewareSearchIndexer(MixedWithOptionsTestCase):
             reindex_age=(trigger_time - since_time)
         )
 
+    def index_incrementally(self, store):
+        """ index course using the changes since the last indexed version """
+        return CoursewareSearchIndexer.index(store, self.course.id, incremental=True)
+
     def _get_default_search(self):
         return {"course": six.text_type(self.course.id)}
 
@@ -445,6 +449,45 @@ class TestCoursewareSearchIndexer(MixedWithOptionsTestCase):
         indexed_count = self.reindex_course(store)
         self.assertEqual(indexed_count, 7)
 
+    def _test_incremental_index(self, store):
+        """ Make sure that an incremental index only indexes the changed blocks """
+        self.publish_item(store, self.vertical.location)
+        self.assertEqual(self.reindex_course(store), 4)
+
+        # nothing was published since the last index
+        self.assertEqual(self.index_incrementally(store), 0)
+
+        # an edited block is reindexed on its own
+        self.html_unit.display_name = "Updated Html Content"
+        self.update_item(store, self.html_unit)
+        self.publish_item(store, self.vertical.location)
+        self.assertEqual(self.index_incrementally(store), 1)
+
+        # the descendants of an edited block are reindexed with it, since they inherit its fields
+        later_date = datetime(2015, 5, 1, tzinfo=UTC)
+        self.sequential.start = later_date
+        self.update_item(store, self.sequential)
+        self.publish_item(store, self.sequential.location)
+        self.assertEqual(self.index_incrementally(store), 3)
+        response = self.search()
+        self.assertEqual(response["total"], 4)
+        start_dates = {result["data"]["id"]: result["data"]["start_date"] for result in response["results"]}
+        self.assertEqual(start_dates[six.text_type(self.html_unit.location)], later_date)
+
+        # a deleted block is removed from the index
+        self.delete_item(store, self.html_unit.location)
+        self.publish_item(store, self.vertical.location)
+        self.assertEqual(self.index_incrementally(store), 0)
+        response = self.search()
+        self.assertEqual(response["total"], 3)
+
+    def _test_incremental_index_fallback(self, store):
+        """ Make sure that an incremental index walks the whole course when it cannot find the changes """
+        self.publish_item(store, self.vertical.location)
+        self.assertEqual(self.index_incrementally(store), 4)
+        response = self.search()
+        self.assertEqual(response["total"], 4)
+
     def _test_course_about_property_index(self, store):
         """ Test that informational properties in the course object end up in the course_info index """
         display_name = "Help, I need somebody!"
@@ -576,6 +619,13 @@ class TestCoursewareSearchIndexer(MixedWithOptionsTestCase):
     def test_time_based_index(self, store_type):
         self._perform_test_using_store(store_type, self._test_time_based_index)
 
+    def test_incremental_index(self):
+        self._perform_test_using_store(ModuleStoreEnum.Type.split, self._test_incremental_index)
+
+    @ddt.data(*WORKS_WITH_STORES)
+    def test_incremental_index_fallback(self, store_type):
+        self._perform_test_using_store(store_type, self._test_incremental_index_fallback)
+
     @ddt.data(*WORKS_WITH_STORES)
     def test_exception(self, store_type):
         self._perform_test_using_store(store_type, self._test_exception)
@@ -10,13 +10,14 @@ from uuid import uuid4
 import mock
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.test import TestCase
 from django.test.utils import override_settings
 from opaque_keys.edx.locator import CourseLocator
 from organizations.models import OrganizationCourse
 from organizations.tests.factories import OrganizationFactory
 from user_tasks.models import UserTaskArtifact, UserTaskStatus
 
-from contentstore.tasks import export_olx, rerun_course
+from contentstore.tasks import _static_content_progress_reporter, export_olx, rerun_course
 from contentstore.tests.test_libraries import LibraryTestCase
 from contentstore.tests.utils import CourseTestCase
 from course_action_state.models import CourseRerunState
@@ -161,3 +162,22 @@ class RerunCourseTaskTestCase(CourseTestCase):
             restricted_course=restricted_course,
             country=restricted_country
         )
+
+
+class StaticContentProgressReporterTestCase(TestCase):
+    """
+    Tests of reporting the static content import progress in a task status
+    """
+
+    def test_report_progress(self):
+        status = mock.Mock()
+        report_progress = _static_content_progress_reporter(status)
+        with mock.patch('contentstore.tasks.time', side_effect=[100, 100, 101, 110, 110]):
+            report_progress(u'file1.txt', 1, 4)
+            report_progress(u'file2.txt', 2, 4)
+            report_progress(u'file3.txt', 3, 4)
+            report_progress(u'file4.txt', 4, 4)
+        self.assertEqual(
+            [call[0][0] for call in status.set_state.call_args_list],
+            [u'Updating static content (1/4)', u'Updating static content (3/4)', u'Updating'],
+        )
@@ -146,6 +146,12 @@ BLOCK_STRUCTURES_SETTINGS = dict(
 
     # Backend storage options
     PRUNING_ACTIVE=False,
+
+    # Maximum total size, in bytes of serialized data, of the collected
+    # block structures kept deserialized in each process.  Only used
+    # when storage backing is enabled, as the cache is keyed by the
+    # version of the stored data.  0 disables the cache.
+    COLLECTED_CACHE_MAX_SIZE=0,
 )
 
 ############################ FEATURE CONFIGURATION #############################
@@ -996,6 +1002,9 @@ MESSAGE_STORAGE = 'django.contrib.messages.storage.session.SessionStorage'
 
 COURSE_IMPORT_EXPORT_STORAGE = 'django.core.files.storage.FileSystemStorage'
 
+# Number of threads importing the static files of an imported course concurrently
+COURSE_IMPORT_STATIC_CONTENT_WORKERS = 1
+
 ##### EMBARGO #####
 EMBARGO_SITE_REDIRECT_URL = None
 
@@ -1506,6 +1515,10 @@ PAKX_INSTALLED_APPS = [
 
 INSTALLED_APPS.extend(PAKX_INSTALLED_APPS)
 
+# Delay in seconds before recounting course progress in the LMS after publish, so that the
+# block structure cache is already updated.
+COURSE_PROGRESS_REFRESH_DELAY = 60
+
 
 ################# EDX MARKETING SITE ##################################
 
@@ -1957,6 +1970,23 @@ CACHES = {
     },
 }
 
+# Maximum total size, in bytes of pickled data, of the split modulestore course
+# structures kept decoded in each process, in front of the course_structure_cache.
+# 0 disables the per-process cache.
+COURSE_STRUCTURE_PROCESS_CACHE_MAX_SIZE = 0
+
+# Cache of course assets too large for the course_assets cache, on the local disk of
+# each node serving assets. Disabled unless DIRECTORY is set.
+COURSE_ASSETS_DISK_CACHE = dict(
+    DIRECTORY=None,
+
+    # Maximum total size, in bytes, of the cached assets.
+    MAX_SIZE=5 * 1024 ** 3,
+
+    # Maximum size, in bytes, of a cached asset.
+    MAX_ASSET_SIZE=512 * 1024 ** 2,
+)
+
 ############################ OAUTH2 Provider ###################################
 
 
@@ -2047,6 +2077,11 @@ SOFTWARE_SECURE_VERIFICATION_ROUTING_KEY = 'edx.lms.core.default'
 # Rate limit for regrading tasks that a grading policy change can kick off
 POLICY_CHANGE_TASK_RATE_LIMIT = '300/h'
 
+# Number of threads, and learners per shard, used by course-wide grading (grade reports and
+# regrading tasks) to grade learners concurrently. A single worker grades learners sequentially.
+COURSE_GRADE_ITER_MAX_WORKERS = 1
+COURSE_GRADE_ITER_CHUNK_SIZE = 100
+
 ############## Settings for CourseGraph ############################
 COURSEGRAPH_JOB_QUEUE = DEFAULT_PRIORITY_QUEUE
 
@@ -539,6 +539,7 @@ ENTERPRISE_CATALOG_INTERNAL_ROOT_URL = ENV_TOKENS.get(
 ########################## CUSTOM ILMX CHANGES #######################
 ENABLE_PARTNER_SPACES = ENV_TOKENS.get('ENABLE_PARTNER_SPACES', False)
 DEFAULT_PUBLIC_PARTNER_SPACE = ENV_TOKENS.get('DEFAULT_PUBLIC_PARTNER_SPACE', 'ilmx')
+COURSE_PROGRESS_REFRESH_DELAY = ENV_TOKENS.get('COURSE_PROGRESS_REFRESH_DELAY', COURSE_PROGRESS_REFRESH_DELAY)
 
 ############### Settings for Retirement #####################
 RETIREMENT_SERVICE_WORKER_USERNAME = ENV_TOKENS.get(
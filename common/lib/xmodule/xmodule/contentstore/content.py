@@ -292,9 +292,23 @@ class StaticContent(object):
 
         return urlunparse(('', base_url, asset_path, params, urlencode(updated_query_params), ''))
 
-    def stream_data(self):
+    def stream_data(self, chunk_size=STREAM_DATA_CHUNK_SIZE):  # pylint: disable=unused-argument
         yield self._data
 
+    def stream_data_in_range(
+        self, first_byte, last_byte, chunk_size=STREAM_DATA_CHUNK_SIZE  # pylint: disable=unused-argument
+    ):
+        """
+        Stream the data between first_byte and last_byte (included)
+        """
+        yield self._data[first_byte:last_byte + 1]
+
+    def close(self):
+        """
+        Releases the resources held by this content, if any.
+        """
+        pass
+
     @staticmethod
     def serialize_asset_key_with_slash(asset_key):
         """
@@ -315,26 +329,27 @@ class StaticContentStream(StaticContent):
                                                   length=length, locked=locked, content_digest=content_digest)
         self._stream = stream
 
-    def stream_data(self):
+    def stream_data(self, chunk_size=STREAM_DATA_CHUNK_SIZE):
+        self._stream.seek(0)
         while True:
-            chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
+            chunk = self._stream.read(chunk_size)
             if len(chunk) == 0:
                 break
             yield chunk
 
-    def stream_data_in_range(self, first_byte, last_byte):
+    def stream_data_in_range(self, first_byte, last_byte, chunk_size=STREAM_DATA_CHUNK_SIZE):
         """
         Stream the data between first_byte and last_byte (included)
         """
         self._stream.seek(first_byte)
         position = first_byte
         while True:
-            if last_byte < position + STREAM_DATA_CHUNK_SIZE - 1:
+            if last_byte < position + chunk_size - 1:
                 chunk = self._stream.read(last_byte - position + 1)
                 yield chunk
                 break
-            chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
-            position += STREAM_DATA_CHUNK_SIZE
+            chunk = self._stream.read(chunk_size)
+            position += chunk_size
             yield chunk
 
     def close(self):
@@ -420,7 +435,7 @@ class ContentStore(object):
                 if tempfile_path is None:
                     thumbnail_file = BytesIO(content.data)
                 else:
-                    with open(tempfile_path) as f:
+                    with open(tempfile_path, 'rb') as f:
                         thumbnail_file = BytesIO(f.read())
                 thumbnail_content = StaticContent(thumbnail_file_location, thumbnail_name,
                                                   'image/svg+xml', thumbnail_file)
@@ -1,8 +1,25 @@
 """
 MongoDB/GridFS-level code for the contentstore.
+
+With content_addressed enabled, the data of assets is stored once per
+MD5 digest, as a blob file in a separate GridFS bucket, and the asset
+files documents of each course only reference that blob through their
+blob_id.  Copying the assets of a course then only copies the files
+documents.  Assets stored with their own chunks remain readable either
+way.
+
+Blobs are garbage collected by mark and sweep rather than deleted inline,
+since a concurrent save may be about to reference a blob that the last
+asset referencing it is dropping.  Saves that reuse a blob set its
+referencedDate, and assets that stop referencing a blob set its
+releasedDate.  collect_orphaned_blobs then deletes the released blobs
+that no asset references, unless a save reused them within the grace
+period, which is checked again by the delete itself.
 """
 
 
+import datetime
+import hashlib
 import json
 import os
 
@@ -12,6 +29,7 @@ import six
 from bson.son import SON
 from fs.osfs import OSFS
 from gridfs.errors import NoFile, FileExists
+from gridfs.grid_file import DEFAULT_CHUNK_SIZE
 from mongodb_proxy import autoretry_read
 from opaque_keys.edx.keys import AssetKey
 
@@ -23,6 +41,10 @@ from xmodule.util.misc import escape_invalid_characters
 
 from .content import ContentStore, StaticContent, StaticContentStream
 
+BLOB_BUCKET_SUFFIX = '_blobs'
+# How long a released blob is kept after a save last reused it.
+BLOB_GRACE_PERIOD = datetime.timedelta(days=1)
+
 
 class MongoContentStore(ContentStore):
     """
@@ -31,12 +53,14 @@ class MongoContentStore(ContentStore):
     # pylint: disable=unused-argument, bad-continuation
     def __init__(
         self, host, db,
-        port=27017, tz_aware=True, user=None, password=None, bucket='fs', collection=None, **kwargs
+        port=27017, tz_aware=True, user=None, password=None, bucket='fs', collection=None,
+        content_addressed=False, **kwargs
     ):
         """
         Establish the connection with the mongo backend and connect to the collections
 
         :param collection: ignores but provided for consistency w/ other doc_store_config patterns
+        :param content_addressed: whether to save asset data in blobs shared by all assets with the same digest
         """
         # GridFS will throw an exception if the Database is wrapped in a MongoProxy. So don't wrap it.
         # The appropriate methods below are marked as autoretry_read - those methods will handle
@@ -49,9 +73,16 @@ class MongoContentStore(ContentStore):
 
         self.fs = gridfs.GridFS(mongo_db, bucket)  # pylint: disable=invalid-name
 
+        self.fs_root = mongo_db[bucket]
         self.fs_files = mongo_db[bucket + ".files"]  # the underlying collection GridFS uses
         self.chunks = mongo_db[bucket + ".chunks"]
 
+        self.content_addressed = content_addressed
+        self.blob_fs = gridfs.GridFS(mongo_db, bucket + BLOB_BUCKET_SUFFIX)
+        self.blob_root = mongo_db[bucket + BLOB_BUCKET_SUFFIX]
+        self.blob_files = self.blob_root.files
+        self.blob_chunks = self.blob_root.chunks
+
     def close_connections(self):
         """
         Closes any open connections to the underlying databases
@@ -77,9 +108,13 @@ class MongoContentStore(ContentStore):
         elif collections:
             self.fs_files.drop()
             self.chunks.drop()
+            self.blob_files.drop()
+            self.blob_chunks.drop()
         else:
             self.fs_files.remove({})
             self.chunks.remove({})
+            self.blob_files.remove({})
+            self.blob_chunks.remove({})
 
         if connections:
             self.close_connections()
@@ -87,12 +122,33 @@ class MongoContentStore(ContentStore):
     def save(self, content):
         content_id, content_son = self.asset_db_key(content.location)
 
+        thumbnail_location = content.thumbnail_location.to_deprecated_list_repr() if content.thumbnail_location else None
+        if self.content_addressed:
+            if isinstance(content, StaticContentStream):
+                blob = self._put_blob(content.stream_data(DEFAULT_CHUNK_SIZE))
+            elif (
+                hasattr(content.data, '__iter__') and
+                not isinstance(content.data, (six.binary_type, six.string_types))
+            ):
+                blob = self._put_blob(content.data)
+            else:
+                data = content.data.encode('utf-8') if isinstance(content.data, six.text_type) else content.data
+                blob = self._put_blob([data], digest=hashlib.md5(data).hexdigest())
+            self._put_asset_document(
+                content_id, blob, filename=six.text_type(content.location), contentType=content.content_type,
+                displayname=content.name, content_son=content_son,
+                thumbnail_location=thumbnail_location,
+                import_path=content.import_path,
+                # getattr b/c caching may mean some pickled instances don't have attr
+                locked=getattr(content, 'locked', False),
+            )
+            return content
+
         # The way to version files in gridFS is to not use the file id as the _id but just as the filename.
         # Then you can upload as many versions as you like and access by date or version. Because we use
         # the location as the _id, we must delete before adding (there's no replace method in gridFS)
         self.delete(content_id)  # delete is a noop if the entry doesn't exist; so, don't waste time checking
 
-        thumbnail_location = content.thumbnail_location.to_deprecated_list_repr() if content.thumbnail_location else None
         with self.fs.new_file(_id=content_id, filename=six.text_type(content.location), content_type=content.content_type,
                               displayname=content.name, content_son=content_son,
                               thumbnail_location=thumbnail_location,
@@ -100,10 +156,17 @@ class MongoContentStore(ContentStore):
                               # getattr b/c caching may mean some pickled instances don't have attr
                               locked=getattr(content, 'locked', False)) as fp:
 
+            # Streamed content is copied through in chunks of the GridFS chunk size rather than read into memory.
             # It seems that this code thought that only some specific object would have the `__iter__` attribute
             # but many more objects have this in python3 and shouldn't be using the chunking logic. For string and
             # byte streams we write them directly to gridfs and convert them to byetarrys if necessary.
-            if hasattr(content.data, '__iter__') and not isinstance(content.data, (six.binary_type, six.string_types)):
+            if isinstance(content, StaticContentStream):
+                for chunk in content.stream_data(fp.chunk_size):
+                    fp.write(chunk)
+            elif (
+                hasattr(content.data, '__iter__') and
+                not isinstance(content.data, (six.binary_type, six.string_types))
+            ):
                 for chunk in content.data:
                     fp.write(chunk)
             else:
@@ -117,14 +180,128 @@ class MongoContentStore(ContentStore):
 
         return content
 
+    def _put_blob(self, chunks, digest=None):
+        """
+        Returns the files document of the blob holding the given chunks of data, writing the
+        blob only if no blob with the same digest exists.
+
+        :param chunks: an iterable of the data, in bytes
+        :param digest: the MD5 digest of the data, if known before reading it
+        """
+        if digest is not None:
+            blob = self._reuse_blob({'digest': digest})
+            if blob is not None:
+                return blob
+
+        md5 = hashlib.md5()
+        with self.blob_fs.new_file(referencedDate=datetime.datetime.utcnow()) as fp:
+            for chunk in chunks:
+                md5.update(chunk)
+                fp.write(chunk)
+            fp.digest = md5.hexdigest()
+
+        # Concurrent saves of the same data may each write a blob. All of them then keep the oldest one, and
+        # release the others, which another save may have found meanwhile.
+        blob = self._reuse_blob({'digest': fp.digest})
+        if blob['_id'] != fp._id:
+            self._release_blobs([fp._id])
+        return blob
+
+    def _reuse_blob(self, query):
+        """
+        Returns the files document of the oldest blob matching the given query, if any, after setting its
+        referencedDate so that it is not collected while the caller references it.
+        """
+        return self.blob_files.find_one_and_update(
+            query,
+            {'$set': {'referencedDate': datetime.datetime.utcnow()}},
+            sort=[('_id', pymongo.ASCENDING)],
+            return_document=pymongo.ReturnDocument.AFTER,
+        )
+
+    def _put_asset_document(self, content_id, blob, **attrs):
+        """
+        Creates or replaces the files document of the given asset, referencing the given blob
+        instead of having chunks of its own.
+        """
+        asset = SON(_id=content_id)
+        asset.update(attrs)
+        asset.update(
+            blob_id=blob['_id'],
+            length=blob['length'],
+            chunkSize=blob['chunkSize'],
+            md5=blob['digest'],
+            uploadDate=datetime.datetime.utcnow(),
+        )
+        previous_asset = self.fs_files.find_one_and_replace({'_id': content_id}, asset, upsert=True)
+        if previous_asset is not None:
+            if 'blob_id' not in previous_asset:
+                self.chunks.delete_many({'files_id': content_id})
+            elif previous_asset['blob_id'] != blob['_id']:
+                self._release_blobs([previous_asset['blob_id']])
+
+    def _release_blobs(self, blob_ids):
+        """
+        Marks the given blobs, which some asset stopped referencing, for collect_orphaned_blobs.
+        """
+        if blob_ids:
+            self.blob_files.update_many(
+                {'_id': {'$in': list(set(blob_ids))}},
+                {'$set': {'releasedDate': datetime.datetime.utcnow()}},
+            )
+
+    def collect_orphaned_blobs(self, grace_period=BLOB_GRACE_PERIOD):
+        """
+        Deletes the released blobs which no asset references anymore and which no save reused within the
+        grace period. Returns the number of deleted blobs.
+
+        :param grace_period: a timedelta longer than any save may take between finding a blob and
+            referencing it from an asset
+        """
+        cutoff = datetime.datetime.utcnow() - grace_period
+        blobs_deleted = 0
+        for blob in self.blob_files.find({'releasedDate': {'$lte': cutoff}}, {'releasedDate': 1}):
+            if self.fs_files.find_one({'blob_id': blob['_id']}, {'_id': 1}) is not None:
+                # Still referenced. Unmark the blob, unless an asset released it again meanwhile.
+                self.blob_files.update_one(
+                    {'_id': blob['_id'], 'releasedDate': blob['releasedDate']},
+                    {'$unset': {'releasedDate': ''}},
+                )
+                continue
+            # A save reusing the blob after the reference check sets its referencedDate past the cutoff,
+            # so that the blob is then kept.
+            result = self.blob_files.delete_one({'_id': blob['_id'], 'referencedDate': {'$not': {'$gt': cutoff}}})
+            if result.deleted_count:
+                self.blob_chunks.delete_many({'files_id': blob['_id']})
+                blobs_deleted += 1
+        return blobs_deleted
+
+    def _get_file(self, content_id):
+        """
+        Returns the GridOut of the given asset, which reads the data of assets referencing a blob
+        from the blob.
+
+        Raises NoFile if no such asset exists.
+        """
+        asset = self.fs_files.find_one({'_id': content_id})
+        if asset is None:
+            raise NoFile(content_id)
+        if 'blob_id' in asset:
+            asset['_id'] = asset['blob_id']
+            return gridfs.GridOut(self.blob_root, file_document=asset)
+        return gridfs.GridOut(self.fs_root, file_document=asset)
+
     def delete(self, location_or_id):
         """
         Delete an asset.
         """
         if isinstance(location_or_id, AssetKey):
             location_or_id, _ = self.asset_db_key(location_or_id)
+        asset = self.fs_files.find_one({'_id': location_or_id}, {'blob_id': 1})
         # Deletes of non-existent files are considered successful
         self.fs.delete(location_or_id)
+        if asset is not None and 'blob_id' in asset:
+            self._release_blobs([asset['blob_id']])
 
     @autoretry_read()
     def find(self, location, throw_on_not_found=True, as_stream=False):
@@ -132,7 +309,7 @@ class MongoContentStore(ContentStore):
 
         try:
             if as_stream:
-                fp = self.fs.get(content_id)
+                fp = self._get_file(content_id)
                 # Need to replace dict IDs with SON for chunk lookup to work under Python 3
                 # because field order can be different and mongo cares about the order
                 if isinstance(fp._id, dict):
@@ -151,7 +328,7 @@ class MongoContentStore(ContentStore):
                     content_digest=getattr(fp, 'md5', None),
                 )
             else:
-                with self.fs.get(content_id) as fp:
+                with self._get_file(content_id) as fp:
                     # Need to replace dict IDs with SON for chunk lookup to work under Python 3
                     # because field order can be different and mongo cares about the order
                     if isinstance(fp._id, dict):
@@ -218,7 +395,7 @@ class MongoContentStore(ContentStore):
             # to look. -- pmitros
             self.export(asset['asset_key'], output_directory)
             for attr, value in six.iteritems(asset):
-                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
+                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key', 'blob_id']:
                     policy.setdefault(asset['asset_key'].block_id, {})[attr] = value
 
         with open(assets_policy_file, 'w') as f:
@@ -245,11 +422,15 @@ class MongoContentStore(ContentStore):
                 ('{}.name'.format(prefix), {'$regex': ASSET_IGNORE_REGEX}),
             ])
             items = self.fs_files.find(query)
+            blob_ids = []
             for asset in items:
                 self.fs.delete(asset[prefix])
+                if 'blob_id' in asset:
+                    blob_ids.append(asset['blob_id'])
                 assets_to_delete += 1
 
             self.fs_files.remove(query)
+            self._release_blobs(blob_ids)
         return assets_to_delete
 
     @autoretry_read()
@@ -343,7 +524,8 @@ class MongoContentStore(ContentStore):
     def set_attr(self, asset_key, attr, value=True):
         """
         Add/set the given attr on the asset at the given location. Does not allow overwriting gridFS built in
-        attrs such as _id, md5, uploadDate, length. Value can be any type which pymongo accepts.
+        attrs such as _id, md5, uploadDate, length, nor the blob_id of the asset data. Value can be any type which
+        pymongo accepts.
 
         Returns nothing
 
@@ -376,7 +558,7 @@ class MongoContentStore(ContentStore):
         :param location:  a c4x asset location
         """
         for attr in six.iterkeys(attr_dict):
-            if attr in ['_id', 'md5', 'uploadDate', 'length']:
+            if attr in ['_id', 'md5', 'uploadDate', 'length', 'blob_id']:
                 raise AttributeError("{} is a protected attribute.".format(attr))
         asset_db_key, __ = self.asset_db_key(location)
         # catch upsert error and raise NotFoundError if asset doesn't exist
@@ -405,14 +587,15 @@ class MongoContentStore(ContentStore):
         """
         See :meth:`.ContentStore.copy_all_course_assets`
 
-        This implementation fairly expensively copies all of the data
+        This implementation fairly expensively copies all of the data, unless content_addressed is
+        enabled, in which case the copies reference the blobs of the source assets.
         """
         source_query = query_for_course(source_course_key)
         # it'd be great to figure out how to do all of this on the db server and not pull the bits over
         for asset in self.fs_files.find(source_query):
             asset_key = self.make_id_son(asset)
             # don't convert from string until fs access
-            source_content = self.fs.get(asset_key)
+            source_content = self._get_file(asset_key)
             if isinstance(asset_key, six.string_types):
                 asset_key = AssetKey.from_string(asset_key)
                 __, asset_key = self.asset_db_key(asset_key)
@@ -431,10 +614,13 @@ class MongoContentStore(ContentStore):
                 asset_id = six.text_type(
                     dest_course_key.make_asset_key(asset_key['category'], asset_key['name']).for_branch(None)
                 )
+            if self.content_addressed:
+                self.create_asset(source_content, asset_id, asset, asset_key)
+                continue
             try:
                 self.create_asset(source_content, asset_id, asset, asset_key)
             except FileExists:
-                self.fs.delete(file_id=asset_id)
+                self.delete(asset_id)
                 self.create_asset(source_content, asset_id, asset, asset_key)
 
     def create_asset(self, source_content, asset_id, asset, asset_key):
@@ -446,10 +632,8 @@ class MongoContentStore(ContentStore):
         :param asset_key:
         :return:
         """
-        self.fs.put(
-            source_content.read(),
-            _id=asset_id, filename=asset['filename'], content_type=asset['contentType'],
-            displayname=asset['displayname'], content_son=asset_key,
+        attrs = dict(
+            filename=asset['filename'], displayname=asset['displayname'], content_son=asset_key,
             # thumbnail is not technically correct but will be functionally correct as the code
             # only looks at the name which is not course relative.
             thumbnail_location=asset['thumbnail_location'],
@@ -457,18 +641,31 @@ class MongoContentStore(ContentStore):
             # getattr b/c caching may mean some pickled instances don't have attr
             locked=asset.get('locked', False)
         )
+        if self.content_addressed:
+            if 'blob_id' in asset:
+                blob = self._reuse_blob({'_id': asset['blob_id']})
+            else:
+                blob = self._put_blob(source_content, digest=asset.get('md5'))
+            self._put_asset_document(asset_id, blob, contentType=asset['contentType'], **attrs)
+        else:
+            self.fs.put(source_content.read(), _id=asset_id, content_type=asset['contentType'], **attrs)
 
     def delete_all_course_assets(self, course_key):
         """
         Delete all assets identified via this course_key. Dangerous operation which may remove assets
-        referenced by other runs or other courses.
+        referenced by other runs or other courses. The blobs of their data are only released, see
+        collect_orphaned_blobs.
         :param course_key:
         """
         course_query = query_for_course(course_key)
         matching_assets = self.fs_files.find(course_query)
+        blob_ids = []
         for asset in matching_assets:
             asset_key = self.make_id_son(asset)
             self.fs.delete(asset_key)
+            if 'blob_id' in asset:
+                blob_ids.append(asset['blob_id'])
+        self._release_blobs(blob_ids)
 
     # codifying the original order which pymongo used for the dicts coming out of location_to_dict
     # stability of order is more important than sanity of order as any changes to order make things
@@ -517,6 +714,11 @@ class MongoContentStore(ContentStore):
         return dbkey
 
     def ensure_indexes(self):
+        # Index needed by content addressed saves, to find the blob of some data, and by the garbage collection
+        # of blobs, to find the released blobs and the assets referencing a blob.
+        create_collection_index(self.blob_files, [('digest', pymongo.ASCENDING)], background=True)
+        create_collection_index(self.blob_files, [('releasedDate', pymongo.ASCENDING)], sparse=True, background=True)
+        create_collection_index(self.fs_files, [('blob_id', pymongo.ASCENDING)], sparse=True, background=True)
         # Index needed thru 'category' by `_get_all_content_for_course` and others. That query also takes a sort
         # which can be `uploadDate`, `displayname`,
         # TODO: uncomment this line once this index in prod is cleaned up. See OPS-2863 for tracking clean up.
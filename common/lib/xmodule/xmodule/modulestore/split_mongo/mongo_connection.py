@@ -8,7 +8,9 @@ import logging
 import math
 import re
 import zlib
+from collections import OrderedDict
 from contextlib import contextmanager
+from threading import Lock
 from time import time
 
 import pymongo
@@ -26,7 +28,10 @@ from xmodule.modulestore.split_mongo import BlockKey
 from xmodule.mongo_utils import connect_to_mongodb, create_collection_index
 
 try:
+    from django.conf import settings
     from django.core.cache import caches, InvalidCacheBackendError
+    from edx_django_utils.cache import RequestCache
+    from edx_django_utils.monitoring import set_custom_metric
     DJANGO_AVAILABLE = True
 except ImportError:
     DJANGO_AVAILABLE = False
@@ -34,6 +39,8 @@ except ImportError:
 new_contract('BlockData', BlockData)
 log = logging.getLogger(__name__)
 
+STRUCTURE_PROCESS_CACHE_BYPASS_NAMESPACE = 'split_mongo.structure_process_cache.bypass'
+
 
 def get_cache(alias):
     """
@@ -44,6 +51,28 @@ def get_cache(alias):
     return caches[alias]
 
 
+def bypass_structure_process_cache():
+    """
+    Bypasses the per-process structure cache for the remainder of the
+    current request, e.g. for a request that must read structures as
+    stored in the shared cache.
+    """
+    if DJANGO_AVAILABLE:
+        RequestCache(STRUCTURE_PROCESS_CACHE_BYPASS_NAMESPACE).set('bypass', True)
+
+
+def get_structure_process_cache_max_size():
+    """
+    Returns the maximum total size of the structures in the per-process
+    structure cache for the current request, 0 if it is not to be used.
+    """
+    if not DJANGO_AVAILABLE or not settings.configured:
+        return 0
+    if RequestCache(STRUCTURE_PROCESS_CACHE_BYPASS_NAMESPACE).get_cached_response('bypass').is_found:
+        return 0
+    return getattr(settings, 'COURSE_STRUCTURE_PROCESS_CACHE_MAX_SIZE', 0)
+
+
 def round_power_2(value):
     """
     Return value rounded up to the nearest power of 2.
@@ -204,6 +233,69 @@ def structure_to_mongo(structure, course_context=None):
         return new_structure
 
 
+class StructureProcessCache(object):
+    """
+    Per-process LRU cache of decoded course structures, keyed by structure
+    id, and bounded by the total size of their pickled data.
+
+    Structures are immutable by id, so the cached structures are shared by
+    all their readers and must never be modified in place. Modified
+    structures are copies with a new id, see
+    SplitMongoModuleStore.version_structure.
+    """
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Returns the structure cached for the given key, or None if not found.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, structure, size, max_size):
+        """
+        Caches the given structure of the given size, and evicts the least
+        recently used structures until the total size is at most max_size.
+        """
+        if size > max_size:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (structure, size)
+            self.size += size
+            while self.size > max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Removes all structures.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+
+STRUCTURE_PROCESS_CACHE = StructureProcessCache()
+
+
 class CourseStructureCache(object):
     """
     Wrapper around django cache object to cache course structure objects.
@@ -221,7 +313,17 @@ class CourseStructureCache(object):
                 pass
 
     def get(self, key, course_context=None):
-        """Pull the compressed, pickled struct data from cache and deserialize."""
+        """
+        Get the structure from the per-process structure cache, or pull the
+        compressed, pickled struct data from cache and deserialize.
+        """
+        process_cache_max_size = get_structure_process_cache_max_size()
+        if process_cache_max_size:
+            structure = STRUCTURE_PROCESS_CACHE.get(key)
+            _set_process_cache_metrics(structure is not None)
+            if structure is not None:
+                return structure
+
         if self.cache is None:
             return None
 
@@ -241,24 +343,35 @@ class CourseStructureCache(object):
                 tagger.measure('uncompressed_size', len(pickled_data))
 
                 if six.PY2:
-                    return pickle.loads(pickled_data)
+                    structure = pickle.loads(pickled_data)
                 else:
-                    return pickle.loads(pickled_data, encoding='latin-1')
+                    structure = pickle.loads(pickled_data, encoding='latin-1')
             except Exception:
                 # The cached data is corrupt in some way, get rid of it.
                 log.warning("CourseStructureCache: Bad data in cache for %s", course_context)
                 self.cache.delete(key)
                 return None
 
+        if process_cache_max_size:
+            STRUCTURE_PROCESS_CACHE.set(key, structure, len(pickled_data), process_cache_max_size)
+        return structure
+
     def set(self, key, structure, course_context=None):
         """Given a structure, will pickle, compress, and write to cache."""
-        if self.cache is None:
+        process_cache_max_size = get_structure_process_cache_max_size()
+        if self.cache is None and not process_cache_max_size:
             return None
 
         with TIMER.timer("CourseStructureCache.set", course_context) as tagger:
             pickled_data = pickle.dumps(structure, 4)  # Protocol can't be incremented until cache is cleared
             tagger.measure('uncompressed_size', len(pickled_data))
 
+            if process_cache_max_size:
+                STRUCTURE_PROCESS_CACHE.set(key, structure, len(pickled_data), process_cache_max_size)
+
+            if self.cache is None:
+                return None
+
             # 1 = Fastest (slightly larger results)
             compressed_pickled_data = zlib.compress(pickled_data, 1)
             tagger.measure('compressed_size', len(compressed_pickled_data))
@@ -267,6 +380,15 @@ class CourseStructureCache(object):
             self.cache.set(key, compressed_pickled_data, None)
 
 
+def _set_process_cache_metrics(hit):
+    """
+    Sets custom metrics of the per-process structure cache.
+    """
+    set_custom_metric('split_mongo_structure_process_cache_hit', hit)
+    set_custom_metric('split_mongo_structure_process_cache_size', STRUCTURE_PROCESS_CACHE.size)
+    set_custom_metric('split_mongo_structure_process_cache_evictions', STRUCTURE_PROCESS_CACHE.evictions)
+
+
 class MongoConnection(object):
     """
     Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
@@ -3,6 +3,8 @@
 """
 
 
+import datetime
+import hashlib
 import logging
 import mimetypes
 import shutil
@@ -12,6 +14,7 @@ from uuid import uuid4
 
 import ddt
 import path
+from mock import patch
 from opaque_keys.edx.keys import AssetKey
 from opaque_keys.edx.locator import AssetLocator, CourseLocator
 
@@ -38,6 +41,8 @@ class TestContentstore(unittest.TestCase):
     asset_deprecated = None
     ssck_deprecated = None
 
+    content_addressed = False
+
     @classmethod
     def tearDownClass(cls):
         """
@@ -59,7 +64,7 @@ class TestContentstore(unittest.TestCase):
         """
         # since MongoModuleStore and MongoContentStore are basically assumed to be together, create this class
         # as well
-        self.contentstore = MongoContentStore(HOST, DB, port=PORT)
+        self.contentstore = MongoContentStore(HOST, DB, port=PORT, content_addressed=self.content_addressed)
         self.addCleanup(self.contentstore._drop_database)  # pylint: disable=protected-access
 
         AssetLocator.deprecated = deprecated
@@ -223,3 +228,126 @@ class TestContentstore(unittest.TestCase):
         # ensure it didn't remove any from other course
         __, count = self.contentstore.get_all_content_for_course(self.course2_key)
         self.assertEqual(count, len(self.course2_files))
+
+
+@ddt.ddt
+class TestContentAddressedContentstore(TestContentstore):
+    """
+    Test the methods in contentstore.mongo with content addressed asset data
+    """
+    content_addressed = True
+
+    def assert_blob_count(self, expected_count):
+        """
+        Asserts the number of blobs holding asset data.
+        """
+        self.assertEqual(self.contentstore.blob_files.count_documents({}), expected_count)
+
+    def asset_blob_id(self, asset_key):
+        """
+        Returns the id of the blob holding the data of the given asset.
+        """
+        return self.contentstore.get_attr(asset_key, 'blob_id')
+
+    @ddt.data(True, False)
+    def test_deduplicated(self, deprecated):
+        """
+        Test that assets with the same data share the same blob
+        """
+        self.set_up_assets(deprecated)
+        # picture1.jpg is an asset of both courses
+        self.assert_blob_count(len(set(self.course1_files + self.course2_files)))
+        self.assertEqual(
+            self.asset_blob_id(self.course1_key.make_asset_key('asset', 'picture1.jpg')),
+            self.asset_blob_id(self.course2_key.make_asset_key('asset', 'picture1.jpg')),
+        )
+        self.assertEqual(self.contentstore.chunks.count_documents({}), 0)
+
+    @ddt.data(True, False)
+    def test_copy_assets_shares_blobs(self, deprecated):
+        """
+        Test that copied assets reference the blobs of the source assets
+        """
+        self.set_up_assets(deprecated)
+        dest_course = CourseLocator('test', 'destination', 'copy')
+        self.contentstore.copy_all_course_assets(self.course1_key, dest_course)
+        self.assert_blob_count(len(set(self.course1_files + self.course2_files)))
+        for filename in self.course1_files:
+            self.assertEqual(
+                self.asset_blob_id(self.course1_key.make_asset_key('asset', filename)),
+                self.asset_blob_id(dest_course.make_asset_key('asset', filename)),
+            )
+            self.assertEqual(
+                self.contentstore.find(self.course1_key.make_asset_key('asset', filename)).data,
+                self.contentstore.find(dest_course.make_asset_key('asset', filename)).data,
+            )
+
+    def collect_orphaned_blobs(self):
+        """
+        Collects the orphaned blobs without a grace period.
+        """
+        return self.contentstore.collect_orphaned_blobs(grace_period=datetime.timedelta(0))
+
+    @ddt.data(True, False)
+    def test_delete_assets_collects_blobs(self, deprecated):
+        """
+        Test that deleting assets only releases their blobs, which are then collected unless other assets
+        reference them
+        """
+        self.set_up_assets(deprecated)
+        blob_count = len(set(self.course1_files + self.course2_files))
+        self.contentstore.delete_all_course_assets(self.course1_key)
+        self.assert_blob_count(blob_count)
+        self.assertEqual(self.collect_orphaned_blobs(), blob_count - len(self.course2_files))
+        self.assert_blob_count(len(self.course2_files))
+        for filename in self.course2_files:
+            self.assertIsNotNone(self.contentstore.find(self.course2_key.make_asset_key('asset', filename)).data)
+
+        self.contentstore.delete(self.course2_key.make_asset_key('asset', self.course2_files[0]))
+        self.assertEqual(self.collect_orphaned_blobs(), 1)
+        self.assert_blob_count(len(self.course2_files) - 1)
+
+    @ddt.data(True, False)
+    def test_collect_keeps_reused_blobs(self, deprecated):
+        """
+        Test that released blobs which a save reused within the grace period are kept
+        """
+        with patch('xmodule.contentstore.mongo.datetime') as mock_datetime:
+            mock_datetime.datetime.utcnow.return_value = datetime.datetime.utcnow() - datetime.timedelta(hours=1)
+            self.set_up_assets(deprecated)
+            self.contentstore.delete(self.course2_key.make_asset_key('asset', 'picture3.jpg'))
+            asset_key = self.course2_key.make_asset_key('asset', 'door_2.ogg')
+            data = self.contentstore.find(asset_key).data
+            self.contentstore.delete(asset_key)
+
+        # A save of the same data finds the released blob before its asset references it.
+        self.contentstore._put_blob([data], digest=hashlib.md5(data).hexdigest())  # pylint: disable=protected-access
+        self.assertEqual(self.contentstore.collect_orphaned_blobs(grace_period=datetime.timedelta(minutes=30)), 1)
+        self.assertIsNotNone(self.contentstore.blob_files.find_one({'digest': hashlib.md5(data).hexdigest()}))
+
+    @ddt.data(True, False)
+    def test_save_replaces_blob(self, deprecated):
+        """
+        Test that saving new data for an asset collects the blob of its previous data
+        """
+        self.set_up_assets(deprecated)
+        asset_key = self.course2_key.make_asset_key('asset', 'door_2.ogg')
+        self.contentstore.save(StaticContent(asset_key, 'door_2.ogg', 'audio/ogg', b'new data'))
+        self.assertEqual(self.contentstore.find(asset_key).data, b'new data')
+        self.assertEqual(self.collect_orphaned_blobs(), 1)
+        self.assert_blob_count(len(set(self.course1_files + self.course2_files)))
+
+    @ddt.data(True, False)
+    def test_save_over_legacy_asset(self, deprecated):
+        """
+        Test that saving over an asset with its own chunks removes them
+        """
+        self.set_up_assets(deprecated)
+        legacy_contentstore = MongoContentStore(HOST, DB, port=PORT)
+        asset_key = self.course1_key.make_asset_key('asset', 'legacy.txt')
+        legacy_contentstore.save(StaticContent(asset_key, 'legacy.txt', 'text/plain', b'legacy data'))
+        self.assertEqual(self.contentstore.find(asset_key).data, b'legacy data')
+
+        self.contentstore.save(StaticContent(asset_key, 'legacy.txt', 'text/plain', b'new data'))
+        self.assertEqual(self.contentstore.find(asset_key).data, b'new data')
+        self.assertEqual(self.contentstore.chunks.count_documents({}), 0)
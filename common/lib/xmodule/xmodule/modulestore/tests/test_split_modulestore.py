@@ -15,6 +15,8 @@ import six
 from ccx_keys.locator import CCXBlockUsageLocator
 from contracts import contract
 from django.core.cache import InvalidCacheBackendError, caches
+from django.test.utils import override_settings
+from edx_django_utils.cache import RequestCache
 from mock import patch
 from opaque_keys.edx.locator import BlockUsageLocator, CourseKey, CourseLocator, LocalId, VersionTree
 from path import Path as path
@@ -36,6 +38,11 @@ from xmodule.modulestore.exceptions import (
 )
 from xmodule.modulestore.inheritance import InheritanceMixin
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import (
+    STRUCTURE_PROCESS_CACHE,
+    StructureProcessCache,
+    bypass_structure_process_cache
+)
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.modulestore.tests.factories import check_mongo_calls
 from xmodule.modulestore.tests.mongo_connection import MONGO_HOST, MONGO_PORT_NUM
@@ -1013,6 +1020,46 @@ class TestCourseStructureCache(SplitModuleTest):
         # now make sure that you get the same structure
         self.assertEqual(cached_structure, not_cached_structure)
 
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_structure_process_cache(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+        STRUCTURE_PROCESS_CACHE.clear()
+        self.addCleanup(STRUCTURE_PROCESS_CACHE.clear)
+        self.addCleanup(RequestCache.clear_all_namespaces)
+
+        with override_settings(COURSE_STRUCTURE_PROCESS_CACHE_MAX_SIZE=10 ** 8):
+            with check_mongo_calls(1):
+                not_cached_structure = self._get_structure(self.new_course)
+
+            # the structure is decoded once per process, whatever the shared cache holds
+            self.cache.set(self.new_course.id.version_guid, b"bad_data")
+            with check_mongo_calls(0):
+                cached_structure = self._get_structure(self.new_course)
+            self.assertIs(cached_structure, not_cached_structure)
+
+            bypass_structure_process_cache()
+            with check_mongo_calls(1):
+                bypassed_structure = self._get_structure(self.new_course)
+            self.assertIsNot(bypassed_structure, not_cached_structure)
+            self.assertEqual(bypassed_structure, not_cached_structure)
+
+    def test_structure_process_cache_eviction(self):
+        process_cache = StructureProcessCache()
+        process_cache.set('a', {'_id': 'a'}, 4, 10)
+        process_cache.set('b', {'_id': 'b'}, 4, 10)
+        self.assertEqual(process_cache.get('a'), {'_id': 'a'})
+
+        # the least recently used structure is evicted
+        process_cache.set('c', {'_id': 'c'}, 4, 10)
+        self.assertIsNone(process_cache.get('b'))
+        self.assertEqual(process_cache.get('a'), {'_id': 'a'})
+        self.assertEqual((process_cache.size, process_cache.evictions), (8, 1))
+
+        # structures larger than the cache are not cached
+        process_cache.set('d', {'_id': 'd'}, 11, 10)
+        self.assertIsNone(process_cache.get('d'))
+        self.assertEqual(process_cache.size, 8)
+
     def _get_structure(self, course):
         """
         Helper function to get a structure from a course.
@@ -3,8 +3,11 @@ Tests for XML importer.
 """
 
 
+import hashlib
 import importlib
 import os
+import shutil
+import tempfile
 import unittest
 from uuid import uuid4
 
@@ -381,14 +384,96 @@ class StaticContentImporterTest(unittest.TestCase):
                 'static/inner/file1.txt', base_dir=expected_base_dir
             )
 
+    def _create_static_files(self, file_data):
+        """
+        Creates the given static files in a temporary directory, and returns its path.
+        """
+        base_dir = path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, base_dir)
+        for filename, data in file_data.items():
+            with open(base_dir / filename, 'wb') as static_file:
+                static_file.write(data)
+        return base_dir
+
     def test_import_static_file(self):
-        base_dir = path('/path/to/dir')
-        full_file_path = os.path.join(base_dir, 'static/some_file.txt')
+        base_dir = self._create_static_files({'some_file.txt': b'data'})
+        full_file_path = os.path.join(base_dir, 'some_file.txt')
+        self.mocked_content_store.find.return_value = None
         self.mocked_content_store.generate_thumbnail.return_value = (None, None)
-        with mock.patch(OPEN_BUILTIN, mock.mock_open(read_data=b"data")) as mock_file:
+        saved_data = []
+        self.mocked_content_store.save.side_effect = lambda content: saved_data.append(
+            b''.join(content.stream_data())
+        )
+        with mock.patch(OPEN_BUILTIN, wraps=open) as mock_file:
             self.static_content_importer.import_static_file(
                 full_file_path=full_file_path,
                 base_dir=base_dir
             )
             mock_file.assert_called_with(full_file_path, 'rb')
             self.mocked_content_store.generate_thumbnail.assert_called_once()
+        self.assertEqual(saved_data, [b'data'])
+
+    def _mock_existing_content(self, data, **kwargs):
+        """
+        Returns a mock of the asset of some_file.txt as found in the content store.
+        """
+        existing_content = mock.Mock(
+            content_type='text/plain',
+            import_path='some_file.txt',
+            locked=False,
+            length=len(data),
+            content_digest=hashlib.md5(data).hexdigest(),
+        )
+        existing_content.name = 'some_file.txt'
+        for attr, value in kwargs.items():
+            setattr(existing_content, attr, value)
+        self.mocked_content_store.find.return_value = existing_content
+        return existing_content
+
+    def test_import_static_file_unchanged(self):
+        base_dir = self._create_static_files({'some_file.txt': b'data'})
+        existing_content = self._mock_existing_content(b'data')
+        self.static_content_importer.import_static_file(os.path.join(base_dir, 'some_file.txt'), base_dir=base_dir)
+        self.mocked_content_store.generate_thumbnail.assert_not_called()
+        self.mocked_content_store.save.assert_not_called()
+        existing_content.close.assert_called_once_with()
+
+    def test_import_static_file_changed(self):
+        base_dir = self._create_static_files({'some_file.txt': b'data'})
+        self.mocked_content_store.generate_thumbnail.return_value = (None, None)
+        for existing_content in (
+            self._mock_existing_content(b'atad'),
+            self._mock_existing_content(b'data', locked=True),
+        ):
+            self.mocked_content_store.find.return_value = existing_content
+            self.static_content_importer.import_static_file(
+                os.path.join(base_dir, 'some_file.txt'), base_dir=base_dir
+            )
+        self.assertEqual(self.mocked_content_store.save.call_count, 2)
+
+    def test_import_static_content_directory_in_workers(self):
+        file_data = {'file{}.txt'.format(index): b'data' for index in range(5)}
+        course_data_path = self._create_static_files({})
+        os.mkdir(course_data_path / 'static')
+        for filename, data in file_data.items():
+            with open(course_data_path / 'static' / filename, 'wb') as static_file:
+                static_file.write(data)
+        progress_callback = mock.Mock()
+        self.mocked_content_store.find.return_value = None
+        self.mocked_content_store.generate_thumbnail.return_value = (None, None)
+        static_content_importer = StaticContentImporter(
+            static_content_store=self.mocked_content_store,
+            course_data_path=course_data_path,
+            target_id=CourseKey.from_string('course-v1:edX+DemoX+Demo_Course'),
+            max_workers=3,
+            progress_callback=progress_callback,
+        )
+
+        remap_dict = static_content_importer.import_static_content_directory('static')
+
+        self.assertEqual(set(remap_dict), set(file_data))
+        self.assertEqual(self.mocked_content_store.save.call_count, len(file_data))
+        self.assertEqual(
+            [call[0][1:] for call in progress_callback.call_args_list],
+            [(imported_count, len(file_data)) for imported_count in range(1, len(file_data) + 1)],
+        )
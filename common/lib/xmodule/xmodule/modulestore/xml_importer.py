@@ -22,6 +22,7 @@ Modulestore virtual   |          XML physical (draft, published)
 """
 
 
+import hashlib
 import json
 import io
 import logging
@@ -29,6 +30,8 @@ import mimetypes
 import os
 import re
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 
 import six
 import xblock
@@ -41,7 +44,7 @@ from xblock.fields import Reference, ReferenceList, ReferenceValueDict, Scope
 from xblock.runtime import DictKeyValueStore, KvsFieldData
 
 from xmodule.assetstore import AssetMetadata
-from xmodule.contentstore.content import StaticContent
+from xmodule.contentstore.content import StaticContent, StaticContentStream
 from xmodule.errortracker import make_error_tracker
 from xmodule.library_tools import LibraryToolsService
 from xmodule.modulestore import ModuleStoreEnum
@@ -60,6 +63,7 @@ from .store_utilities import rewrite_nonportable_content_links
 log = logging.getLogger(__name__)
 
 DEFAULT_STATIC_CONTENT_SUBDIR = 'static'
+STATIC_FILE_HASH_CHUNK_SIZE = 1024 * 1024
 
 
 class LocationMixin(XBlockMixin):
@@ -84,10 +88,25 @@ class LocationMixin(XBlockMixin):
 
 
 class StaticContentImporter:
-    def __init__(self, static_content_store, course_data_path, target_id):
+    """
+    Imports the static files of a course into a contentstore.
+
+    Files are streamed into the contentstore rather than read into memory,
+    and files whose asset already holds the same content and metadata are
+    skipped. With max_workers greater than 1, a directory's files are
+    imported, and their thumbnails generated, concurrently by a pool of
+    max_workers threads.
+
+    progress_callback, if given, is called in the importing thread with the
+    subpath of every imported file, the number of files of its directory
+    imported so far and their total number.
+    """
+    def __init__(self, static_content_store, course_data_path, target_id, max_workers=1, progress_callback=None):
         self.static_content_store = static_content_store
         self.target_id = target_id
         self.course_data_path = course_data_path
+        self.max_workers = max_workers
+        self.progress_callback = progress_callback
         try:
             with open(course_data_path / 'policies/assets.json') as f:
                 self.policy = json.load(f)
@@ -104,6 +123,7 @@ class StaticContentImporter:
         remap_dict = {}
 
         static_dir = self.course_data_path / content_subdir
+        file_paths = []
         for dirname, _, filenames in os.walk(static_dir):
             for filename in filenames:
 
@@ -114,23 +134,51 @@ class StaticContentImporter:
                         log.debug('skipping static content %s...', file_path)
                     continue
 
-                if verbose:
-                    log.debug('importing static content %s...', file_path)
+                file_paths.append(file_path)
 
-                imported_file_attrs = self.import_static_file(file_path, base_dir=static_dir)
+        def import_file(file_path):
+            """
+            Imports the given file of the static directory.
+            """
+            if verbose:
+                log.debug('importing static content %s...', file_path)
+            return self.import_static_file(file_path, base_dir=static_dir)
 
-                if imported_file_attrs:
-                    # store the remapping information which will be needed
-                    # to subsitute in the module data
-                    remap_dict[imported_file_attrs[0]] = imported_file_attrs[1]
+        def add_imported_file(imported_file_attrs, imported_count):
+            """
+            Records the given imported file and reports the progress.
+            """
+            if imported_file_attrs:
+                # store the remapping information which will be needed
+                # to subsitute in the module data
+                remap_dict[imported_file_attrs[0]] = imported_file_attrs[1]
+
+            if self.progress_callback:
+                self.progress_callback(
+                    imported_file_attrs[0] if imported_file_attrs else None, imported_count, len(file_paths)
+                )
+
+        if self.max_workers > 1 and len(file_paths) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(import_file, file_path) for file_path in file_paths]
+                try:
+                    for imported_count, future in enumerate(as_completed(futures), 1):
+                        add_imported_file(future.result(), imported_count)
+                except Exception:
+                    # Don't start importing the remaining files once one of them failed.
+                    for future in futures:
+                        future.cancel()
+                    raise
+        else:
+            for imported_count, file_path in enumerate(file_paths, 1):
+                add_imported_file(import_file(file_path), imported_count)
 
         return remap_dict
 
     def import_static_file(self, full_file_path, base_dir):
         filename = os.path.basename(full_file_path)
         try:
-            with open(full_file_path, 'rb') as f:
-                data = f.read()
+            f = open(full_file_path, 'rb')
         except IOError:
             # OS X "companion files". See
             # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
@@ -158,27 +206,63 @@ class StaticContentImporter:
         # Check extracted contentType in list of all valid mimetypes
         if not mime_type or mime_type not in self.mimetypes_list:
             mime_type = mimetypes.guess_type(filename)[0]  # Assign guessed mimetype
-        content = StaticContent(
-            asset_key, displayname, mime_type, data,
-            import_path=file_subpath, locked=locked
-        )
 
-        # first let's save a thumbnail so we can get back a thumbnail location
-        thumbnail_content, thumbnail_location = self.static_content_store.generate_thumbnail(content)
+        with f:
+            content = StaticContentStream(
+                asset_key, displayname, mime_type, f,
+                import_path=file_subpath, length=os.fstat(f.fileno()).st_size, locked=locked
+            )
+            if self._is_unchanged(content, f):
+                log.debug(u'Skipping unchanged static content %s', file_subpath)
+                return file_subpath, asset_key
 
-        if thumbnail_content is not None:
-            content.thumbnail_location = thumbnail_location
+            # first let's save a thumbnail so we can get back a thumbnail location
+            thumbnail_content, thumbnail_location = self.static_content_store.generate_thumbnail(
+                content, tempfile_path=full_file_path
+            )
 
-        # then commit the content
-        try:
-            self.static_content_store.save(content)
-        except Exception as err:
-            log.exception(u'Error importing {0}, error={1}'.format(
-                file_subpath, err
-            ))
+            if thumbnail_content is not None:
+                content.thumbnail_location = thumbnail_location
+
+            # then commit the content
+            try:
+                self.static_content_store.save(content)
+            except Exception as err:
+                log.exception(u'Error importing {0}, error={1}'.format(
+                    file_subpath, err
+                ))
 
         return file_subpath, asset_key
 
+    def _is_unchanged(self, content, source_file):
+        """
+        Returns whether the asset of the given content already exists with the
+        same metadata and with the same data as the given source file.
+        """
+        existing_content = self.static_content_store.find(content.location, throw_on_not_found=False, as_stream=True)
+        if existing_content is None:
+            return False
+
+        try:
+            if (
+                existing_content.name != content.name or
+                existing_content.content_type != content.content_type or
+                existing_content.import_path != content.import_path or
+                existing_content.locked != content.locked or
+                existing_content.length != content.length or
+                not existing_content.content_digest
+            ):
+                return False
+
+            # The digest of GridFS files is the MD5 of their data.
+            digest = hashlib.md5()
+            for chunk in iter(partial(source_file.read, STATIC_FILE_HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+            source_file.seek(0)
+            return digest.hexdigest() == existing_content.content_digest
+        finally:
+            existing_content.close()
+
 
 class ImportManager(object):
     """
@@ -221,6 +305,11 @@ class ImportManager(object):
         python_lib_filename: The filename of the courselike's python library. Course authors can optionally
             create this file to implement custom logic in their course.
 
+        static_content_workers: The number of threads importing static files concurrently.
+
+        static_content_progress_callback: If specified, called with the progress of the static files import.
+            See StaticContentImporter.
+
         default_class, load_error_modules: are arguments for constructing the XMLModuleStore (see its doc)
     """
     store_class = XMLModuleStore
@@ -234,6 +323,7 @@ class ImportManager(object):
             create_if_not_present=False, raise_on_failure=False,
             static_content_subdir=DEFAULT_STATIC_CONTENT_SUBDIR,
             python_lib_filename='python_lib.zip',
+            static_content_workers=1, static_content_progress_callback=None,
     ):
         self.store = store
         self.user_id = user_id
@@ -245,6 +335,8 @@ class ImportManager(object):
         self.verbose = verbose
         self.static_content_subdir = static_content_subdir
         self.python_lib_filename = python_lib_filename
+        self.static_content_workers = static_content_workers
+        self.static_content_progress_callback = static_content_progress_callback
         self.do_import_static = do_import_static
         self.do_import_python_lib = do_import_python_lib
         self.create_if_not_present = create_if_not_present
@@ -280,7 +372,9 @@ class ImportManager(object):
         static_content_importer = StaticContentImporter(
             self.static_content_store,
             course_data_path=data_path,
-            target_id=dest_id
+            target_id=dest_id,
+            max_workers=self.static_content_workers,
+            progress_callback=self.static_content_progress_callback,
         )
         if self.do_import_static:
             if self.verbose:
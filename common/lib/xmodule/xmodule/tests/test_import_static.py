@@ -38,15 +38,18 @@ class IgnoredFilesTestCase(unittest.TestCase):
         """
         course_id = CourseLocator("edX", "course_ignore", "2014_Fall")
         content_store = Mock()
+        content_store.find.return_value = None
         content_store.generate_thumbnail.return_value = ("content", "location")
+        name_val = {}
+        content_store.save.side_effect = lambda content: name_val.update(
+            {content.name: b''.join(content.stream_data())}
+        )
         static_content_importer = StaticContentImporter(
             static_content_store=content_store,
             course_data_path=self.course_dir,
             target_id=course_id
         )
         static_content_importer.import_static_content_directory()
-        saved_static_content = [call[0][0] for call in content_store.save.call_args_list]
-        name_val = {sc.name: sc.data for sc in saved_static_content}
         self.assertIn("example.txt", name_val)
         self.assertIn(".example.txt", name_val)
         self.assertIn(b"GREEN", name_val["example.txt"])
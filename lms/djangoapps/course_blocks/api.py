@@ -8,10 +8,12 @@ from django.conf import settings
 from edx_when import field_data
 
 from lms.djangoapps.course_api.blocks.transformers.block_completion import BlockCompletionTransformer
+from openedx.core.djangoapps.content.block_structure import config as block_structure_config
 from openedx.core.djangoapps.content.block_structure.api import get_block_structure_manager
 from openedx.core.djangoapps.content.block_structure.transformers import BlockStructureTransformers
 from openedx.features.content_type_gating.block_transformers import ContentTypeGateTransformer
 
+from . import transformed_cache
 from .transformers import library_content, load_override_data, start_date, user_partitions, visibility
 from .usage_info import CourseUsageInfo
 
@@ -75,7 +77,9 @@ def get_course_blocks(
 
         transformers (BlockStructureTransformers) - A collection of
             transformers whose transform methods are to be called.
-            If None, get_course_block_access_transformers() is used.
+            If None, get_course_block_access_transformers() is used,
+            and the transformed block structure is cached if the
+            course_blocks.transformed_cache switch is enabled.
 
         collected_block_structure (BlockStructureBlockData) - A
             block structure retrieved from a prior call to
@@ -91,14 +95,56 @@ def get_course_blocks(
             exactly equivalent to the blocks that the given user has
             access.
     """
+    usage_info = CourseUsageInfo(starting_block_usage_key.course_key, user, allow_start_dates_in_future)
+    if not transformers and transformed_cache.is_enabled(usage_info):
+        block_structure = _get_cached_course_blocks(usage_info, starting_block_usage_key, collected_block_structure)
+        if include_completion:
+            # The completion transformer has no filters and comes last,
+            # so applying it to the cached structure yields the same result.
+            BlockStructureTransformers([BlockCompletionTransformer()], usage_info).transform(block_structure)
+        return block_structure
+
     if not transformers:
         transformers = BlockStructureTransformers(get_course_block_access_transformers(user))
     if include_completion:
         transformers += [BlockCompletionTransformer()]
-    transformers.usage_info = CourseUsageInfo(starting_block_usage_key.course_key, user, allow_start_dates_in_future)
+    transformers.usage_info = usage_info
 
     return get_block_structure_manager(starting_block_usage_key.course_key).get_transformed(
         transformers,
         starting_block_usage_key,
         collected_block_structure,
+        use_index=_use_indexed_traversal(),
     )
+
+
+def _use_indexed_traversal():
+    """
+    Returns whether the transformers' filters are to traverse the
+    integer index of the block relations instead of the relations
+    themselves.  Both traversals yield the same block structure.
+    """
+    return block_structure_config.waffle().is_enabled(block_structure_config.INDEXED_TRAVERSAL)
+
+
+def _get_cached_course_blocks(usage_info, starting_block_usage_key, collected_block_structure):
+    """
+    Returns the block structure transformed by the default course block
+    access transformers for the given usage info, from the transformed
+    block structures cache if found there.
+    """
+    manager = get_block_structure_manager(usage_info.course_key)
+    collected_block_structure = collected_block_structure or manager.get_collected()
+
+    cache_key = transformed_cache.get_cache_key(usage_info, starting_block_usage_key, collected_block_structure)
+    block_structure = transformed_cache.get_block_structure(cache_key, starting_block_usage_key)
+    if block_structure is None:
+        transformers = BlockStructureTransformers(get_course_block_access_transformers(usage_info.user), usage_info)
+        block_structure = manager.get_transformed(
+            transformers,
+            starting_block_usage_key,
+            collected_block_structure,
+            use_index=_use_indexed_traversal(),
+        )
+        transformed_cache.set_block_structure(cache_key, block_structure)
+    return block_structure
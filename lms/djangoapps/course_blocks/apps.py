@@ -0,0 +1,19 @@
+"""
+Configuration for the course_blocks djangoapp
+"""
+
+
+from django.apps import AppConfig
+
+
+class CourseBlocksConfig(AppConfig):
+    """
+    course_blocks django app.
+    """
+    name = u'lms.djangoapps.course_blocks'
+
+    def ready(self):
+        """
+        Connect signal handlers.
+        """
+        from . import signals  # pylint: disable=unused-variable
@@ -0,0 +1,79 @@
+"""
+Signal handlers for invalidating the cached transformed block structures.
+"""
+
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from edx_when.models import UserDate
+
+from lms.djangoapps.courseware.models import StudentFieldOverride
+from openedx.core.djangoapps.course_groups.signals.signals import COHORT_MEMBERSHIP_UPDATED
+from openedx.core.djangoapps.schedules.models import Schedule
+from student.models import CourseAccessRole
+from student.signals import ENROLL_STATUS_CHANGE, ENROLLMENT_TRACK_UPDATED
+
+from . import transformed_cache
+
+# Publishes are not handled here: they are sent in Studio, and the version of
+# the course content is part of the key of the transformed block structures.
+
+
+@receiver(ENROLL_STATUS_CHANGE)
+def _invalidate_user_on_enrollment_change(sender, user, course_id, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the transformed block structures of a user whose
+    enrollment in a course changed.
+    """
+    transformed_cache.invalidate_user(user.id, course_id)
+
+
+@receiver(ENROLLMENT_TRACK_UPDATED)
+@receiver(COHORT_MEMBERSHIP_UPDATED)
+def _invalidate_user_on_group_change(sender, user, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the transformed block structures of a user whose
+    enrollment track or cohort in a course changed.
+    """
+    transformed_cache.invalidate_user(user.id, course_key)
+
+
+@receiver(post_save, sender=StudentFieldOverride)
+@receiver(post_delete, sender=StudentFieldOverride)
+def _invalidate_user_on_field_override(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the transformed block structures of a user whose block
+    fields are overridden.
+    """
+    transformed_cache.invalidate_user(instance.student_id, instance.course_id)
+
+
+@receiver(post_save, sender=CourseAccessRole)
+@receiver(post_delete, sender=CourseAccessRole)
+def _invalidate_user_on_course_role_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the transformed block structures of a user whose role in a
+    course, such as beta tester, changed.
+    """
+    if instance.course_id:
+        transformed_cache.invalidate_user(instance.user_id, instance.course_id)
+
+
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+def _invalidate_user_on_schedule_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the transformed block structures of a user whose schedule
+    in a course, which relative dates are computed from, changed.
+    """
+    transformed_cache.invalidate_user(instance.enrollment.user_id, instance.enrollment.course_id)
+
+
+@receiver(post_save, sender=UserDate)
+@receiver(post_delete, sender=UserDate)
+def _invalidate_user_on_date_override(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the transformed block structures of a user whose dates in a
+    course are overridden.
+    """
+    transformed_cache.invalidate_user(instance.user_id, instance.content_date.course_id)
@@ -0,0 +1,56 @@
+"""
+Tests for the course_blocks API.
+"""
+
+
+import ddt
+
+from openedx.core.djangoapps.content.block_structure.config import INDEXED_TRAVERSAL, waffle
+
+from ..api import get_course_blocks
+from ..transformers.tests.helpers import BlockParentsMapTestCase, publish_course, update_block
+from ..transformers.visibility import VisibilityTransformer
+
+
+@ddt.ddt
+class IndexedTraversalTest(BlockParentsMapTestCase):
+    """
+    Tests that transforming with the integer index of the block
+    relations yields the same block structures as the generic traversal.
+    """
+    TRANSFORMER_CLASS_TO_TEST = VisibilityTransformer
+
+    def _get_course_blocks(self, use_index, starting_block_index):
+        with waffle().override(INDEXED_TRAVERSAL, active=use_index):
+            return get_course_blocks(self.student, self.xblock_keys[starting_block_index], self.transformers)
+
+    # Following test cases are based on BlockParentsMapTestCase.parents_map
+    @ddt.data(
+        (set(), 0),
+        ({1}, 0),
+        ({2}, 0),
+        ({4}, 0),
+        ({2, 4}, 0),
+        ({6}, 0),
+        ({2}, 1),
+        ({4}, 2),
+    )
+    @ddt.unpack
+    def test_same_as_generic_traversal(self, staff_only_blocks, starting_block_index):
+        for idx in staff_only_blocks:
+            block = self.get_block(idx)
+            block.visible_to_staff_only = True
+            update_block(block)
+        publish_course(self.course)
+
+        generic_structure = self._get_course_blocks(False, starting_block_index)
+        indexed_structure = self._get_course_blocks(True, starting_block_index)
+
+        self.assertEqual(list(indexed_structure), list(generic_structure))
+        self.assertEqual(
+            list(indexed_structure.topological_traversal()),
+            list(generic_structure.topological_traversal()),
+        )
+        for block_key in generic_structure:
+            self.assertEqual(indexed_structure.get_children(block_key), generic_structure.get_children(block_key))
+            self.assertEqual(indexed_structure.get_parents(block_key), generic_structure.get_parents(block_key))
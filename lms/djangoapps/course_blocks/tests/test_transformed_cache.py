@@ -0,0 +1,96 @@
+"""
+Tests for the cache of transformed course block structures.
+"""
+
+
+from django.utils import timezone
+from mock import patch
+
+from openedx.core.djangoapps.course_groups.signals.signals import COHORT_MEMBERSHIP_UPDATED
+from openedx.core.djangoapps.schedules.models import Schedule
+from student.roles import CourseBetaTesterRole
+from student.tests.factories import CourseEnrollmentFactory, UserFactory
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+from .. import transformed_cache
+from ..api import get_course_blocks
+
+
+class TransformedCacheTest(ModuleStoreTestCase):
+    """
+    Tests for caching the block structures transformed for a user.
+    """
+    ENABLED_CACHES = ['default']
+
+    def setUp(self):
+        super(TransformedCacheTest, self).setUp()
+        self.course = CourseFactory.create()
+        self.chapter = ItemFactory.create(parent=self.course, category='chapter')
+        self.sequential = ItemFactory.create(parent=self.chapter, category='sequential')
+        self.user = UserFactory.create()
+        self.enrollment = CourseEnrollmentFactory.create(user=self.user, course_id=self.course.id)
+
+    def _get_course_blocks(self, user=None, starting_block_usage_key=None):
+        with transformed_cache.WAFFLE_SWITCHES.override(transformed_cache.TRANSFORMED_CACHE, active=True):
+            return get_course_blocks(user or self.user, starting_block_usage_key or self.course.location)
+
+    def _assert_transformed(self, expected_calls):
+        with patch(
+            'openedx.core.djangoapps.content.block_structure.transformers.BlockStructureTransformers.transform',
+        ) as mock_transform:
+            block_structure = self._get_course_blocks()
+        self.assertEqual(mock_transform.call_count, expected_calls)
+        return block_structure
+
+    def test_cached(self):
+        uncached_structure = self._get_course_blocks()
+        cached_structure = self._assert_transformed(0)
+
+        self.assertEqual(set(cached_structure), set(uncached_structure))
+        for block_key in uncached_structure:
+            self.assertEqual(cached_structure.get_children(block_key), uncached_structure.get_children(block_key))
+
+    def test_keyed_by_user_and_starting_block(self):
+        self._get_course_blocks()
+
+        with patch.object(transformed_cache, 'set_block_structure') as mock_set:
+            self._get_course_blocks(user=UserFactory.create())
+            self._get_course_blocks(starting_block_usage_key=self.chapter.location)
+        self.assertEqual(mock_set.call_count, 2)
+
+    def test_disabled(self):
+        get_course_blocks(self.user, self.course.location)
+        with patch.object(transformed_cache, 'get_block_structure') as mock_get:
+            get_course_blocks(self.user, self.course.location)
+        mock_get.assert_not_called()
+
+    def test_invalidate_user(self):
+        self._get_course_blocks()
+        COHORT_MEMBERSHIP_UPDATED.send(sender=None, user=self.user, course_key=self.course.id)
+        self._assert_transformed(1)
+
+    def test_invalidate_user_on_beta_tester_role(self):
+        self._get_course_blocks()
+        CourseBetaTesterRole(self.course.id).add_users(self.user)
+        self._assert_transformed(1)
+
+        self._get_course_blocks()
+        CourseBetaTesterRole(self.course.id).remove_users(self.user)
+        self._assert_transformed(1)
+
+    def test_invalidate_user_on_schedule_change(self):
+        self._get_course_blocks()
+        Schedule.objects.update_or_create(enrollment=self.enrollment, defaults={'start_date': timezone.now()})
+        self._assert_transformed(1)
+
+    def test_invalidate_course(self):
+        self._get_course_blocks()
+        transformed_cache.invalidate_course(self.course.id)
+        self._assert_transformed(1)
+
+    def test_time_bucket(self):
+        with patch.object(transformed_cache, 'time', return_value=0):
+            self._get_course_blocks()
+        with patch.object(transformed_cache, 'time', return_value=60 * 60):
+            self._assert_transformed(1)
@@ -0,0 +1,153 @@
+"""
+Cache of the course block structures transformed for a user by the
+default course block access transformers.
+
+A transformed block structure is cached under a key made of everything
+the access transformers depend on:
+
+    * the version of the course content,
+    * the requested starting block and options,
+    * the user's staff access, beta tester status, user partition groups
+      and masquerade,
+    * a time bucket, since start dates and content gating deadlines
+      pass without any event,
+    * invalidation tokens of the course and of the user in the course.
+
+Publishes need no invalidation, since the version of the course content
+is part of the key.  Changes that are not part of the key, such as
+enrollments, cohorts, course roles, schedules and field or date overrides,
+invalidate the cached structures of the user through their tokens.  See
+signals.py.
+"""
+
+
+from hashlib import sha1
+from time import time
+
+import six
+from django.conf import settings
+from django.core.cache import cache
+from edx_django_utils.monitoring import set_custom_metric
+
+from lms.djangoapps.courseware.masquerade import get_course_masquerade
+from openedx.core.djangoapps.content.block_structure.serializer import (
+    deserialize_block_structure,
+    serialize_block_structure
+)
+from openedx.core.djangoapps.waffle_utils import WaffleSwitchNamespace
+from student.roles import CourseBetaTesterRole
+from xmodule.partitions.partitions_service import get_user_partition_groups
+
+from .transformers.user_partitions import UserPartitionTransformer
+
+WAFFLE_SWITCHES = WaffleSwitchNamespace(name=u'course_blocks')
+
+# Switches
+TRANSFORMED_CACHE = u'transformed_cache'
+
+_TRANSFORMED_CACHE_KEY = u'course_blocks.transformed.{course_key}.{user_id}.{digest}'
+_COURSE_TOKEN_CACHE_KEY = u'course_blocks.transformed.token.{course_key}'
+_USER_TOKEN_CACHE_KEY = u'course_blocks.transformed.token.{course_key}.{user_id}'
+
+
+def is_enabled(usage_info):
+    """
+    Returns whether block structures transformed with the given usage
+    info are to be cached.
+    """
+    return usage_info.user.is_authenticated and WAFFLE_SWITCHES.is_enabled(TRANSFORMED_CACHE)
+
+
+def get_cache_key(usage_info, starting_block_usage_key, collected_block_structure):
+    """
+    Returns the key of the block structure transformed from the given
+    collected block structure with the given usage info.
+    """
+    course_key = usage_info.course_key
+    user = usage_info.user
+    root_block_usage_key = collected_block_structure.root_block_usage_key
+
+    user_partitions = collected_block_structure.get_transformer_data(
+        UserPartitionTransformer, 'user_partitions', []
+    )
+    user_groups = get_user_partition_groups(course_key, user_partitions, user, 'id')
+    masquerade = get_course_masquerade(user, course_key)
+
+    key_data = (
+        collected_block_structure.get_xblock_field(root_block_usage_key, 'course_version'),
+        collected_block_structure.get_xblock_field(root_block_usage_key, 'subtree_edited_on'),
+        six.text_type(starting_block_usage_key),
+        usage_info.allow_start_dates_in_future,
+        usage_info.has_staff_access,
+        CourseBetaTesterRole(course_key).has_user(user),
+        sorted((partition_id, group.id) for partition_id, group in six.iteritems(user_groups)),
+        masquerade and (masquerade.role, masquerade.user_partition_id, masquerade.group_id, masquerade.user_name),
+        int(time() // settings.COURSE_BLOCKS_TRANSFORMED_CACHE['TIME_BUCKET_SECONDS']),
+        _get_tokens(course_key, user.id),
+    )
+    return _TRANSFORMED_CACHE_KEY.format(
+        course_key=course_key,
+        user_id=user.id,
+        digest=sha1(repr(key_data).encode('utf-8')).hexdigest(),
+    )
+
+
+def get_block_structure(cache_key, starting_block_usage_key):
+    """
+    Returns the transformed block structure cached for the given key, or
+    None if not found.
+    """
+    serialized_data = cache.get(cache_key)
+    set_custom_metric('course_blocks_transformed_cache_hit', serialized_data is not None)
+    if serialized_data is None:
+        return None
+    return deserialize_block_structure(serialized_data, starting_block_usage_key)
+
+
+def set_block_structure(cache_key, block_structure):
+    """
+    Caches the given transformed block structure for the given key.
+    """
+    cache.set(
+        cache_key,
+        serialize_block_structure(block_structure),
+        settings.COURSE_BLOCKS_TRANSFORMED_CACHE['TIMEOUT'],
+    )
+
+
+def invalidate_course(course_key):
+    """
+    Invalidates the transformed block structures of all users in the
+    given course.
+    """
+    cache.delete(_COURSE_TOKEN_CACHE_KEY.format(course_key=course_key))
+
+
+def invalidate_user(user_id, course_key):
+    """
+    Invalidates the transformed block structures of the given user in
+    the given course.
+    """
+    cache.delete(_USER_TOKEN_CACHE_KEY.format(course_key=course_key, user_id=user_id))
+
+
+def _get_tokens(course_key, user_id):
+    """
+    Returns the current invalidation tokens of the course and of the user
+    in the course.  Missing tokens are given a new value, so that
+    structures cached before an invalidation are never served again.
+    """
+    token_keys = (
+        _COURSE_TOKEN_CACHE_KEY.format(course_key=course_key),
+        _USER_TOKEN_CACHE_KEY.format(course_key=course_key, user_id=user_id),
+    )
+    tokens = cache.get_many(token_keys)
+
+    new_tokens = {
+        token_key: u'{:.6f}'.format(time())
+        for token_key in token_keys if token_key not in tokens
+    }
+    if new_tokens:
+        cache.set_many(new_tokens, settings.COURSE_BLOCKS_TRANSFORMED_CACHE['TIMEOUT'])
+        tokens.update(new_tokens)
+    return tuple(tokens[token_key] for token_key in token_keys)
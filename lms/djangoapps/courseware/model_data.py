@@ -989,6 +989,34 @@ class ScoresClient(object):
         client.fetch_scores(scorable_locations)
         return client
 
+    @classmethod
+    def create_for_users(cls, course_id, user_ids, scorable_locations):
+        """
+        Create ScoresClients with pre-fetched data for the given users and
+        locations, using a single query for all of the users.
+
+        Returns a dict of user_id to ScoresClient.
+        """
+        # pylint: disable=protected-access
+        clients = {}
+        for user_id in user_ids:
+            clients[user_id] = cls(course_id, user_id)
+            clients[user_id]._has_fetched = True
+
+        scores_qset = StudentModule.objects.filter(
+            student_id__in=list(clients),
+            course_id=course_id,
+            module_state_key__in=set(scorable_locations),
+        )
+        # Locations in StudentModule don't necessarily have course key info
+        # attached to them, add it back as fetch_scores does.
+        for user_id, location, correct, total, created in scores_qset.values_list(
+            'student_id', 'module_state_key', 'grade', 'max_grade', 'created'
+        ):
+            location = location.map_into_course(course_id)
+            clients[user_id]._locations_to_scores[location] = cls.Score(correct, total, created)
+        return clients
+
 
 # @contract(user_id=int, usage_key=UsageKey, score="number|None", max_score="number|None")
 def set_score(user_id, usage_key, score, max_score):
@@ -0,0 +1,114 @@
+"""
+Coalescing of grade recalculation tasks.
+
+A coalesced task is enqueued with a token, and the cache keeps the token of
+the latest task enqueued for the same key, e.g. a user and course, along with
+the scope of its work, e.g. the block whose score changed. A task that finds
+the token of a newer task covering its work skips it: the newer task has not
+started yet, so it reads all the scores the older task would have read.
+
+Tasks are always enqueued, so a lost or evicted cache entry only means that
+a task does its work instead of skipping it.
+"""
+
+
+from uuid import uuid4
+
+from django.core.cache import cache
+from edx_django_utils.monitoring import set_custom_metric
+
+COALESCE_TOKEN_KWARG = u'coalesce_token'
+SUBSECTION_GRADE = u'subsection_grade'
+COURSE_GRADE = u'course_grade'
+
+_LATEST_TOKEN_CACHE_KEY = u'grades.coalesce.{kind}.{key}'
+_LATEST_TOKEN_TIMEOUT = 60 * 60
+_STAT_CACHE_KEY = u'grades.coalesce.{kind}.stats.{stat}'
+
+
+def add_coalesce_token(kind, key, task_kwargs, scope=None):
+    """
+    Marks the task about to be enqueued with the given kwargs as the latest
+    one for ``key``, superseding any task already pending for it whose work
+    it covers.
+
+    Arguments:
+        kind (str): the kind of recalculation, e.g. SUBSECTION_GRADE
+        key (str): identifies what is recalculated, tasks with the same key are coalesced
+        task_kwargs (dict): kwargs of the task, updated with its token
+        scope (str): the scope of the task's work, given to the covers
+            check of is_superseded, optional
+
+    Returns: the given task kwargs
+    """
+    token = uuid4().hex
+    cache.set(_LATEST_TOKEN_CACHE_KEY.format(kind=kind, key=key), (token, scope), _LATEST_TOKEN_TIMEOUT)
+    task_kwargs[COALESCE_TOKEN_KWARG] = token
+    _increment_stat(kind, u'enqueued')
+    _increment_stat(kind, u'pending')
+    return task_kwargs
+
+
+def start_coalesced_task(kind, task_kwargs):
+    """
+    Called first thing when a coalesced task starts, before any of its exit
+    paths, so that every started task is counted off the queue depth.
+
+    The token is removed from the kwargs, so that a retry of the task is
+    neither skipped nor counted again.
+
+    Returns: the token of the task, or None if it is not coalesced
+    """
+    token = task_kwargs.pop(COALESCE_TOKEN_KWARG, None)
+    if token is not None:
+        pending = _increment_stat(kind, u'pending', -1)
+        set_custom_metric(u'grades_coalesce_{}_queue_depth'.format(kind), max(pending, 0))
+    return token
+
+
+def is_superseded(kind, key, token, covers=None):
+    """
+    Returns whether a task newer than the one with the given token was
+    enqueued for ``key`` and has not started yet, in which case the task
+    should skip its work, and sets the coalesce ratio metrics.
+
+    Arguments:
+        kind (str): the kind of recalculation, e.g. SUBSECTION_GRADE
+        key (str): identifies what is recalculated
+        token (str): as returned by start_coalesced_task
+        covers (function: scope->bool): whether a newer task with the given
+            scope covers the work of this task, optional when any newer task
+            for the key does
+    """
+    if token is None:
+        return False
+
+    latest_token_key = _LATEST_TOKEN_CACHE_KEY.format(kind=kind, key=key)
+    latest_token, latest_scope = cache.get(latest_token_key) or (None, None)
+    superseded = (
+        latest_token is not None and latest_token != token and (covers is None or covers(latest_scope))
+    )
+    if latest_token == token:
+        # let tasks enqueued from now on know that this one has started
+        cache.delete(latest_token_key)
+
+    coalesced = _increment_stat(kind, u'coalesced', 1 if superseded else 0)
+    enqueued = cache.get(_STAT_CACHE_KEY.format(kind=kind, stat=u'enqueued')) or 0
+
+    set_custom_metric(u'grades_coalesce_{}_superseded'.format(kind), superseded)
+    if enqueued:
+        set_custom_metric(u'grades_coalesce_{}_ratio'.format(kind), float(coalesced) / enqueued)
+    return superseded
+
+
+def _increment_stat(kind, stat, delta=1):
+    """
+    Increments a counter of coalesced tasks and returns its new value.
+    """
+    stat_key = _STAT_CACHE_KEY.format(kind=kind, stat=stat)
+    cache.add(stat_key, 0, None)
+    try:
+        return cache.incr(stat_key, delta)
+    except ValueError:
+        # the counter was evicted since it was added
+        return 0
@@ -3,10 +3,13 @@ Course Grade Factory Class
 """
 
 
-from collections import namedtuple
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from logging import getLogger
 
 import six
+from django.db import connections
 from six import text_type
 
 from openedx.core.djangoapps.signals.signals import (
@@ -14,12 +17,18 @@ from openedx.core.djangoapps.signals.signals import (
     COURSE_GRADE_NOW_FAILED,
     COURSE_GRADE_NOW_PASSED
 )
+from xmodule.modulestore.django import modulestore
 
 from .config import assume_zero_if_absent, should_persist_grades
 from .course_data import CourseData
 from .course_grade import CourseGrade, ZeroCourseGrade
 from .models import PersistentCourseGrade
-from .models_api import prefetch_grade_overrides_and_visible_blocks
+from .models_api import (
+    clear_prefetched_course_grades,
+    prefetch_course_and_subsection_grades,
+    prefetch_grade_overrides_and_visible_blocks
+)
+from .subsection_grade_factory import SubsectionGradeFactory
 
 log = getLogger(__name__)
 
@@ -90,6 +99,9 @@ class CourseGradeFactory(object):
             collected_block_structure=None,
             course_key=None,
             force_update=False,
+            max_workers=1,
+            chunk_size=100,
+            prefetch_shard=None,
     ):
         """
         Given a course and an iterable of students (User), yield a GradeResult
@@ -99,6 +111,17 @@ class CourseGradeFactory(object):
 
         If an error occurred, course_grade will be None and err_msg will be an
         exception message. If there was no error, err_msg is an empty string.
+
+        If max_workers is greater than 1, students are split into shards of
+        chunk_size which are graded concurrently by a pool of max_workers
+        threads, all sharing the same collected course structure. Results are
+        still yielded in the order of the given students.
+
+        The request cache is local to a thread, so whatever the caller has
+        prefetched for the students is not seen by the worker threads. Each
+        worker prefetches the persisted grades of its shard within a bulk
+        operation on the course, and calls prefetch_shard, if given, with the
+        shard's students to prefetch any other data grading reads.
         """
         # Pre-fetch the collected course_structure (in _iter_grade_result) so:
         # 1. Correctness: the same version of the course is used to
@@ -109,8 +132,95 @@ class CourseGradeFactory(object):
             user=None, course=course, collected_block_structure=collected_block_structure, course_key=course_key,
         )
         stats_tags = [u'action:{}'.format(course_data.course_key)]
-        for user in users:
-            yield self._iter_grade_result(user, course_data, force_update)
+        if max_workers > 1:
+            for result in self._iter_sharded_grade_results(
+                users, course_data, force_update, max_workers, chunk_size, prefetch_shard,
+            ):
+                yield result
+        elif force_update:
+            for shard in self._iter_shards(users, chunk_size):
+                for result in self._grade_shard(shard, course_data, force_update):
+                    yield result
+        else:
+            for user in users:
+                yield self._iter_grade_result(user, course_data, force_update)
+
+    @staticmethod
+    def _iter_shards(users, chunk_size):
+        """
+        Lazily splits the given users into lists of at most chunk_size users.
+        """
+        users = iter(users)
+        shard = list(islice(users, chunk_size))
+        while shard:
+            yield shard
+            shard = list(islice(users, chunk_size))
+
+    def _iter_sharded_grade_results(self, users, course_data, force_update, max_workers, chunk_size, prefetch_shard):
+        """
+        Grades shards of users in a thread pool and yields their GradeResults in order.
+        At most two shards per worker are in flight, so users are consumed lazily.
+        """
+        # Load the course and its collected structure before any shard starts so
+        # that all of them grade against the same version of the course.
+        course_data.collected_structure  # pylint: disable=pointless-statement
+        course_data.course  # pylint: disable=pointless-statement
+
+        shards = self._iter_shards(users, chunk_size)
+        pending_shards = deque()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                while True:
+                    for shard in islice(shards, max_workers * 2 - len(pending_shards)):
+                        pending_shards.append(
+                            executor.submit(
+                                self._grade_shard_in_worker, shard, course_data, force_update, prefetch_shard,
+                            )
+                        )
+
+                    if not pending_shards:
+                        break
+
+                    for result in pending_shards.popleft().result():
+                        yield result
+            finally:
+                for shard in pending_shards:
+                    shard.cancel()
+
+    def _grade_shard_in_worker(self, users, course_data, force_update, prefetch_shard):
+        """
+        Grades a shard of users in a worker thread of _iter_sharded_grade_results,
+        redoing in this thread the prefetches a caller does before grading.
+        """
+        course_key = course_data.course_key
+        try:
+            with modulestore().bulk_operations(course_key):
+                if not force_update:
+                    prefetch_course_and_subsection_grades(course_key, users)
+                if prefetch_shard is not None:
+                    prefetch_shard(users)
+                try:
+                    return self._grade_shard(users, course_data, force_update)
+                finally:
+                    if not force_update:
+                        clear_prefetched_course_grades(course_key)
+        finally:
+            # Database connections are per thread, close the ones this worker opened.
+            connections.close_all()
+
+    def _grade_shard(self, users, course_data, force_update):
+        """
+        Grades a shard of users. When grades are recomputed, the scores of the
+        whole shard are prefetched with set-based queries first.
+        """
+        if not force_update:
+            return [self._iter_grade_result(user, course_data, force_update) for user in users]
+
+        SubsectionGradeFactory.prefetch_scores(course_data.course_key, users, course_data.collected_structure)
+        try:
+            return [self._iter_grade_result(user, course_data, force_update) for user in users]
+        finally:
+            SubsectionGradeFactory.clear_prefetched_scores(course_data.course_key)
 
     def _iter_grade_result(self, user, course_data, force_update):
         try:
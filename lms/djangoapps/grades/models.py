@@ -18,7 +18,8 @@ from hashlib import sha1
 import six
 from django.apps import apps
 from django.contrib.auth.models import User
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.timezone import now
 from lazy import lazy
@@ -45,7 +46,12 @@ BlockRecord = namedtuple('BlockRecord', ['locator', 'weight', 'raw_possible', 'g
 class BlockRecordList(object):
     """
     An immutable ordered list of BlockRecord objects.
+
+    The json and hash values are shared, through the request cache, by all
+    lists with the same blocks in the same course, so grading many users
+    serializes and hashes each set of visible blocks only once.
     """
+    _CACHE_NAMESPACE = u"grades.models.BlockRecordList"
 
     def __init__(self, blocks, course_key, version=None):
         self.blocks = tuple(blocks)
@@ -79,7 +85,10 @@ class BlockRecordList(object):
         supported by adding a label indicated which algorithm was used, e.g.,
         "sha256$j0NDRmSPa5bfid2pAcUXaxCm2Dlh3TwayItZstwyeqQ=".
         """
-        return b64encode(sha1(self.json_value.encode('utf-8')).digest()).decode('utf-8')
+        shared_values = self._shared_values
+        if u'hash_value' not in shared_values:
+            shared_values[u'hash_value'] = b64encode(sha1(self.json_value.encode('utf-8')).digest()).decode('utf-8')
+        return shared_values[u'hash_value']
 
     @lazy
     def json_value(self):
@@ -87,6 +96,23 @@ class BlockRecordList(object):
         Return a JSON-serialized version of the list of block records, using a
         stable ordering.
         """
+        shared_values = self._shared_values
+        if u'json_value' not in shared_values:
+            shared_values[u'json_value'] = self._serialize()
+        return shared_values[u'json_value']
+
+    @lazy
+    def _shared_values(self):
+        """
+        Returns the dict of computed values shared by all lists of the same
+        block records, for the same course and version, in this request.
+        """
+        return get_cache(self._CACHE_NAMESPACE).setdefault((self.course_key, self.version, self.blocks), {})
+
+    def _serialize(self):
+        """
+        Serializes the list of block records to JSON.
+        """
         list_of_block_dicts = [block._asdict() for block in self.blocks]
         for block_dict in list_of_block_dicts:
             block_dict['locator'] = six.text_type(block_dict['locator'])  # BlockUsageLocator is not json-serializable
@@ -138,6 +164,10 @@ class VisibleBlocks(models.Model):
     in the blocks_json field. A hash of this json array is used for lookup
     purposes.
 
+    Rows are immutable and content-addressed by their hash, so the ids of
+    known rows are also kept in a cache shared by all users of a course,
+    sparing a query per user for every subsection that is graded.
+
     .. no_pii:
     """
     blocks_json = models.TextField()
@@ -145,6 +175,8 @@ class VisibleBlocks(models.Model):
     course_id = CourseKeyField(blank=False, max_length=255, db_index=True)
 
     _CACHE_NAMESPACE = u"grades.models.VisibleBlocks"
+    _SHARED_CACHE_KEY = u"grades.models.VisibleBlocks.{course_key}.v{version}.{hashed}"
+    _SHARED_CACHE_TIMEOUT = 60 * 60 * 24
 
     class Meta(object):
         app_label = "grades"
@@ -193,15 +225,31 @@ class VisibleBlocks(models.Model):
                 # We still have to do a get_or_create, because
                 # another user may have had this block hash created,
                 # even if the user we checked the cache for hasn't yet.
-                model, _ = cls.objects.get_or_create(
-                    hashed=blocks.hash_value, blocks_json=blocks.json_value, course_id=blocks.course_key,
-                )
+                model = cls._shared_get_or_create(blocks)
                 cls._update_cache(user_id, blocks.course_key, [model])
         else:
-            model, _ = cls.objects.get_or_create(
-                hashed=blocks.hash_value,
-                defaults={u'blocks_json': blocks.json_value, u'course_id': blocks.course_key},
+            model = cls._shared_get_or_create(blocks)
+        return model
+
+    @classmethod
+    def _shared_get_or_create(cls, blocks):
+        """
+        Returns the VisibleBlocks record of the given ``BlockRecordList``,
+        built from its id in the shared cache when another user of the course
+        already used the same blocks, or else fetched or created.
+        """
+        cache_key = cls._shared_cache_key(blocks.course_key, blocks.hash_value)
+        model_id = cache.get(cache_key)
+        if model_id is not None:
+            return cls(
+                id=model_id, hashed=blocks.hash_value, blocks_json=blocks.json_value, course_id=blocks.course_key,
             )
+
+        model, _ = cls.objects.get_or_create(
+            hashed=blocks.hash_value,
+            defaults={u'blocks_json': blocks.json_value, u'course_id': blocks.course_key},
+        )
+        cls._update_shared_cache(blocks.course_key, {model.hashed: model.id})
         return model
 
     @classmethod
@@ -221,6 +269,11 @@ class VisibleBlocks(models.Model):
             for brl in block_record_lists
         ], ignore_conflicts=True)
         cls._update_cache(user_id, course_key, created)
+        if created:
+            # bulk_create does not set primary keys on MySQL, nor tells which rows conflicted
+            cls._update_shared_cache(course_key, dict(cls.objects.filter(
+                hashed__in=[visible_blocks.hashed for visible_blocks in created],
+            ).values_list('hashed', 'id')))
         return created
 
     @classmethod
@@ -232,6 +285,14 @@ class VisibleBlocks(models.Model):
         """
         cached_records = cls.bulk_read(user_id, course_key)
         non_existent_brls = {brl for brl in block_record_lists if brl.hash_value not in cached_records}
+        if non_existent_brls:
+            shared_records = cache.get_many([
+                cls._shared_cache_key(course_key, brl.hash_value) for brl in non_existent_brls
+            ])
+            non_existent_brls = {
+                brl for brl in non_existent_brls
+                if cls._shared_cache_key(course_key, brl.hash_value) not in shared_records
+            }
         cls.bulk_create(user_id, course_key, non_existent_brls)
 
     @classmethod
@@ -259,6 +320,22 @@ class VisibleBlocks(models.Model):
             {visible_block.hashed: visible_block for visible_block in visible_blocks}
         )
 
+    @classmethod
+    def _update_shared_cache(cls, course_key, ids_by_hash):
+        """
+        Adds the ids of the given visible blocks hashes to the shared cache
+        once the current transaction commits, so that rows which are rolled
+        back are never referenced from the cache.
+        """
+        shared_records = {
+            cls._shared_cache_key(course_key, hashed): model_id for hashed, model_id in ids_by_hash.items()
+        }
+        transaction.on_commit(lambda: cache.set_many(shared_records, cls._SHARED_CACHE_TIMEOUT))
+
+    @classmethod
+    def _shared_cache_key(cls, course_key, hashed):
+        return cls._SHARED_CACHE_KEY.format(course_key=course_key, version=BLOCK_RECORD_LIST_VERSION, hashed=hashed)
+
     @classmethod
     def _cache_key(cls, user_id, course_key):
         return u"visible_blocks_cache.{}.{}".format(course_key, user_id)
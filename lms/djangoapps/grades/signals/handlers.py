@@ -21,13 +21,19 @@ from track.event_transaction_utils import get_event_transaction_id, get_event_tr
 from util.date_utils import to_timestamp
 
 from .. import events
+from ..coalesce import COURSE_GRADE, SUBSECTION_GRADE, add_coalesce_token
+from ..config.waffle import COALESCE_GRADE_RECALCULATIONS, waffle
 from ..constants import ScoreDatabaseTableEnum
 from ..course_grade_factory import CourseGradeFactory
 from ..scores import weighted_score
 from ..tasks import (
+    COURSE_GRADE_COALESCE_DELAY_SECONDS,
     RECALCULATE_GRADE_DELAY_SECONDS,
+    course_grade_coalesce_key,
     recalculate_course_and_subsection_grades_for_user,
-    recalculate_subsection_grade_v3
+    recalculate_course_grade_for_user,
+    recalculate_subsection_grade_v3,
+    subsection_grade_coalesce_key
 )
 from .signals import (
     PROBLEM_RAW_SCORE_CHANGED,
@@ -224,20 +230,25 @@ def enqueue_subsection_update(sender, **kwargs):  # pylint: disable=unused-argum
     context_key = LearningContextKey.from_string(kwargs['course_id'])
     if not context_key.is_course:
         return  # If it's not a course, it has no subsections, so skip the subsection grading update
+    task_kwargs = dict(
+        user_id=kwargs['user_id'],
+        anonymous_user_id=kwargs.get('anonymous_user_id'),
+        course_id=kwargs['course_id'],
+        usage_id=kwargs['usage_id'],
+        only_if_higher=kwargs.get('only_if_higher'),
+        expected_modified_time=to_timestamp(kwargs['modified']),
+        score_deleted=kwargs.get('score_deleted', False),
+        event_transaction_id=six.text_type(get_event_transaction_id()),
+        event_transaction_type=six.text_type(get_event_transaction_type()),
+        score_db_table=kwargs['score_db_table'],
+        force_update_subsections=kwargs.get('force_update_subsections', False),
+    )
+    if waffle().is_enabled(COALESCE_GRADE_RECALCULATIONS):
+        add_coalesce_token(
+            SUBSECTION_GRADE, subsection_grade_coalesce_key(**task_kwargs), task_kwargs, scope=task_kwargs['usage_id']
+        )
     recalculate_subsection_grade_v3.apply_async(
-        kwargs=dict(
-            user_id=kwargs['user_id'],
-            anonymous_user_id=kwargs.get('anonymous_user_id'),
-            course_id=kwargs['course_id'],
-            usage_id=kwargs['usage_id'],
-            only_if_higher=kwargs.get('only_if_higher'),
-            expected_modified_time=to_timestamp(kwargs['modified']),
-            score_deleted=kwargs.get('score_deleted', False),
-            event_transaction_id=six.text_type(get_event_transaction_id()),
-            event_transaction_type=six.text_type(get_event_transaction_type()),
-            score_db_table=kwargs['score_db_table'],
-            force_update_subsections=kwargs.get('force_update_subsections', False),
-        ),
+        kwargs=task_kwargs,
         countdown=RECALCULATE_GRADE_DELAY_SECONDS,
     )
 
@@ -247,8 +258,25 @@ def recalculate_course_grade_only(sender, course, course_structure, user, **kwar
     """
     Updates a saved course grade, but does not update the subsection
     grades the user has in this course.
+
+    When grade recalculations are coalesced, the update is deferred to a
+    task which is skipped if another update of the course grade is
+    enqueued for the user meanwhile.
     """
-    CourseGradeFactory().update(user, course=course, course_structure=course_structure)
+    if waffle().is_enabled(COALESCE_GRADE_RECALCULATIONS):
+        task_kwargs = dict(
+            user_id=user.id,
+            course_key=six.text_type(course.id),
+            event_transaction_id=six.text_type(get_event_transaction_id()),
+            event_transaction_type=six.text_type(get_event_transaction_type()),
+        )
+        add_coalesce_token(COURSE_GRADE, course_grade_coalesce_key(user.id, course.id), task_kwargs)
+        recalculate_course_grade_for_user.apply_async(
+            kwargs=task_kwargs,
+            countdown=COURSE_GRADE_COALESCE_DELAY_SECONDS,
+        )
+    else:
+        CourseGradeFactory().update(user, course=course, course_structure=course_structure)
 
 
 @receiver(ENROLLMENT_TRACK_UPDATED)
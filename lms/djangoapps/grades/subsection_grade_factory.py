@@ -6,13 +6,17 @@ SubsectionGrade Factory Class
 from collections import OrderedDict
 from logging import getLogger
 
+import six
 from lazy import lazy
 from submissions import api as submissions_api
+from submissions.models import ScoreSummary
+from submissions.serializers import UnannotatedScoreSerializer
 
 from lms.djangoapps.courseware.model_data import ScoresClient
 from lms.djangoapps.grades.config import assume_zero_if_absent, should_persist_grades
 from lms.djangoapps.grades.models import PersistentSubsectionGrade
 from lms.djangoapps.grades.scores import possibly_scored
+from openedx.core.lib.cache_utils import get_cache
 from openedx.core.lib.grade_utils import is_score_higher_or_equal
 from student.models import anonymous_id_for_user
 
@@ -26,6 +30,8 @@ class SubsectionGradeFactory(object):
     """
     Factory for Subsection Grades.
     """
+    _SCORES_CACHE_NAMESPACE = u'grades.subsection_grade_factory.SubsectionGradeFactory.scores'
+
     def __init__(self, student, course=None, course_structure=None, course_data=None):
         self.student = student
         self.course_data = course_data or CourseData(student, course=course, structure=course_structure)
@@ -106,12 +112,64 @@ class SubsectionGradeFactory(object):
 
         return calculated_grade
 
+    @classmethod
+    def prefetch_scores(cls, course_key, users, course_structure):
+        """
+        Prefetches the CSM and Submissions API scores of the given users in
+        the course with one query per score source, instead of the queries
+        made for each user by _csm_scores and _submissions_scores.
+        """
+        user_ids = [user.id for user in users]
+        scorable_locations = [block_key for block_key in course_structure if possibly_scored(block_key)]
+        csm_scores = ScoresClient.create_for_users(course_key, user_ids, scorable_locations)
+
+        # Anonymous ids are computed as _submissions_scores computes them, without
+        # reading or writing AnonymousUserId rows.
+        anonymous_user_ids = {
+            anonymous_id_for_user(user, course_key, save=False): user.id for user in users
+        }
+        submissions_scores = {user_id: {} for user_id in user_ids}
+        score_summaries = ScoreSummary.objects.filter(
+            student_item__course_id=six.text_type(course_key),
+            student_item__student_id__in=list(anonymous_user_ids),
+        ).select_related('latest', 'latest__submission', 'student_item')
+        for summary in score_summaries:
+            if not summary.latest.is_hidden():
+                user_id = anonymous_user_ids[summary.student_item.student_id]
+                submissions_scores[user_id][summary.student_item.item_id] = (
+                    UnannotatedScoreSerializer(summary.latest).data
+                )
+
+        get_cache(cls._SCORES_CACHE_NAMESPACE)[six.text_type(course_key)] = {
+            user_id: (submissions_scores[user_id], csm_scores[user_id]) for user_id in user_ids
+        }
+
+    @classmethod
+    def clear_prefetched_scores(cls, course_key):
+        """
+        Clears prefetched scores for this course from the RequestCache.
+        """
+        get_cache(cls._SCORES_CACHE_NAMESPACE).pop(six.text_type(course_key), None)
+
+    def _get_prefetched_scores(self):
+        """
+        Returns the (submissions scores, CSM scores) prefetched for the
+        student, or None if they were not prefetched.
+        """
+        prefetched_scores = get_cache(self._SCORES_CACHE_NAMESPACE).get(six.text_type(self.course_data.course_key))
+        if prefetched_scores is not None:
+            return prefetched_scores.get(self.student.id)
+
     @lazy
     def _csm_scores(self):
         """
         Lazily queries and returns all the scores stored in the user
         state (in CSM) for the course, while caching the result.
         """
+        prefetched_scores = self._get_prefetched_scores()
+        if prefetched_scores is not None:
+            return prefetched_scores[1]
+
         scorable_locations = [block_key for block_key in self.course_data.structure if possibly_scored(block_key)]
         return ScoresClient.create_for_locations(self.course_data.course_key, self.student.id, scorable_locations)
 
@@ -121,6 +179,10 @@ class SubsectionGradeFactory(object):
         Lazily queries and returns the scores stored by the
         Submissions API for the course, while caching the result.
         """
+        prefetched_scores = self._get_prefetched_scores()
+        if prefetched_scores is not None:
+            return prefetched_scores[0]
+
         anonymous_user_id = anonymous_id_for_user(self.student, self.course_data.course_key)
         return submissions_api.get_scores(str(self.course_data.course_key), anonymous_user_id)
 
@@ -26,6 +26,7 @@ from track.event_transaction_utils import set_event_transaction_id, set_event_tr
 from util.date_utils import from_timestamp
 from xmodule.modulestore.django import modulestore
 
+from .coalesce import COURSE_GRADE, SUBSECTION_GRADE, is_superseded, start_coalesced_task
 from .config.waffle import DISABLE_REGRADE_ON_POLICY_CHANGE, waffle
 from .constants import ScoreDatabaseTableEnum
 from .course_grade_factory import CourseGradeFactory
@@ -37,6 +38,7 @@ from .transformer import GradesTransformer
 
 log = getLogger(__name__)
 
+COURSE_GRADE_COALESCE_DELAY_SECONDS = 10
 COURSE_GRADE_TIMEOUT_SECONDS = 1200
 KNOWN_RETRY_ERRORS = (  # Errors we expect occasionally, should be resolved on retry
     DatabaseError,
@@ -120,7 +122,13 @@ def compute_grades_for_course(course_key, offset, batch_size, **kwargs):  # pyli
 
     enrollments = CourseEnrollment.objects.filter(course_id=course_key).order_by('created')
     student_iter = (enrollment.user for enrollment in enrollments[offset:offset + batch_size])
-    for result in CourseGradeFactory().iter(users=student_iter, course_key=course_key, force_update=True):
+    for result in CourseGradeFactory().iter(
+        users=student_iter,
+        course_key=course_key,
+        force_update=True,
+        max_workers=settings.COURSE_GRADE_ITER_MAX_WORKERS,
+        chunk_size=settings.COURSE_GRADE_ITER_CHUNK_SIZE,
+    ):
         if result.error is not None:
             raise result.error
 
@@ -166,6 +174,65 @@ def recalculate_course_and_subsection_grades_for_user(self, **kwargs):  # pylint
         )
 
 
+@task(
+    bind=True,
+    base=LoggedPersistOnFailureTask,
+    time_limit=COURSE_GRADE_TIMEOUT_SECONDS,
+    max_retries=2,
+    default_retry_delay=RETRY_DELAY_SECONDS,
+    routing_key=settings.RECALCULATE_GRADES_ROUTING_KEY
+)
+def recalculate_course_grade_for_user(self, **kwargs):
+    """
+    Updates a saved course grade from the saved subsection grades for the
+    given ``user_id`` and ``course_key`` keyword arguments.
+
+    Enqueued in place of updating the course grade after each subsection
+    grade update when grade recalculations are coalesced, so that a burst
+    of submissions updates the course grade once.
+    """
+    coalesce_token = start_coalesced_task(COURSE_GRADE, kwargs)
+    try:
+        course_key = CourseKey.from_string(kwargs['course_key'])
+        if is_superseded(COURSE_GRADE, course_grade_coalesce_key(kwargs['user_id'], course_key), coalesce_token):
+            return
+        if are_grades_frozen(course_key):
+            log.info(u"Attempted recalculate_course_grade_for_user for course '%s', but grades are frozen.", course_key)
+            return
+
+        set_event_transaction_id(kwargs.get('event_transaction_id'))
+        set_event_transaction_type(kwargs.get('event_transaction_type'))
+
+        user = User.objects.get(id=kwargs['user_id'])
+        CourseGradeFactory().update(user, course_key=course_key)
+    except Exception as exc:
+        raise self.retry(kwargs=kwargs, exc=exc)
+
+
+def course_grade_coalesce_key(user_id, course_key):
+    """
+    Returns the key by which course grade updates of a user are coalesced.
+    """
+    return u'{}.{}'.format(user_id, course_key)
+
+
+def subsection_grade_coalesce_key(**kwargs):
+    """
+    Returns the key by which subsection grade recalculations are coalesced,
+    given the kwargs of the recalculate_subsection_grade_v3 task.  Only
+    recalculations for the same user and course with the same options are
+    coalesced, and among them only those of the same subsection, see
+    _is_subsection_update_superseded.
+    """
+    return u'{}.{}.{}.{}.{}'.format(
+        kwargs['user_id'],
+        kwargs['course_id'],
+        kwargs['only_if_higher'],
+        kwargs['score_deleted'],
+        kwargs.get('force_update_subsections', False),
+    )
+
+
 @task(
     bind=True,
     base=LoggedPersistOnFailureTask,
@@ -204,7 +271,10 @@ def _recalculate_subsection_grade(self, **kwargs):
             event at the root of the current event transaction.
         score_db_table (ScoreDatabaseTableEnum): database table that houses
             the changed score. Used in conjunction with expected_modified_time.
+        coalesce_token (string, OPTIONAL): identifying the task among the
+            ones coalesced for the same user and subsection.
     """
+    coalesce_token = start_coalesced_task(SUBSECTION_GRADE, kwargs)
     try:
         course_key = CourseLocator.from_string(kwargs['course_id'])
         if are_grades_frozen(course_key):
@@ -233,6 +303,11 @@ def _recalculate_subsection_grade(self, **kwargs):
         if not has_database_updated:
             raise DatabaseNotReadyError
 
+        # A newer task for the same subsection is safe to rely on only once
+        # the score of this one is known to be saved.
+        if _is_subsection_update_superseded(course_key, scored_block_usage_key, coalesce_token, **kwargs):
+            return
+
         _update_subsection_grades(
             course_key,
             scored_block_usage_key,
@@ -251,6 +326,39 @@ def _recalculate_subsection_grade(self, **kwargs):
         raise self.retry(kwargs=kwargs, exc=exc)
 
 
+def _is_subsection_update_superseded(course_key, scored_block_usage_key, coalesce_token, **kwargs):
+    """
+    Returns whether a newer task, not started yet, was enqueued for the same
+    user and the subsection of the given scored block.  The subsections of
+    both tasks' blocks are looked up here, in the worker, rather than when
+    the tasks are enqueued.
+    """
+    if coalesce_token is None:
+        return False
+
+    subsection_usage_key = _get_subsection_usage_key(scored_block_usage_key)
+
+    def updates_same_subsection(usage_id):
+        usage_key = UsageKey.from_string(usage_id).replace(course_key=course_key)
+        return _get_subsection_usage_key(usage_key) == subsection_usage_key
+
+    return is_superseded(
+        SUBSECTION_GRADE, subsection_grade_coalesce_key(**kwargs), coalesce_token, updates_same_subsection
+    )
+
+
+def _get_subsection_usage_key(usage_key):
+    """
+    Returns the usage key of the subsection containing the given block,
+    or the block's own key when it is not inside a subsection.
+    """
+    store = modulestore()
+    location = usage_key
+    while location is not None and location.block_type != 'sequential':
+        location = store.get_parent_location(location)
+    return location or usage_key
+
+
 def _has_db_updated_with_new_score(self, scored_block_usage_key, **kwargs):
     """
     Returns whether the database has been updated with the
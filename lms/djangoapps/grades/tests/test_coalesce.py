@@ -0,0 +1,70 @@
+"""
+Tests for the coalescing of grade recalculation tasks.
+"""
+
+
+from mock import patch
+
+from lms.djangoapps.grades.coalesce import (
+    COALESCE_TOKEN_KWARG,
+    SUBSECTION_GRADE,
+    add_coalesce_token,
+    is_superseded,
+    start_coalesced_task
+)
+from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
+
+
+@patch('lms.djangoapps.grades.coalesce.set_custom_metric')
+class CoalesceTest(CacheIsolationTestCase):
+    """
+    Tests for coalescing tasks by their tokens.
+    """
+    ENABLED_CACHES = ['default']
+
+    def _start_and_check(self, key, task_kwargs):
+        """
+        Starts the task with the given kwargs and returns whether it is superseded.
+        """
+        return is_superseded(SUBSECTION_GRADE, key, start_coalesced_task(SUBSECTION_GRADE, task_kwargs))
+
+    def test_older_task_superseded(self, mock_set_custom_metric):
+        older_kwargs = add_coalesce_token(SUBSECTION_GRADE, 'key', {})
+        newer_kwargs = add_coalesce_token(SUBSECTION_GRADE, 'key', {})
+        self.assertNotEqual(older_kwargs[COALESCE_TOKEN_KWARG], newer_kwargs[COALESCE_TOKEN_KWARG])
+
+        self.assertTrue(self._start_and_check('key', older_kwargs))
+        self.assertFalse(self._start_and_check('key', newer_kwargs))
+
+        mock_set_custom_metric.assert_any_call('grades_coalesce_subsection_grade_queue_depth', 0)
+        mock_set_custom_metric.assert_any_call('grades_coalesce_subsection_grade_ratio', 0.5)
+
+    def test_task_enqueued_after_start_not_superseding(self, mock_set_custom_metric):  # pylint: disable=unused-argument
+        started_kwargs = add_coalesce_token(SUBSECTION_GRADE, 'key', {})
+        self.assertFalse(self._start_and_check('key', started_kwargs))
+
+        newer_kwargs = add_coalesce_token(SUBSECTION_GRADE, 'key', {})
+        self.assertFalse(self._start_and_check('key', newer_kwargs))
+
+    def test_different_keys_not_coalesced(self, mock_set_custom_metric):  # pylint: disable=unused-argument
+        first_kwargs = add_coalesce_token(SUBSECTION_GRADE, 'first_key', {})
+        second_kwargs = add_coalesce_token(SUBSECTION_GRADE, 'second_key', {})
+        self.assertFalse(self._start_and_check('first_key', first_kwargs))
+        self.assertFalse(self._start_and_check('second_key', second_kwargs))
+
+    def test_retried_task_not_superseded(self, mock_set_custom_metric):  # pylint: disable=unused-argument
+        older_kwargs = add_coalesce_token(SUBSECTION_GRADE, 'key', {})
+        add_coalesce_token(SUBSECTION_GRADE, 'key', {})
+        self.assertTrue(self._start_and_check('key', older_kwargs))
+        self.assertNotIn(COALESCE_TOKEN_KWARG, older_kwargs)
+        self.assertFalse(self._start_and_check('key', older_kwargs))
+
+    def test_task_counted_off_queue_depth_without_check(self, mock_set_custom_metric):
+        first_kwargs = add_coalesce_token(SUBSECTION_GRADE, 'key', {})
+        second_kwargs = add_coalesce_token(SUBSECTION_GRADE, 'key', {})
+
+        # e.g. a task returning early because grades are frozen
+        start_coalesced_task(SUBSECTION_GRADE, first_kwargs)
+        mock_set_custom_metric.assert_called_with('grades_coalesce_subsection_grade_queue_depth', 1)
+        start_coalesced_task(SUBSECTION_GRADE, second_kwargs)
+        mock_set_custom_metric.assert_called_with('grades_coalesce_subsection_grade_queue_depth', 0)
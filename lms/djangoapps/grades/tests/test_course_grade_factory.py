@@ -4,9 +4,11 @@ Tests for the CourseGradeFactory class.
 
 
 import itertools
+import threading
 
 import ddt
 from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
 from mock import patch
 from six import text_type
 
@@ -20,6 +22,7 @@ from xmodule.modulestore.tests.factories import CourseFactory
 from ..config.waffle import ASSUME_ZERO_GRADE_IF_ABSENT, waffle
 from ..course_grade import CourseGrade, ZeroCourseGrade
 from ..course_grade_factory import CourseGradeFactory
+from ..models_api import prefetch_course_and_subsection_grades
 from ..subsection_grade import ReadSubsectionGrade, ZeroSubsectionGrade
 from .base import GradeTestBase
 from .utils import mock_get_score
@@ -243,6 +246,7 @@ class TestCourseGradeFactory(GradeTestBase):
         self.assertEqual(expected_summary, actual_summary)
 
 
+@ddt.ddt
 class TestGradeIteration(SharedModuleStoreTestCase):
     """
     Test iteration through student course grades.
@@ -337,6 +341,63 @@ class TestGradeIteration(SharedModuleStoreTestCase):
         self.assertIsNotNone(all_course_grades[student2])
         self.assertIsNotNone(all_course_grades[student5])
 
+    @ddt.data(1, 2, 3)
+    def test_sharded_iteration(self, chunk_size):
+        """
+        Sharded grading grades every student in the worker threads, each worker
+        prefetching the grades of its own shard, and yields the same results as
+        sequential grading in the order the students were given.
+        """
+        expected_grades, _ = self._course_grades_and_errors_for(self.course, self.students)
+
+        main_thread = threading.current_thread()
+        worker_threads = set()
+        prefetched_shards = []
+        grade_shard_in_worker = CourseGradeFactory._grade_shard_in_worker  # pylint: disable=protected-access
+        connection = connections[DEFAULT_DB_ALIAS]
+
+        def grade_shard_with_shared_connection(factory, *args, **kwargs):
+            """
+            Workers use the test's connection, as the live server thread of
+            LiveServerTestCase does, so that they see the test's data.
+            """
+            worker_threads.add(threading.current_thread())
+            connections[DEFAULT_DB_ALIAS] = connection
+            return grade_shard_in_worker(factory, *args, **kwargs)
+
+        def prefetch_grades_in_worker(course_key, users):
+            prefetched_shards.append((threading.current_thread(), [user.id for user in users]))
+            return prefetch_course_and_subsection_grades(course_key, users)
+
+        connection.inc_thread_sharing()
+        try:
+            with patch.object(
+                CourseGradeFactory,
+                '_grade_shard_in_worker',
+                autospec=True,
+                side_effect=grade_shard_with_shared_connection,
+            ), patch(
+                'lms.djangoapps.grades.course_grade_factory.prefetch_course_and_subsection_grades',
+                side_effect=prefetch_grades_in_worker,
+            ):
+                grade_results = list(CourseGradeFactory().iter(
+                    iter(self.students), self.course, max_workers=2, chunk_size=chunk_size,
+                ))
+        finally:
+            connection.dec_thread_sharing()
+
+        self.assertNotIn(main_thread, worker_threads)
+        self.assertEqual(
+            sorted(user_id for thread, user_ids in prefetched_shards for user_id in user_ids),
+            sorted(student.id for student in self.students),
+        )
+        self.assertTrue(all(thread in worker_threads for thread, _ in prefetched_shards))
+        self.assertEqual([result.student for result in grade_results], self.students)
+        for student, course_grade, error in grade_results:
+            self.assertIsNone(error)
+            self.assertEqual(course_grade.percent, expected_grades[student].percent)
+            self.assertEqual(course_grade.letter_grade, expected_grades[student].letter_grade)
+
     def _course_grades_and_errors_for(self, course, students):
         """
         Simple helper method to iterate through student grades and give us
@@ -15,6 +15,7 @@ import six
 from django.db.utils import IntegrityError
 from django.test import TestCase
 from django.utils.timezone import now
+from edx_django_utils.cache import RequestCache
 from freezegun import freeze_time
 from mock import patch
 from opaque_keys import InvalidKeyError
@@ -30,6 +31,7 @@ from lms.djangoapps.grades.models import (
     PersistentSubsectionGradeOverride,
     VisibleBlocks
 )
+from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 from student.tests.factories import UserFactory
 from track.event_transaction_utils import get_event_transaction_id, get_event_transaction_type
 
@@ -202,6 +204,55 @@ class VisibleBlocksTest(GradesModelTestCase):
             visible_blocks.blocks = expected_blocks
 
 
+@patch('lms.djangoapps.grades.models.transaction.on_commit', lambda func: func())
+class SharedVisibleBlocksTest(CacheIsolationTestCase, GradesModelTestCase):
+    """
+    Test the caches shared by all users of a course for visible blocks.
+    """
+    ENABLED_CACHES = ['default']
+
+    def setUp(self):
+        super(SharedVisibleBlocksTest, self).setUp()
+        RequestCache.clear_all_namespaces()
+
+    def test_block_record_list_values_shared(self):
+        with patch('lms.djangoapps.grades.models.sha1', wraps=sha1) as mock_sha1:
+            first = BlockRecordList.from_list([self.record_a, self.record_b], self.course_key)
+            second = BlockRecordList.from_list([self.record_a, self.record_b], self.course_key)
+            self.assertEqual(first.hash_value, second.hash_value)
+            self.assertEqual(first.json_value, second.json_value)
+            self.assertEqual(mock_sha1.call_count, 1)
+
+    def test_cached_get_or_create_across_users(self):
+        created = VisibleBlocks.cached_get_or_create(
+            1, BlockRecordList.from_list([self.record_a, self.record_b], self.course_key)
+        )
+        RequestCache.clear_all_namespaces()
+
+        with self.assertNumQueries(0):
+            cached = VisibleBlocks.cached_get_or_create(
+                2, BlockRecordList.from_list([self.record_a, self.record_b], self.course_key)
+            )
+        self.assertEqual(created.id, cached.id)
+        self.assertEqual(created.hashed, cached.hashed)
+        self.assertEqual(created.blocks, cached.blocks)
+
+    def test_bulk_get_or_create_across_users(self):
+        VisibleBlocks.bulk_get_or_create(1, self.course_key, [
+            BlockRecordList.from_list([self.record_a], self.course_key),
+            BlockRecordList.from_list([self.record_b], self.course_key),
+        ])
+        self.assertEqual(VisibleBlocks.objects.count(), 2)
+
+        # only the per user prefetch of visible blocks is queried
+        with self.assertNumQueries(1):
+            VisibleBlocks.bulk_get_or_create(2, self.course_key, [
+                BlockRecordList.from_list([self.record_a], self.course_key),
+                BlockRecordList.from_list([self.record_b], self.course_key),
+            ])
+        self.assertEqual(VisibleBlocks.objects.count(), 2)
+
+
 @ddt.ddt
 class PersistentSubsectionGradeTest(GradesModelTestCase):
     """
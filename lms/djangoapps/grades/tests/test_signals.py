@@ -8,16 +8,22 @@ from datetime import datetime
 
 import ddt
 import pytz
+import six
 from django.test import TestCase
 from mock import MagicMock, patch
+from opaque_keys.edx.locator import CourseLocator
 from submissions.models import score_reset, score_set
 
 from util.date_utils import to_timestamp
 
+from ..coalesce import COALESCE_TOKEN_KWARG
+from ..config.waffle import COALESCE_GRADE_RECALCULATIONS, waffle
 from ..constants import ScoreDatabaseTableEnum
 from ..signals.handlers import (
     disconnect_submissions_signal_receiver,
+    enqueue_subsection_update,
     problem_raw_score_changed_handler,
+    recalculate_course_grade_only,
     submissions_score_reset_handler,
     submissions_score_set_handler
 )
@@ -258,3 +264,54 @@ class ScoreChangedSignalRelayTest(TestCase):
         with self.assertRaises(ValueError):
             with disconnect_submissions_signal_receiver(PROBLEM_RAW_SCORE_CHANGED):
                 pass
+
+
+@ddt.ddt
+@patch('lms.djangoapps.grades.coalesce.set_custom_metric')
+class CoalescedGradeRecalculationHandlersTest(TestCase):
+    """
+    Tests the grade recalculation handlers with and without the
+    coalesce_grade_recalculations switch.
+    """
+    COURSE_KEY = CourseLocator('edX', 'DemoX', 'Demo_Course')
+
+    @ddt.data(True, False)
+    @patch('lms.djangoapps.grades.tasks._get_subsection_usage_key')
+    @patch('lms.djangoapps.grades.signals.handlers.recalculate_subsection_grade_v3')
+    def test_enqueue_subsection_update(
+            self, coalesce, mock_task, mock_get_subsection, mock_set_custom_metric  # pylint: disable=unused-argument
+    ):
+        usage_id = six.text_type(self.COURSE_KEY.make_usage_key('problem', '123456'))
+        with waffle().override(COALESCE_GRADE_RECALCULATIONS, active=coalesce):
+            enqueue_subsection_update(
+                sender=None,
+                user_id=42,
+                course_id=six.text_type(self.COURSE_KEY),
+                usage_id=usage_id,
+                modified=FROZEN_NOW_DATETIME,
+                score_db_table=ScoreDatabaseTableEnum.courseware_student_module,
+            )
+
+        task_kwargs = mock_task.apply_async.call_args[1]['kwargs']
+        self.assertEqual(task_kwargs['usage_id'], usage_id)
+        self.assertEqual(COALESCE_TOKEN_KWARG in task_kwargs, coalesce)
+        # the subsection of the block is only looked up by the task
+        self.assertFalse(mock_get_subsection.called)
+
+    @ddt.data(True, False)
+    @patch('lms.djangoapps.grades.signals.handlers.CourseGradeFactory')
+    @patch('lms.djangoapps.grades.signals.handlers.recalculate_course_grade_for_user')
+    def test_recalculate_course_grade_only(
+            self, coalesce, mock_task, mock_factory, mock_set_custom_metric  # pylint: disable=unused-argument
+    ):
+        user = MagicMock(id=42)
+        course = MagicMock(id=self.COURSE_KEY)
+        with waffle().override(COALESCE_GRADE_RECALCULATIONS, active=coalesce):
+            recalculate_course_grade_only(sender=None, course=course, course_structure=MagicMock(), user=user)
+
+        self.assertEqual(mock_task.apply_async.called, coalesce)
+        self.assertEqual(mock_factory.return_value.update.called, not coalesce)
+        if coalesce:
+            task_kwargs = mock_task.apply_async.call_args[1]['kwargs']
+            self.assertEqual(task_kwargs['course_key'], six.text_type(self.COURSE_KEY))
+            self.assertIn(COALESCE_TOKEN_KWARG, task_kwargs)
@@ -4,16 +4,20 @@ Tests for the SubsectionGradeFactory class.
 
 
 import ddt
+import six
 from django.conf import settings
 from mock import patch
+from submissions import api as submissions_api
 
+from lms.djangoapps.courseware.model_data import ScoresClient, set_score
 from lms.djangoapps.courseware.tests.test_submitting_problems import ProblemSubmissionTestMixin
 from lms.djangoapps.grades.config.tests.utils import persistent_grades_feature_flags
+from student.models import AnonymousUserId, anonymous_id_for_user
 from student.tests.factories import UserFactory
 
 from ..constants import GradeOverrideFeatureEnum
 from ..models import PersistentSubsectionGrade, PersistentSubsectionGradeOverride
-from ..subsection_grade_factory import ZeroSubsectionGrade
+from ..subsection_grade_factory import SubsectionGradeFactory, ZeroSubsectionGrade
 from .base import GradeTestBase
 from .utils import mock_get_score
 
@@ -58,6 +62,61 @@ class TestSubsectionGradeFactory(ProblemSubmissionTestMixin, GradeTestBase):
             grade = self.subsection_grade_factory.update(self.sequence)
         self.assert_grade(grade, 1, 2)
 
+    def test_update_with_prefetched_scores(self):
+        """
+        Test that prefetched scores are used instead of querying
+        the scores of the student.
+        """
+        SubsectionGradeFactory.prefetch_scores(self.course.id, [self.request.user], self.course_structure)
+        self.addCleanup(SubsectionGradeFactory.clear_prefetched_scores, self.course.id)
+
+        with patch('lms.djangoapps.grades.subsection_grade_factory.submissions_api.get_scores') as mock_get_scores:
+            with patch.object(ScoresClient, 'create_for_locations') as mock_create_for_locations:
+                with mock_get_score(1, 2):
+                    grade = self.subsection_grade_factory.update(self.sequence)
+        self.assert_grade(grade, 1, 2)
+        self.assertFalse(mock_get_scores.called)
+        self.assertFalse(mock_create_for_locations.called)
+
+    def test_prefetched_scores_match_queried_scores(self):
+        """
+        Test that grades computed from prefetched CSM and Submissions API
+        scores equal the grades computed from the scores queried for each
+        learner, including learners without a stored anonymous id.
+        """
+        csm_learner, submissions_learner = self.request.user, UserFactory()
+        set_score(csm_learner.id, self.problem.location, 1, 1)
+        submission = submissions_api.create_submission({
+            'student_id': anonymous_id_for_user(submissions_learner, self.course.id, save=False),
+            'course_id': six.text_type(self.course.id),
+            'item_id': six.text_type(self.problem2.location),
+            'item_type': 'problem',
+        }, 'any answer')
+        submissions_api.set_score(submission['uuid'], 1, 2)
+        AnonymousUserId.objects.filter(user__in=[csm_learner, submissions_learner]).delete()
+
+        def get_grades(learner):
+            """
+            Returns the (earned, possible) totals of both subsections of the learner.
+            """
+            grade_factory = SubsectionGradeFactory(learner, self.course, self.course_structure)
+            return [
+                (grade.graded_total.earned, grade.graded_total.possible)
+                for grade in (
+                    grade_factory.update(subsection, persist_grade=False)
+                    for subsection in (self.sequence, self.sequence2)
+                )
+            ]
+
+        learners = [csm_learner, submissions_learner]
+        SubsectionGradeFactory.prefetch_scores(self.course.id, learners, self.course_structure)
+        prefetched_grades = [get_grades(learner) for learner in learners]
+        SubsectionGradeFactory.clear_prefetched_scores(self.course.id)
+        queried_grades = [get_grades(learner) for learner in learners]
+
+        self.assertEqual(prefetched_grades, queried_grades)
+        self.assertEqual(queried_grades, [[(1, 1), (0, 1)], [(0, 1), (1, 2)]])
+
     def test_write_only_if_engaged(self):
         """
         Test that scores are not persisted when a learner has
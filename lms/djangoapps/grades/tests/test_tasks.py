@@ -18,6 +18,7 @@ from mock import MagicMock, patch
 from six.moves import range
 
 from lms.djangoapps.grades import tasks
+from lms.djangoapps.grades.coalesce import SUBSECTION_GRADE, add_coalesce_token
 from lms.djangoapps.grades.config.models import PersistentGradesEnabledFlag
 from lms.djangoapps.grades.config.waffle import ENFORCE_FREEZE_GRADE_AFTER_COURSE_END, waffle_flags
 from lms.djangoapps.grades.constants import ScoreDatabaseTableEnum
@@ -30,7 +31,8 @@ from lms.djangoapps.grades.tasks import (
     compute_all_grades_for_course,
     compute_grades_for_course,
     compute_grades_for_course_v2,
-    recalculate_subsection_grade_v3
+    recalculate_subsection_grade_v3,
+    subsection_grade_coalesce_key
 )
 from openedx.core.djangoapps.content.block_structure.exceptions import BlockStructureNotFound
 from openedx.core.djangoapps.waffle_utils.testutils import override_waffle_flag
@@ -153,6 +155,45 @@ class RecalculateSubsectionGradeTest(HasCourseWithProblemsMixin, ModuleStoreTest
         self._apply_recalculate_subsection_grade()
         self.assertTrue(mock_subsection_signal.called)
 
+    @patch('lms.djangoapps.grades.tasks._update_subsection_grades')
+    @patch('lms.djangoapps.grades.coalesce.set_custom_metric')
+    def test_superseded_by_newer_task(self, mock_set_custom_metric, mock_update):  # pylint: disable=unused-argument
+        self.set_up_course()
+        other_problem = ItemFactory.create(parent=self.sequential, category='problem', display_name='Other Problem')
+        coalesce_key = subsection_grade_coalesce_key(**self.recalculate_subsection_grade_kwargs)
+        add_coalesce_token(
+            SUBSECTION_GRADE, coalesce_key, self.recalculate_subsection_grade_kwargs,
+            scope=six.text_type(self.problem.location),
+        )
+        newer_task_kwargs = add_coalesce_token(
+            SUBSECTION_GRADE, coalesce_key, {}, scope=six.text_type(other_problem.location)
+        )
+
+        self._apply_recalculate_subsection_grade()
+        self.assertFalse(mock_update.called)
+
+        self.recalculate_subsection_grade_kwargs.update(newer_task_kwargs)
+        self._apply_recalculate_subsection_grade()
+        self.assertTrue(mock_update.called)
+
+    @patch('lms.djangoapps.grades.tasks._update_subsection_grades')
+    @patch('lms.djangoapps.grades.coalesce.set_custom_metric')
+    def test_not_superseded_by_newer_task_of_other_subsection(
+            self, mock_set_custom_metric, mock_update  # pylint: disable=unused-argument
+    ):
+        self.set_up_course()
+        other_sequential = ItemFactory.create(parent=self.chapter, category='sequential')
+        other_problem = ItemFactory.create(parent=other_sequential, category='problem')
+        coalesce_key = subsection_grade_coalesce_key(**self.recalculate_subsection_grade_kwargs)
+        add_coalesce_token(
+            SUBSECTION_GRADE, coalesce_key, self.recalculate_subsection_grade_kwargs,
+            scope=six.text_type(self.problem.location),
+        )
+        add_coalesce_token(SUBSECTION_GRADE, coalesce_key, {}, scope=six.text_type(other_problem.location))
+
+        self._apply_recalculate_subsection_grade()
+        self.assertTrue(mock_update.called)
+
     def test_block_structure_created_only_once(self):
         self.set_up_course()
         self.assertTrue(PersistentGradesEnabledFlag.feature_enabled(self.course.id))
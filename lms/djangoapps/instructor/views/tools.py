@@ -17,6 +17,7 @@ from pytz import UTC
 from six import string_types, text_type
 from six.moves import zip
 
+from lms.djangoapps.course_blocks import transformed_cache
 from student.models import get_user_by_username_or_email, CourseEnrollment
 
 
@@ -176,6 +177,8 @@ def set_due_date_extension(course, unit, student, due_date, actor=None, reason='
     else:
         api.set_date_for_block(course.id, unit.location, 'due', None, user=student, reason=reason, actor=actor)
 
+    transformed_cache.invalidate_user(student.id, course.id)
+
 
 def dump_module_extensions(course, unit):
     """
@@ -6,6 +6,7 @@ import logging
 import re
 from collections import OrderedDict, defaultdict
 from datetime import datetime
+from functools import partial
 from itertools import chain
 from time import time
 
@@ -392,10 +393,18 @@ class _CourseGradeBulkContext(object):
         self.certs = _CertificateBulkContext(context, users)
         self.teams = _TeamBulkContext(context, users)
         self.enrollments = _EnrollmentBulkContext(context, users)
-        bulk_cache_cohorts(context.course_id, users)
-        BulkRoleCache.prefetch(users)
         prefetch_course_and_subsection_grades(context.course_id, users)
-        BulkCourseTags.prefetch(context.course_id, users)
+        _prefetch_grading_data(context.course_id, users)
+
+
+def _prefetch_grading_data(course_id, users):
+    """
+    Prefetches the cohorts, roles and course tags of the given users into the
+    request cache, where grading them reads these from.
+    """
+    bulk_cache_cohorts(course_id, users)
+    BulkRoleCache.prefetch(users)
+    BulkCourseTags.prefetch(course_id, users)
 
 
 class CourseGradeReport(object):
@@ -687,6 +696,9 @@ class CourseGradeReport(object):
                 course=context.course,
                 collected_block_structure=context.course_structure,
                 course_key=context.course_id,
+                max_workers=settings.COURSE_GRADE_ITER_MAX_WORKERS,
+                chunk_size=settings.COURSE_GRADE_ITER_CHUNK_SIZE,
+                prefetch_shard=partial(_prefetch_grading_data, context.course_id),
             ):
                 if not course_grade:
                     # An empty gradeset means we failed to grade a student.
@@ -770,6 +782,8 @@ class ProblemGradeReport(GradeReportBase):
             course=context.course,
             collected_block_structure=context.course_structure,
             course_key=context.course_id,
+            max_workers=settings.COURSE_GRADE_ITER_MAX_WORKERS,
+            chunk_size=settings.COURSE_GRADE_ITER_CHUNK_SIZE,
         ):
             context.task_progress.attempted += 1
             if not course_grade:
@@ -625,6 +625,23 @@ CACHES = {
     },
 }
 
+# Maximum total size, in bytes of pickled data, of the split modulestore course
+# structures kept decoded in each process, in front of the course_structure_cache.
+# 0 disables the per-process cache.
+COURSE_STRUCTURE_PROCESS_CACHE_MAX_SIZE = 0
+
+# Cache of course assets too large for the course_assets cache, on the local disk of
+# each node serving assets. Disabled unless DIRECTORY is set.
+COURSE_ASSETS_DISK_CACHE = dict(
+    DIRECTORY=None,
+
+    # Maximum total size, in bytes, of the cached assets.
+    MAX_SIZE=5 * 1024 ** 3,
+
+    # Maximum size, in bytes, of a cached asset.
+    MAX_ASSET_SIZE=512 * 1024 ** 2,
+)
+
 ############################ OAUTH2 Provider ###################################
 OAUTH_EXPIRE_CONFIDENTIAL_CLIENT_DAYS = 365
 OAUTH_EXPIRE_PUBLIC_CLIENT_DAYS = 30
@@ -2194,6 +2211,23 @@ BLOCK_STRUCTURES_SETTINGS = dict(
 
     # Backend storage options
     PRUNING_ACTIVE=False,
+
+    # Maximum total size, in bytes of serialized data, of the collected
+    # block structures kept deserialized in each process.  Only used
+    # when storage backing is enabled, as the cache is keyed by the
+    # version of the stored data.  0 disables the cache.
+    COLLECTED_CACHE_MAX_SIZE=0,
+)
+
+# Cache of the block structures transformed for each user, enabled by the
+# course_blocks.transformed_cache waffle switch.
+COURSE_BLOCKS_TRANSFORMED_CACHE = dict(
+    # Timeout, in seconds, of the cached block structures.
+    TIMEOUT=60 * 60,
+
+    # Length, in seconds, of the time buckets in which start dates and
+    # other dates that pass are considered unchanged.
+    TIME_BUCKET_SECONDS=5 * 60,
 )
 
 ################################ Bulk Email ###################################
@@ -2447,7 +2481,7 @@ INSTALLED_APPS = [
     # Course data caching
     'openedx.core.djangoapps.content.course_overviews.apps.CourseOverviewsConfig',
     'openedx.core.djangoapps.content.block_structure.apps.BlockStructureConfig',
-    'lms.djangoapps.course_blocks',
+    'lms.djangoapps.course_blocks.apps.CourseBlocksConfig',
 
 
     # Coursegraph
@@ -2586,6 +2620,25 @@ PAKX_INSTALLED_APPS = [
 
 INSTALLED_APPS.extend(PAKX_INSTALLED_APPS)
 
+COURSE_PROGRESS_REMINDER_EMAIL_DAYS = 5
+
+# Delay in seconds before recounting course progress after publish, so that the
+# block structure cache is already updated.
+COURSE_PROGRESS_REFRESH_DELAY = 60
+
+# Parameters for breaking down due reminder emails into subtasks.
+REMINDER_EMAILS_PER_TASK = 100
+REMINDER_EMAIL_ROUTING_KEY = DEFAULT_PRIORITY_QUEUE
+REMINDER_EMAIL_DEFAULT_RETRY_DELAY = 30
+REMINDER_EMAIL_MAX_RETRIES = 5
+# Celery rate limit of reminder email subtasks per worker and delay in seconds
+# between individual reminder emails within a subtask.
+REMINDER_EMAIL_TASK_RATE_LIMIT = '10/m'
+REMINDER_EMAIL_DELAY_BETWEEN_SENDS = 0.02
+
+# Interval in minutes between recounts of organization course stats marked dirty by learner progress.
+ORGANIZATION_COURSE_STATS_REFRESH_MINUTES = 15
+
 ######################### CSRF #########################################
 
 # Forwards-compatibility with Django 1.7
@@ -2900,6 +2953,11 @@ FINANCIAL_REPORTS = {
 # Rate limit for regrading tasks that a grading policy change can kick off
 POLICY_CHANGE_TASK_RATE_LIMIT = '300/h'
 
+# Number of threads, and learners per shard, used by course-wide grading (grade reports and
+# regrading tasks) to grade learners concurrently. A single worker grades learners sequentially.
+COURSE_GRADE_ITER_MAX_WORKERS = 1
+COURSE_GRADE_ITER_CHUNK_SIZE = 100
+
 #### PASSWORD POLICY SETTINGS #####
 AUTH_PASSWORD_VALIDATORS = [
     {
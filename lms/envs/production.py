@@ -940,6 +940,24 @@ DASHBOARD_COURSE_LIMIT = ENV_TOKENS.get('DASHBOARD_COURSE_LIMIT', None)
 ENABLE_PARTNER_SPACES = ENV_TOKENS.get('ENABLE_PARTNER_SPACES', False)
 DEFAULT_PUBLIC_PARTNER_SPACE = ENV_TOKENS.get('DEFAULT_PUBLIC_PARTNER_SPACE', 'ilmx')
 COURSE_PROGRESS_REMINDER_EMAIL_DAYS = ENV_TOKENS.get('COURSE_PROGRESS_REMINDER_EMAIL_DAYS', 5)
+COURSE_PROGRESS_REFRESH_DELAY = ENV_TOKENS.get('COURSE_PROGRESS_REFRESH_DELAY', COURSE_PROGRESS_REFRESH_DELAY)
+REMINDER_EMAILS_PER_TASK = ENV_TOKENS.get('REMINDER_EMAILS_PER_TASK', REMINDER_EMAILS_PER_TASK)
+REMINDER_EMAIL_ROUTING_KEY = ENV_TOKENS.get('REMINDER_EMAIL_ROUTING_KEY', DEFAULT_PRIORITY_QUEUE)
+REMINDER_EMAIL_TASK_RATE_LIMIT = ENV_TOKENS.get('REMINDER_EMAIL_TASK_RATE_LIMIT', REMINDER_EMAIL_TASK_RATE_LIMIT)
+REMINDER_EMAIL_DELAY_BETWEEN_SENDS = ENV_TOKENS.get(
+    'REMINDER_EMAIL_DELAY_BETWEEN_SENDS', REMINDER_EMAIL_DELAY_BETWEEN_SENDS
+)
+ORGANIZATION_COURSE_STATS_REFRESH_MINUTES = ENV_TOKENS.get(
+    'ORGANIZATION_COURSE_STATS_REFRESH_MINUTES', ORGANIZATION_COURSE_STATS_REFRESH_MINUTES
+)
+CELERYBEAT_SCHEDULE['pakx-rollup-daily-organization-course-stats'] = {
+    'task': 'rollup_daily_organization_course_stats',
+    'schedule': datetime.timedelta(days=1),
+}
+CELERYBEAT_SCHEDULE['pakx-refresh-organization-course-stats'] = {
+    'task': 'refresh_organization_course_stats',
+    'schedule': datetime.timedelta(minutes=ORGANIZATION_COURSE_STATS_REFRESH_MINUTES),
+}
 
 ####################################### SENTRY ###########################################
 SENTRY_DSN = ENV_TOKENS.get('SENTRY_DSN', None)
@@ -6,10 +6,13 @@ Module with family of classes for block structures.
 
 The following internal data structures are implemented:
     _BlockRelations - Data structure for a single block's relations.
+    _BlockIndex - Data structure for an integer index of the blocks' relations.
     _BlockData - Data structure for a single block's data.
 """
 
 
+from array import array
+from collections import OrderedDict
 from copy import deepcopy
 from functools import partial
 from logging import getLogger
@@ -18,7 +21,7 @@ import six
 
 from openedx.core.lib.graph_traversals import traverse_post_order, traverse_topologically
 
-from .exceptions import TransformerException
+from .exceptions import BlockStructureException, TransformerException
 
 logger = getLogger(__name__)  # pylint: disable=invalid-name
 
@@ -43,6 +46,152 @@ class _BlockRelations(object):
         self.children = []
 
 
+class _BlockIndex(object):
+    """
+    Data structure to index the blocks of a block structure by integers,
+    with the parents and children of the blocks in compressed sparse row
+    arrays, for faster traversals.
+
+    The index is a snapshot of the relations of the block structure, so
+    it is dropped whenever the relations change.  The traversal orders
+    computed without a filter are kept in it, and it is shared by the
+    copies of the block structure.
+    """
+    def __init__(self, block_relations):
+
+        # List of the usage keys of the blocks, by index.
+        # list [UsageKey]
+        self.block_keys = list(block_relations)
+
+        # Map of a block's usage key to its index.
+        # dict {UsageKey: int}
+        self.indexes = {block_key: index for index, block_key in enumerate(self.block_keys)}
+
+        self._parents_offsets, self._parents = self._to_sparse_rows(block_relations, 'parents')
+        self._children_offsets, self._children = self._to_sparse_rows(block_relations, 'children')
+
+        # Maps of a start block's index to the indexes of the blocks in
+        # the order they are traversed from that block, without a filter.
+        # dict {int: tuple(int)}
+        self._topological_orders = {}
+        self._post_orders = {}
+
+    def _to_sparse_rows(self, block_relations, relation_name):
+        """
+        Returns the offsets and indexes arrays of the given relation of
+        all blocks.
+        """
+        offsets = array('l', [0])
+        related_indexes = array('l')
+        for block_key in self.block_keys:
+            related_indexes.extend(
+                self.indexes[related_key] for related_key in getattr(block_relations[block_key], relation_name)
+            )
+            offsets.append(len(related_indexes))
+        return offsets, related_indexes
+
+    def get_parents(self, index):
+        return self._parents[self._parents_offsets[index]:self._parents_offsets[index + 1]]
+
+    def get_children(self, index):
+        return self._children[self._children_offsets[index]:self._children_offsets[index + 1]]
+
+    def topological_order(self, start_index):
+        """
+        Returns the indexes of the blocks in the order of an unfiltered
+        topological traversal from the given block.
+        """
+        order = self._topological_orders.get(start_index)
+        if order is None:
+            order = self._topological_orders[start_index] = tuple(self.traverse_topologically(start_index))
+        return order
+
+    def post_order(self, start_index):
+        """
+        Returns the indexes of the blocks in the order of an unfiltered
+        post-order traversal from the given block.
+        """
+        order = self._post_orders.get(start_index)
+        if order is None:
+            order = self._post_orders[start_index] = tuple(self.traverse_post_order(start_index))
+        return order
+
+    def traverse_topologically(
+            self,
+            start_index,
+            filter_func=None,
+            yield_descendants_of_unyielded=False,
+            removals=None,
+    ):
+        """
+        Generator for yielding the indexes of the blocks in a topological
+        sort, as openedx.core.lib.graph_traversals.traverse_topologically
+        does for usage keys.  The filter_func is still given usage keys.
+
+        Arguments:
+            removals (dict {UsageKey: bool}) - Blocks removed by the
+                filter_func, but still present in this index, mapped to
+                whether their descendants are kept. The children of such
+                a block are traversed as children of its parents would be.
+        """
+        block_keys = self.block_keys
+        visited = bytearray(len(block_keys))
+        # Whether a visited block was yielded, or is to be considered as
+        # yielded by its children.
+        yielded = bytearray(len(block_keys))
+        stack = [start_index]
+
+        while stack:
+            current = stack.pop()
+            if current != start_index:
+                parents = self.get_parents(current)
+                if not all(visited[parent] for parent in parents):
+                    continue
+                elif not yield_descendants_of_unyielded and not any(yielded[parent] for parent in parents):
+                    continue
+
+            if not visited[current]:
+                stack.extend(reversed(self.get_children(current)))
+
+                if filter_func is None:
+                    should_yield_block = True
+                else:
+                    block_key = block_keys[current]
+                    should_yield_block = filter_func(block_key)
+                if should_yield_block:
+                    yield current
+                    yielded[current] = True
+                elif removals and removals.get(block_keys[current]):
+                    yielded[current] = current != start_index and any(
+                        yielded[parent] for parent in self.get_parents(current)
+                    )
+                visited[current] = True
+
+    def traverse_post_order(self, start_index, filter_func=None):
+        """
+        Generator for yielding the indexes of the blocks in a post-order
+        sort, as openedx.core.lib.graph_traversals.traverse_post_order
+        does for usage keys.  The filter_func is still given usage keys.
+        """
+        block_keys = self.block_keys
+        visited = bytearray(len(block_keys))
+        stack = [(start_index, iter(self.get_children(start_index)))]
+
+        while stack:
+            current, children = stack[-1]
+            if visited[current] or (filter_func is not None and not filter_func(block_keys[current])):
+                stack.pop()
+                continue
+
+            next_child = next(children, None)
+            if next_child is None:
+                yield current
+                visited[current] = True
+                stack.pop()
+            else:
+                stack.append((next_child, iter(self.get_children(next_child))))
+
+
 class BlockStructure(object):
     """
     Base class for a block structure.  BlockStructures are constructed
@@ -65,6 +214,11 @@ class BlockStructure(object):
         # dict {UsageKey: _BlockRelations}
         self._block_relations = {}
 
+        # Integer index of the block relations, built when first used by
+        # a traversal and dropped whenever the relations change.
+        # _BlockIndex
+        self._block_index = None
+
         # Add the root block.
         self._add_block(self._block_relations, root_block_usage_key)
 
@@ -124,6 +278,7 @@ class BlockStructure(object):
         """
         self.root_block_usage_key = usage_key
         self._block_relations[usage_key].parents = []
+        self._block_index = None
 
     def __contains__(self, usage_key):
         """
@@ -157,6 +312,7 @@ class BlockStructure(object):
             filter_func=None,
             yield_descendants_of_unyielded=False,
             start_node=None,
+            use_index=False,
     ):
         """
         Performs a topological sort of the block structure and yields
@@ -166,12 +322,28 @@ class BlockStructure(object):
             See the description in
             openedx.core.lib.graph_traversals.traverse_topologically.
 
+            use_index (bool) - Whether to traverse the integer index of
+                the block relations, which yields the same blocks faster.
+                The filter_func must then not change the relations.
+
         Returns:
             generator - A generator object created from the
                 traverse_topologically method.
         """
+        start_node = start_node or self.root_block_usage_key
+        if use_index and start_node in self:
+            block_index = self._get_block_index()
+            start_index = block_index.indexes[start_node]
+            if filter_func is None:
+                indexes = block_index.topological_order(start_index)
+            else:
+                indexes = block_index.traverse_topologically(
+                    start_index, filter_func, yield_descendants_of_unyielded, self._get_deferred_removals(),
+                )
+            return self._traverse_index(block_index, indexes)
+
         return traverse_topologically(
-            start_node=start_node or self.root_block_usage_key,
+            start_node=start_node,
             get_parents=self.get_parents,
             get_children=self.get_children,
             filter_func=filter_func,
@@ -182,6 +354,7 @@ class BlockStructure(object):
             self,
             filter_func=None,
             start_node=None,
+            use_index=False,
     ):
         """
         Performs a post-order sort of the block structure and yields
@@ -191,16 +364,60 @@ class BlockStructure(object):
             See the description in
             openedx.core.lib.graph_traversals.traverse_post_order.
 
+            use_index (bool) - See the description in
+                topological_traversal.
+
         Returns:
             generator - A generator object created from the
                 traverse_post_order method.
         """
+        start_node = start_node or self.root_block_usage_key
+        if use_index and start_node in self:
+            block_index = self._get_block_index()
+            start_index = block_index.indexes[start_node]
+            if filter_func is None:
+                indexes = block_index.post_order(start_index)
+            else:
+                indexes = block_index.traverse_post_order(start_index, filter_func)
+            return self._traverse_index(block_index, indexes)
+
         return traverse_post_order(
-            start_node=start_node or self.root_block_usage_key,
+            start_node=start_node,
             get_children=self.get_children,
             filter_func=filter_func,
         )
 
+    def _traverse_index(self, block_index, indexes):
+        """
+        Generator for yielding the usage keys of the given indexes of
+        blocks in the given index, verifying that the relations did not
+        change meanwhile.
+        """
+        for index in indexes:
+            self._verify_block_index(block_index)
+            yield block_index.block_keys[index]
+        self._verify_block_index(block_index)
+
+    def _verify_block_index(self, block_index):
+        if self._block_index is not block_index:
+            raise BlockStructureException(u'Block relations were changed during an indexed traversal.')
+
+    def _get_block_index(self):
+        """
+        Returns the integer index of the current block relations.
+        """
+        if self._block_index is None:
+            self._block_index = _BlockIndex(self._block_relations)
+        return self._block_index
+
+    def _get_deferred_removals(self):
+        """
+        Returns the blocks removed during the current traversal, whose
+        removal from the relations is deferred until its end.  Only
+        block structures with block data defer removals.
+        """
+        return None
+
     #--- Internal methods ---#
     # To be used within the block_structure framework or by tests.
 
@@ -231,6 +448,7 @@ class BlockStructure(object):
 
         # Replace this structure's relations with the newly pruned one.
         self._block_relations = pruned_block_relations
+        self._block_index = None
 
     def _add_relation(self, parent_key, child_key):
         """
@@ -241,6 +459,7 @@ class BlockStructure(object):
             child_key (UsageKey) - Usage key of the child block.
         """
         self._add_to_relations(self._block_relations, parent_key, child_key)
+        self._block_index = None
 
     @staticmethod
     def _add_to_relations(block_relations, parent_key, child_key):
@@ -324,6 +543,16 @@ class FieldData(object):
         """
         return field_name in self.class_field_names()
 
+    def _copy(self):
+        """
+        Returns a copy of this instance with a copy of its fields
+        dict, sharing the field values.
+        """
+        field_data = self.__class__.__new__(self.__class__)
+        field_data.__dict__.update(self.__dict__)
+        field_data.__dict__['fields'] = dict(self.fields)
+        return field_data
+
 
 class TransformerData(FieldData):
     """
@@ -394,6 +623,22 @@ class BlockData(FieldData):
         # Map of transformer name to its block-specific data.
         self.transformer_data = TransformerDataMap()
 
+    def _copy(self):
+        block_data = super(BlockData, self)._copy()
+        block_data.__dict__['transformer_data'] = _copy_transformer_data_map(self.transformer_data)
+        return block_data
+
+
+def _copy_transformer_data_map(transformer_data_map):
+    """
+    Returns a copy of the given TransformerDataMap with copies of its
+    TransformerData, sharing their field values.
+    """
+    return TransformerDataMap(
+        (transformer_name, transformer_data._copy())  # pylint: disable=protected-access
+        for transformer_name, transformer_data in six.iteritems(transformer_data_map)
+    )
+
 
 class BlockStructureBlockData(BlockStructure):
     """
@@ -417,18 +662,55 @@ class BlockStructureBlockData(BlockStructure):
         # Map of a transformer's name to its non-block-specific data.
         self.transformer_data = TransformerDataMap()
 
+        # Map of the usage keys of blocks removed during an indexed
+        # traversal to whether their descendants are kept, or None
+        # outside of such a traversal.
+        # OrderedDict {UsageKey: bool}
+        self._deferred_removals = None
+
     def copy(self):
         """
         Returns a new instance of BlockStructureBlockData with a
         deep-copy of this instance's contents.
         """
         from .factory import BlockStructureFactory
-        return BlockStructureFactory.create_new(
+        block_structure = BlockStructureFactory.create_new(
             self.root_block_usage_key,
             deepcopy(self._block_relations),
             deepcopy(self.transformer_data),
             deepcopy(self._block_data_map),
         )
+        block_structure._block_index = self._block_index
+        return block_structure
+
+    def shallow_copy(self):
+        """
+        Returns a new instance of BlockStructureBlockData with copies of
+        this instance's relations and data containers, sharing their
+        field values.
+
+        This is much cheaper than copy, but the field values must then
+        be replaced rather than mutated in place, as they are shared by
+        both instances.
+        """
+        from .factory import BlockStructureFactory
+        block_relations = {}
+        for usage_key, relations in six.iteritems(self._block_relations):
+            block_relations[usage_key] = relations_copy = _BlockRelations()
+            relations_copy.parents = list(relations.parents)
+            relations_copy.children = list(relations.children)
+
+        block_structure = BlockStructureFactory.create_new(
+            self.root_block_usage_key,
+            block_relations,
+            _copy_transformer_data_map(self.transformer_data),
+            {
+                usage_key: block_data._copy()  # pylint: disable=protected-access
+                for usage_key, block_data in six.iteritems(self._block_data_map)
+            },
+        )
+        block_structure._block_index = self._block_index
+        return block_structure
 
     def iteritems(self):
         """
@@ -638,6 +920,10 @@ class BlockStructureBlockData(BlockStructure):
                 removed block's children become children of the
                 removed block's parents.
         """
+        if self._deferred_removals is not None:
+            self._deferred_removals[usage_key] = keep_descendants
+            return
+
         children = self._block_relations[usage_key].children
         parents = self._block_relations[usage_key].parents
 
@@ -653,6 +939,8 @@ class BlockStructureBlockData(BlockStructure):
         self._block_relations.pop(usage_key, None)
         self._block_data_map.pop(usage_key, None)
 
+        self._block_index = None
+
         # Recreate the graph connections if descendants are to be kept.
         if keep_descendants:
             for child in children:
@@ -705,7 +993,7 @@ class BlockStructureBlockData(BlockStructure):
             return False
         return True
 
-    def remove_block_traversal(self, removal_condition, keep_descendants=False):
+    def remove_block_traversal(self, removal_condition, keep_descendants=False, use_index=False):
         """
         A higher-order function that traverses the block structure
         using topological sort and removes all blocks satisfying the given
@@ -718,14 +1006,18 @@ class BlockStructureBlockData(BlockStructure):
 
             keep_descendants (bool) - See the description in
                 remove_block.
+
+            use_index (bool) - See the description in
+                filter_topological_traversal.
         """
         self.filter_topological_traversal(
             filter_func=self.create_removal_filter(
                 removal_condition, keep_descendants
-            )
+            ),
+            use_index=use_index,
         )
 
-    def filter_topological_traversal(self, filter_func, **kwargs):
+    def filter_topological_traversal(self, filter_func, use_index=False, **kwargs):
         """
         A higher-order function that traverses the block structure
         using topological sort and applies the given filter.
@@ -735,6 +1027,13 @@ class BlockStructureBlockData(BlockStructure):
                 whether or not to yield the given block key.
                 If None, the True function is assumed.
 
+            use_index (bool) - Whether to traverse the integer index of
+                the block relations.  Blocks removed by the filter_func
+                are then only marked as removed during the traversal, and
+                removed from the relations at its end, in the same order.
+                The filter_func must otherwise not depend on the relations
+                nor change them.
+
             kwargs (dict) - Optional keyword arguments to be forwarded
                 to topological_traversal.
         """
@@ -744,12 +1043,26 @@ class BlockStructureBlockData(BlockStructure):
         # descendants that are unyielded.  However, note that the
         # optimization is not currently present because of DAGs,
         # but it will be as soon as we remove support for DAGs.
-        for _ in self.topological_traversal(filter_func=filter_func, **kwargs):
-            pass
+        if not use_index:
+            for _ in self.topological_traversal(filter_func=filter_func, **kwargs):
+                pass
+            return
+
+        self._deferred_removals = OrderedDict()
+        try:
+            for _ in self.topological_traversal(filter_func=filter_func, use_index=True, **kwargs):
+                pass
+        finally:
+            deferred_removals, self._deferred_removals = self._deferred_removals, None
+            for usage_key, keep_descendants in six.iteritems(deferred_removals):
+                self.remove_block(usage_key, keep_descendants)
 
     #--- Internal methods ---#
     # To be used within the block_structure framework or by tests.
 
+    def _get_deferred_removals(self):
+        return self._deferred_removals
+
     def _get_transformer_data_version(self, transformer):
         """
         Returns the version number stored for the given transformer.
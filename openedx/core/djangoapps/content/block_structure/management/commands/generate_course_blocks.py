@@ -3,10 +3,19 @@ Command to load course blocks.
 """
 
 
+import json
 import logging
+import multiprocessing
+import os
+from collections import defaultdict
+from multiprocessing.connection import wait
+from time import time
 
 import six
+from django.core.cache import caches
 from django.core.management.base import BaseCommand
+from django.db import connections
+from edx_django_utils.cache import RequestCache
 import six
 from six import text_type
 
@@ -14,21 +23,32 @@ import openedx.core.djangoapps.content.block_structure.api as api
 import openedx.core.djangoapps.content.block_structure.store as store
 import openedx.core.djangoapps.content.block_structure.tasks as tasks
 from openedx.core.djangoapps.content.block_structure.config import STORAGE_BACKING_FOR_CACHE, waffle
+from openedx.core.djangoapps.content.block_structure.transformers import COLLECT_DURATIONS_NAMESPACE
 from openedx.core.lib.command_utils import (
     get_mutually_exclusive_required_option,
     parse_course_keys,
-    validate_dependent_option
+    validate_dependent_option,
+    validate_mutually_exclusive_option
 )
-from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.django import clear_existing_modulestores, modulestore
 
 log = logging.getLogger(__name__)
 
+SUCCEEDED = u'succeeded'
+FAILED = u'failed'
+TIMED_OUT = u'timed_out'
+
+# Seconds to wait for the outcome of a worker before checking time budgets.
+WORKER_POLL_INTERVAL = 1
+
 
 class Command(BaseCommand):
     """
     Example usage:
         $ ./manage.py lms generate_course_blocks --all_courses --settings=devstack
         $ ./manage.py lms generate_course_blocks 'edX/DemoX/Demo_Course' --settings=devstack
+        $ ./manage.py lms generate_course_blocks --all_courses --force_update --workers 8 --course_time_budget 600 \\
+            --progress_file /tmp/course_blocks.progress --settings=devstack
     """
     args = u'<course_id course_id ...>'
     help = u'Generates and stores course blocks for one or more courses.'
@@ -84,6 +104,28 @@ class Command(BaseCommand):
             action='store_true',
             default=False,
         )
+        parser.add_argument(
+            '--workers',
+            help=u'Number of worker processes generating course blocks in parallel, one course at a time each.',
+            default=0,
+            type=int,
+        )
+        parser.add_argument(
+            '--course_time_budget',
+            help=u'Number of seconds after which a worker generating course blocks for a course is stopped.',
+            default=0,
+            type=int,
+        )
+        parser.add_argument(
+            '--progress_file',
+            help=u'File recording the outcome of each course. Courses it records as generated are skipped.',
+        )
+        parser.add_argument(
+            '--report_size',
+            help=u'Number of the slowest courses and transformers to report.',
+            default=10,
+            type=int,
+        )
 
     def handle(self, *args, **options):
 
@@ -91,6 +133,8 @@ class Command(BaseCommand):
         validate_dependent_option(options, 'routing_key', 'enqueue_task')
         validate_dependent_option(options, 'start_index', 'all_courses')
         validate_dependent_option(options, 'end_index', 'all_courses')
+        validate_mutually_exclusive_option(options, 'enqueue_task', 'workers')
+        validate_dependent_option(options, 'course_time_budget', 'workers')
 
         if courses_mode == 'all_courses':
             course_keys = [course.id for course in modulestore().get_course_summaries()]
@@ -100,6 +144,10 @@ class Command(BaseCommand):
         else:
             course_keys = parse_course_keys(options['courses'])
 
+        if options.get('progress_file'):
+            generated = self._read_generated_courses(options['progress_file'])
+            course_keys = [course_key for course_key in course_keys if six.text_type(course_key) not in generated]
+
         self._set_log_levels(options)
 
         log.critical(u'BlockStructure: STARTED generating Course Blocks for %d courses.', len(course_keys))
@@ -135,15 +183,156 @@ class Command(BaseCommand):
         if options.get('with_storage'):
             waffle().override_for_request(STORAGE_BACKING_FOR_CACHE)
 
-        for course_key in course_keys:
-            try:
-                self._generate_for_course(options, course_key)
-            except Exception as ex:  # pylint: disable=broad-except
-                log.exception(
-                    u'BlockStructure: An error occurred while generating course blocks for %s: %s',
-                    six.text_type(course_key),
-                    text_type(ex),
-                )
+        if options.get('workers'):
+            outcomes = self._generate_in_workers(options, course_keys)
+        else:
+            outcomes = (self._generate_and_time(options, course_key) for course_key in course_keys)
+
+        generated_outcomes = []
+        for outcome in outcomes:
+            if options.get('enqueue_task'):
+                continue
+            if options.get('progress_file'):
+                self._write_outcome(options['progress_file'], outcome)
+            generated_outcomes.append(outcome)
+
+        if generated_outcomes:
+            self._report(generated_outcomes, options.get('report_size'))
+
+    def _generate_and_time(self, options, course_key):
+        """
+        Generates course blocks for the given course_key per the given
+        options, and returns the outcome.
+        """
+        # Courses served from the cache are not collected, and must not
+        # report the durations of the previously collected course.
+        RequestCache(COLLECT_DURATIONS_NAMESPACE).clear()
+        start_time = time()
+        try:
+            self._generate_for_course(options, course_key)
+            status = SUCCEEDED
+        except Exception as ex:  # pylint: disable=broad-except
+            log.exception(
+                u'BlockStructure: An error occurred while generating course blocks for %s: %s',
+                six.text_type(course_key),
+                text_type(ex),
+            )
+            status = FAILED
+        return self._outcome(
+            six.text_type(course_key), status, start_time, dict(RequestCache(COLLECT_DURATIONS_NAMESPACE).data),
+        )
+
+    def _generate_in_workers(self, options, course_keys):
+        """
+        Generates course blocks for the given course_keys in a pool of
+        worker processes, each one forked for a single course, and yields
+        the outcomes of the courses as they finish.
+
+        Workers running longer than the course time budget are terminated.
+        """
+        budget = options.get('course_time_budget')
+        context = multiprocessing.get_context('fork')
+        pending_course_keys = list(reversed(course_keys))
+        # Map of the connection each running worker sends its outcome
+        # through, to its course id, process and start time.
+        running = {}
+
+        while pending_course_keys or running:
+            while pending_course_keys and len(running) < options['workers']:
+                course_key = pending_course_keys.pop()
+                reader, writer = context.Pipe(duplex=False)
+                _close_connections_before_fork()
+                worker = context.Process(target=self._generate_in_worker, args=(options, course_key, writer))
+                worker.start()
+                writer.close()
+                running[reader] = (six.text_type(course_key), worker, time())
+
+            for reader in wait(list(running), timeout=WORKER_POLL_INTERVAL):
+                course_id, worker, start_time = running.pop(reader)
+                try:
+                    outcome = reader.recv()
+                except EOFError:
+                    log.error(u'BlockStructure: The worker generating course blocks for %s died.', course_id)
+                    outcome = self._outcome(course_id, FAILED, start_time)
+                reader.close()
+                worker.join()
+                yield outcome
+
+            for reader, (course_id, worker, start_time) in list(running.items()):
+                if budget and time() - start_time > budget:
+                    log.error(u'BlockStructure: Exceeded the time budget generating course blocks for %s.', course_id)
+                    worker.terminate()
+                    worker.join()
+                    reader.close()
+                    del running[reader]
+                    yield self._outcome(course_id, TIMED_OUT, start_time)
+
+    def _generate_in_worker(self, options, course_key, writer):
+        """
+        Entry point of a worker process generating course blocks for the
+        given course_key, which sends the outcome through the given
+        connection.
+        """
+        # Modulestore connections are not shared with the parent process.
+        clear_existing_modulestores()
+        writer.send(self._generate_and_time(options, course_key))
+        writer.close()
+
+    def _outcome(self, course_id, status, start_time, transformer_durations=None):
+        """
+        Returns the outcome of generating course blocks for a course.
+        """
+        return dict(
+            course_id=course_id,
+            status=status,
+            duration=time() - start_time,
+            transformer_durations=transformer_durations or {},
+        )
+
+    def _report(self, outcomes, report_size):
+        """
+        Logs a summary of the given outcomes, with the slowest courses and
+        the transformers that took the most time over all courses.
+        """
+        statuses = defaultdict(int)
+        transformer_durations = defaultdict(float)
+        for outcome in outcomes:
+            statuses[outcome['status']] += 1
+            for transformer_name, duration in six.iteritems(outcome['transformer_durations']):
+                transformer_durations[transformer_name] += duration
+
+        log.critical(
+            u'BlockStructure: Course blocks outcomes: %s.',
+            u', '.join(u'{} {}'.format(count, status) for status, count in sorted(statuses.items())),
+        )
+        for outcome in sorted(outcomes, key=lambda outcome: outcome['duration'], reverse=True)[:report_size]:
+            log.critical(
+                u'BlockStructure: Slowest course: %s, %.1f seconds, %s.',
+                outcome['course_id'],
+                outcome['duration'],
+                outcome['status'],
+            )
+        slowest_transformers = sorted(transformer_durations.items(), key=lambda item: item[1], reverse=True)
+        for transformer_name, duration in slowest_transformers[:report_size]:
+            log.critical(u'BlockStructure: Slowest transformer: %s, %.1f seconds.', transformer_name, duration)
+
+    def _read_generated_courses(self, progress_file):
+        """
+        Returns the ids of the courses the given progress file records as
+        generated.
+        """
+        if not os.path.exists(progress_file):
+            return set()
+        with open(progress_file) as progress:
+            outcomes = [json.loads(line) for line in progress if line.strip()]
+        return {outcome['course_id'] for outcome in outcomes if outcome['status'] == SUCCEEDED}
+
+    def _write_outcome(self, progress_file, outcome):
+        """
+        Appends the given outcome to the given progress file.
+        """
+        with open(progress_file, 'a') as progress:
+            progress.write(json.dumps(outcome) + u'\n')
 
     def _generate_for_course(self, options, course_key):
         """
@@ -162,3 +351,13 @@ class Command(BaseCommand):
             action = api.update_course_in_cache if options.get('force_update') else api.get_course_in_cache
             action(course_key)
             log.info(u'BlockStructure: FINISHED generating for course: %s.', course_key)
+
+
+def _close_connections_before_fork():
+    """
+    Closes the database and cache connections of this process, so that
+    a forked worker process opens its own rather than sharing them.
+    """
+    connections.close_all()
+    for cache in caches.all():
+        cache.close()
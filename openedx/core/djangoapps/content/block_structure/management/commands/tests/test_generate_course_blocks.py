@@ -4,6 +4,10 @@ Tests for generate_course_blocks management command.
 
 
 import itertools
+import json
+import os
+import shutil
+import tempfile
 
 import ddt
 from django.core.management.base import CommandError
@@ -21,6 +25,46 @@ from xmodule.modulestore.tests.factories import CourseFactory
 from .. import generate_course_blocks
 
 
+class _InlineProcess(object):
+    """
+    Stands for a worker process, running its target when started.
+    """
+    hang = False
+
+    def __init__(self, target, args):
+        self.target = target
+        self.args = args
+        self.hanging_fd = None
+
+    def start(self):
+        if self.hang:
+            # keep the outcome connection open, as a running worker would
+            self.hanging_fd = os.dup(self.args[-1].fileno())
+        else:
+            self.target(*self.args)
+
+    def terminate(self):
+        os.close(self.hanging_fd)
+
+    def join(self):
+        pass
+
+
+class _InlineContext(object):
+    """
+    Stands for a multiprocessing context, with inline worker processes.
+    """
+    def __init__(self, process_class=_InlineProcess):
+        self.process_class = process_class
+
+    def Pipe(self, duplex):  # pylint: disable=invalid-name
+        import multiprocessing
+        return multiprocessing.Pipe(duplex)
+
+    def Process(self, target, args):  # pylint: disable=invalid-name
+        return self.process_class(target, args)
+
+
 @ddt.ddt
 class TestGenerateCourseBlocks(ModuleStoreTestCase):
     """
@@ -150,6 +194,82 @@ class TestGenerateCourseBlocks(ModuleStoreTestCase):
                     else:
                         self.assertNotIn('routing_key', task_options)
 
+    def _handle_in_workers(self, context=None, **options):
+        """
+        Runs the command with worker processes running inline.
+        """
+        context = context or _InlineContext()
+        with patch.object(generate_course_blocks.multiprocessing, 'get_context', return_value=context):
+            with patch.object(generate_course_blocks, '_close_connections_before_fork'):
+                with patch.object(generate_course_blocks, 'clear_existing_modulestores'):
+                    self.command.handle(**options)
+
+    def test_workers(self):
+        self._assert_courses_not_in_block_cache(*self.course_keys)
+        self._handle_in_workers(all_courses=True, workers=2)
+        self._assert_courses_in_block_cache(*self.course_keys)
+
+    def test_worker_time_budget(self):
+        class _HangingProcess(_InlineProcess):
+            hang = True
+
+        progress_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, progress_dir)
+        progress_file = os.path.join(progress_dir, 'progress')
+
+        with patch.object(generate_course_blocks, 'WORKER_POLL_INTERVAL', 0):
+            with patch.object(generate_course_blocks, 'time', side_effect=itertools.count(0, 10)):
+                self._handle_in_workers(
+                    _InlineContext(_HangingProcess),
+                    all_courses=True,
+                    workers=2,
+                    course_time_budget=5,
+                    progress_file=progress_file,
+                )
+
+        self._assert_courses_not_in_block_cache(*self.course_keys)
+        with open(progress_file) as progress:
+            statuses = [json.loads(line)['status'] for line in progress]
+        self.assertEqual(statuses, [generate_course_blocks.TIMED_OUT] * self.num_courses)
+
+    def test_progress_file(self):
+        progress_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, progress_dir)
+        progress_file = os.path.join(progress_dir, 'progress')
+
+        self.command.handle(courses=[six.text_type(self.course_keys[0])], progress_file=progress_file)
+        with patch.object(self.command, '_generate_for_course') as mock_generate:
+            self.command.handle(all_courses=True, progress_file=progress_file)
+        self.assertEqual([call[0][1] for call in mock_generate.call_args_list], self.course_keys[1:])
+
+        with open(progress_file) as progress:
+            outcomes = [json.loads(line) for line in progress]
+        self.assertEqual(
+            [outcome['course_id'] for outcome in outcomes],
+            [six.text_type(course_key) for course_key in self.course_keys],
+        )
+        self.assertEqual(outcomes[0]['status'], generate_course_blocks.SUCCEEDED)
+        self.assertIn('xblock_fields', outcomes[0]['transformer_durations'])
+
+    def test_progress_file_of_cached_courses(self):
+        progress_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, progress_dir)
+        progress_file = os.path.join(progress_dir, 'progress')
+
+        self.command.handle(all_courses=True)
+        self.command.handle(all_courses=True, progress_file=progress_file)
+
+        with open(progress_file) as progress:
+            outcomes = [json.loads(line) for line in progress]
+        self.assertEqual(len(outcomes), self.num_courses)
+        for outcome in outcomes:
+            self.assertEqual(outcome['status'], generate_course_blocks.SUCCEEDED)
+            self.assertEqual(outcome['transformer_durations'], {})
+
+    def test_workers_with_enqueue_task(self):
+        with self.assertRaisesMessage(CommandError, 'Both --enqueue_task and --workers cannot be specified.'):
+            self.command.handle(all_courses=True, enqueue_task=True, workers=2)
+
     @patch('openedx.core.djangoapps.content.block_structure.management.commands.generate_course_blocks.log')
     def test_not_found_key(self, mock_log):
         self.command.handle(courses=['fake/course/id'])
@@ -175,6 +295,7 @@ class TestGenerateCourseBlocks(ModuleStoreTestCase):
         ('routing_key', 'enqueue_task'),
         ('start_index', 'all_courses'),
         ('end_index', 'all_courses'),
+        ('course_time_budget', 'workers'),
     )
     @ddt.unpack
     def test_dependent_options_error(self, dependent_option, depending_on_option):
@@ -38,7 +38,13 @@ class BlockStructureManager(object):
         self.modulestore = modulestore
         self.store = BlockStructureStore(cache)
 
-    def get_transformed(self, transformers, starting_block_usage_key=None, collected_block_structure=None):
+    def get_transformed(
+            self,
+            transformers,
+            starting_block_usage_key=None,
+            collected_block_structure=None,
+            use_index=False,
+    ):
         """
         Returns the transformed Block Structure for the root_block_usage_key,
         starting at starting_block_usage_key, getting block data from the cache
@@ -60,6 +66,10 @@ class BlockStructureManager(object):
                 get_collected.  Can be optionally provided if already available,
                 for optimization.
 
+            use_index (bool) - Whether the transformers' filters traverse
+                the integer index of the block relations.  See
+                BlockStructureTransformers.transform.
+
         Returns:
             BlockStructureBlockData - A transformed block structure,
                 starting at starting_block_usage_key.
@@ -77,7 +87,7 @@ class BlockStructureManager(object):
                     six.text_type(self.root_block_usage_key),
                 )
             block_structure.set_root_block(starting_block_usage_key)
-        transformers.transform(block_structure)
+        transformers.transform(block_structure, use_index)
         return block_structure
 
     def get_collected(self):
@@ -0,0 +1,184 @@
+"""
+Compact serialization of collected BlockStructures.
+
+Instead of pickling the graph of relation and data objects of a block
+structure, the compact format pickles only builtin values and arrays:
+
+    * every usage key once, in a list, so that blocks are referred to
+      by their index in that list,
+    * parents and children as index arrays, in compressed sparse row
+      layout, i.e. an offsets array and a flat array of block indexes,
+    * xBlock fields and transformer block fields as columns, each one
+      an array of block indexes with the list of their values.
+
+Serialized data starts with COMPACT_FORMAT_PREFIX, which a zlib stream
+never does, so that readers tell it apart from the legacy pickle format.
+"""
+
+
+import pickle
+import zlib
+from array import array
+
+from .block_structure import BlockData, TransformerData, TransformerDataMap, _BlockRelations
+from .factory import BlockStructureFactory
+
+# Incrementally update this value whenever the compact format changes.
+COMPACT_FORMAT_VERSION = 1
+COMPACT_FORMAT_PREFIX = u'bsc{}:'.format(COMPACT_FORMAT_VERSION).encode('ascii')
+
+_PICKLE_PROTOCOL = 4
+
+
+def is_compact(serialized_data):
+    """
+    Returns whether the given serialized data is in the compact format.
+    """
+    return serialized_data[:len(COMPACT_FORMAT_PREFIX)] == COMPACT_FORMAT_PREFIX
+
+
+def serialize_block_structure(block_structure):
+    """
+    Serializes the relations, transformer data and block data of the
+    given block structure in the compact format.
+    """
+    # pylint: disable=protected-access
+    block_relations = block_structure._block_relations
+    block_data_map = block_structure._block_data_map
+
+    # Blocks without relations are not part of the structure, but their
+    # data is serialized all the same.
+    block_keys = list(block_relations)
+    block_keys.extend(block_key for block_key in block_data_map if block_key not in block_relations)
+    block_indexes = {block_key: index for index, block_key in enumerate(block_keys)}
+
+    parents = _to_sparse_rows(block_relations, block_keys, block_indexes, 'parents')
+    children = _to_sparse_rows(block_relations, block_keys, block_indexes, 'children')
+
+    field_columns = {}
+    transformer_columns = {}
+    for block_key, block_data in block_data_map.items():
+        block_index = block_indexes[block_key]
+        _add_to_columns(field_columns, block_index, block_data.fields)
+        for transformer_name, transformer_block_data in block_data.transformer_data.items():
+            present_indexes, columns = transformer_columns.setdefault(transformer_name, (array('l'), {}))
+            present_indexes.append(block_index)
+            _add_to_columns(columns, block_index, transformer_block_data.fields)
+
+    payload = (
+        block_keys,
+        len(block_relations),
+        parents,
+        children,
+        array('l', (block_indexes[block_key] for block_key in block_data_map)),
+        field_columns,
+        {
+            transformer_name: transformer_data.fields
+            for transformer_name, transformer_data in block_structure.transformer_data.items()
+        },
+        {
+            transformer_name: pickle.dumps(transformer_block_data, _PICKLE_PROTOCOL)
+            for transformer_name, transformer_block_data in transformer_columns.items()
+        },
+    )
+    return COMPACT_FORMAT_PREFIX + zlib.compress(pickle.dumps(payload, _PICKLE_PROTOCOL))
+
+
+def deserialize_block_structure(serialized_data, root_block_usage_key):
+    """
+    Deserializes and returns the block structure from the given data in
+    the compact format.
+
+    Arguments:
+        serialized_data (bytes) - Data returned by serialize_block_structure.
+
+        root_block_usage_key (UsageKey) - The usage_key for the root of the
+            block structure.
+    """
+    (
+        block_keys,
+        num_related_blocks,
+        parents,
+        children,
+        data_block_indexes,
+        field_columns,
+        transformer_fields,
+        transformer_blocks_data,
+    ) = pickle.loads(zlib.decompress(serialized_data[len(COMPACT_FORMAT_PREFIX):]))
+
+    block_relations = {}
+    parents_offsets, parents_indexes = parents
+    children_offsets, children_indexes = children
+    for index in range(num_related_blocks):
+        relations = _BlockRelations()
+        relations.parents = [
+            block_keys[parent] for parent in parents_indexes[parents_offsets[index]:parents_offsets[index + 1]]
+        ]
+        relations.children = [
+            block_keys[child] for child in children_indexes[children_offsets[index]:children_offsets[index + 1]]
+        ]
+        block_relations[block_keys[index]] = relations
+
+    # The data objects are filled in directly rather than through the
+    # attribute hooks of FieldData, which dominate the decoding time.
+    block_data_list = [None] * len(block_keys)
+    for index in data_block_indexes:
+        block_data = BlockData.__new__(BlockData)
+        block_data.__dict__.update(fields={}, location=block_keys[index], transformer_data=TransformerDataMap())
+        block_data_list[index] = block_data
+    for field_name, (indexes, values) in field_columns.items():
+        for index, value in zip(indexes, values):
+            block_data_list[index].fields[field_name] = value
+
+    transformer_data = TransformerDataMap()
+    for transformer_name, fields in transformer_fields.items():
+        transformer_data[transformer_name] = _new_transformer_data(fields)
+
+    for transformer_name, pickled_block_data in transformer_blocks_data.items():
+        present_indexes, columns = pickle.loads(pickled_block_data)
+        fields_by_index = {}
+        for index in present_indexes:
+            transformer_block_data = _new_transformer_data({})
+            block_data_list[index].transformer_data[transformer_name] = transformer_block_data
+            fields_by_index[index] = transformer_block_data.fields
+        for field_name, (indexes, values) in columns.items():
+            for index, value in zip(indexes, values):
+                fields_by_index[index][field_name] = value
+
+    block_data_map = {block_keys[index]: block_data_list[index] for index in data_block_indexes}
+    return BlockStructureFactory.create_new(root_block_usage_key, block_relations, transformer_data, block_data_map)
+
+
+def _to_sparse_rows(block_relations, block_keys, block_indexes, relation_name):
+    """
+    Returns the offsets and indexes arrays of the given relation of all
+    blocks, in compressed sparse row layout.
+    """
+    offsets = array('l', [0])
+    indexes = array('l')
+    for block_key in block_keys:
+        relations = block_relations.get(block_key)
+        if relations is not None:
+            indexes.extend(block_indexes[related_key] for related_key in getattr(relations, relation_name))
+        offsets.append(len(indexes))
+    return offsets, indexes
+
+
+def _add_to_columns(columns, block_index, fields):
+    """
+    Adds the given fields of a block to the given columns, a map of field
+    name to the indexes of the blocks having the field and their values.
+    """
+    for field_name, value in fields.items():
+        indexes, values = columns.setdefault(field_name, (array('l'), []))
+        indexes.append(block_index)
+        values.append(value)
+
+
+def _new_transformer_data(fields):
+    """
+    Returns a new TransformerData with the given fields dict.
+    """
+    transformer_data = TransformerData.__new__(TransformerData)
+    transformer_data.__dict__['fields'] = fields
+    return transformer_data
@@ -4,11 +4,15 @@ Module for the Storage of BlockStructure objects.
 # pylint: disable=protected-access
 
 
+from collections import OrderedDict
 from logging import getLogger
+from threading import Lock
 
 import six
 
+from django.conf import settings
 from django.utils.encoding import python_2_unicode_compatible
+from edx_django_utils.monitoring import set_custom_metric
 from openedx.core.lib.cache_utils import zpickle, zunpickle
 
 from . import config
@@ -16,6 +20,7 @@ from .block_structure import BlockStructureBlockData
 from .exceptions import BlockStructureNotFound
 from .factory import BlockStructureFactory
 from .models import BlockStructureModel
+from .serializer import deserialize_block_structure, is_compact, serialize_block_structure
 from .transformer_registry import TransformerRegistry
 
 logger = getLogger(__name__)  # pylint: disable=C0103
@@ -41,6 +46,91 @@ class StubModel(object):
         pass
 
 
+class CollectedBlockStructureCache(object):
+    """
+    Per-process LRU cache of deserialized collected block structures,
+    keyed by their versioned cache keys, and bounded by the total size
+    of their serialized data.
+
+    The cache owns the block structures it is given and hands out
+    shallow copies of them, so their field values must not be mutated
+    in place.
+    """
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._keys_by_root = {}
+        self._size = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, cache_key):
+        """
+        Returns a copy of the block structure cached for the given key,
+        or None if not found.
+        """
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+
+        set_custom_metric('block_structure_collected_cache_hit', entry is not None)
+        set_custom_metric('block_structure_collected_cache_hits', self.hits)
+        set_custom_metric('block_structure_collected_cache_misses', self.misses)
+        return entry[0].shallow_copy() if entry is not None else None
+
+    def set(self, cache_key, block_structure, size, max_size):
+        """
+        Caches the given block structure under the given key, replacing
+        any other version of it, and evicts the least recently used
+        block structures beyond max_size.
+        """
+        if size > max_size:
+            return
+
+        root_block_usage_key = block_structure.root_block_usage_key
+        with self._lock:
+            self._remove(self._keys_by_root.get(root_block_usage_key))
+            self._entries[cache_key] = (block_structure, size, root_block_usage_key)
+            self._keys_by_root[root_block_usage_key] = cache_key
+            self._size += size
+            while self._size > max_size:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, root_block_usage_key):
+        """
+        Removes any version of the block structure of the given root.
+        """
+        with self._lock:
+            self._remove(self._keys_by_root.get(root_block_usage_key))
+
+    def clear(self):
+        """
+        Removes all cached block structures.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_root.clear()
+            self._size = 0
+
+    def _remove(self, cache_key):
+        """
+        Removes the entry for the given key, if any. Must be called with
+        the lock held.
+        """
+        entry = self._entries.pop(cache_key, None)
+        if entry is not None:
+            _, size, root_block_usage_key = entry
+            self._size -= size
+            del self._keys_by_root[root_block_usage_key]
+
+
+collected_block_structure_cache = CollectedBlockStructureCache()
+
+
 class BlockStructureStore(object):
     """
     Storage for BlockStructure objects.
@@ -70,6 +160,8 @@ class BlockStructureStore(object):
 
         bs_model = self._update_or_create_model(block_structure, serialized_data)
         self._add_to_cache(serialized_data, bs_model)
+        if _is_collected_cache_enabled():
+            self._add_to_collected_cache(block_structure, serialized_data, bs_model)
 
     def get(self, root_block_usage_key):
         """
@@ -93,6 +185,11 @@ class BlockStructureStore(object):
             found.
         """
         bs_model = self._get_model(root_block_usage_key)
+        use_collected_cache = _is_collected_cache_enabled()
+        if use_collected_cache:
+            block_structure = collected_block_structure_cache.get(self._encode_root_cache_key(bs_model))
+            if block_structure is not None:
+                return block_structure
 
         try:
             serialized_data = self._get_from_cache(bs_model)
@@ -100,7 +197,10 @@ class BlockStructureStore(object):
             serialized_data = self._get_from_store(bs_model)
             self._add_to_cache(serialized_data, bs_model)
 
-        return self._deserialize(serialized_data, root_block_usage_key)
+        block_structure = self._deserialize(serialized_data, root_block_usage_key)
+        if use_collected_cache:
+            self._add_to_collected_cache(block_structure, serialized_data, bs_model)
+        return block_structure
 
     def delete(self, root_block_usage_key):
         """
@@ -113,6 +213,7 @@ class BlockStructureStore(object):
         """
         bs_model = self._get_model(root_block_usage_key)
         self._cache.delete(self._encode_root_cache_key(bs_model))
+        collected_block_structure_cache.delete(root_block_usage_key)
         bs_model.delete()
         logger.info(u"BlockStructure: Deleted from cache and store; %s.", bs_model)
 
@@ -165,6 +266,18 @@ class BlockStructureStore(object):
         self._cache.set(cache_key, serialized_data, timeout=config.cache_timeout_in_seconds())
         logger.info(u"BlockStructure: Added to cache; %s, size: %d", bs_model, len(serialized_data))
 
+    def _add_to_collected_cache(self, block_structure, serialized_data, bs_model):
+        """
+        Adds a copy of the given block_structure to the per-process cache
+        of collected block structures.
+        """
+        collected_block_structure_cache.set(
+            self._encode_root_cache_key(bs_model),
+            block_structure.shallow_copy(),
+            len(serialized_data),
+            settings.BLOCK_STRUCTURES_SETTINGS.get('COLLECTED_CACHE_MAX_SIZE', 0),
+        )
+
     def _get_from_cache(self, bs_model):
         """
         Returns the serialized data for the given BlockStructureModel
@@ -196,6 +309,9 @@ class BlockStructureStore(object):
         """
         Serializes the data for the given block_structure.
         """
+        if config.waffle().is_enabled(config.COMPACT_SERIALIZATION):
+            return serialize_block_structure(block_structure)
+
         data_to_cache = (
             block_structure._block_relations,
             block_structure.transformer_data,
@@ -206,9 +322,13 @@ class BlockStructureStore(object):
     def _deserialize(self, serialized_data, root_block_usage_key):
         """
         Deserializes the given data and returns the parsed block_structure.
+        Data in either the compact or the pickle format is accepted, so
+        that both can coexist in the cache and storage.
         """
 
         try:
+            if is_compact(serialized_data):
+                return deserialize_block_structure(serialized_data, root_block_usage_key)
             block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
         except Exception:
             # Somehow failed to de-serialized the data, assume it's corrupt.
@@ -262,6 +382,18 @@ class BlockStructureStore(object):
         }
 
 
+def _is_collected_cache_enabled():
+    """
+    Returns whether the per-process cache of collected block structures
+    is enabled.  It requires storage backing, whose cache keys include
+    the version of the stored data.
+    """
+    return (
+        settings.BLOCK_STRUCTURES_SETTINGS.get('COLLECTED_CACHE_MAX_SIZE', 0) > 0 and
+        _is_storage_backing_enabled()
+    )
+
+
 def _is_storage_backing_enabled():
     """
     Returns whether storage backing for Block Structures is enabled.
@@ -17,7 +17,7 @@ from six.moves import range
 from openedx.core.lib.graph_traversals import traverse_post_order
 
 from ..block_structure import BlockStructure, BlockStructureModulestoreData
-from ..exceptions import TransformerException
+from ..exceptions import BlockStructureException, TransformerException
 from .helpers import ChildrenMapTestMixin, MockTransformer, MockXBlock
 
 
@@ -268,6 +268,77 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
         block_structure.remove_block_traversal(lambda block: block == 2)
         self.assert_block_structure(block_structure, [[1], [], [], []], missing_blocks=[2])
 
+    @ddt.data(
+        *itertools.product(
+            [None, 0, 1, 3],
+            [
+                ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+                ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+                ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+            ],
+        )
+    )
+    @ddt.unpack
+    def test_indexed_traversals(self, unyielded_block, children_map):
+        block_structure = self.create_block_structure(children_map)
+        filter_func = None if unyielded_block is None else lambda block: block != unyielded_block
+
+        for kwargs in ({}, {'start_node': 1}, {'yield_descendants_of_unyielded': True}):
+            self.assertEqual(
+                list(block_structure.topological_traversal(filter_func=filter_func, use_index=True, **kwargs)),
+                list(block_structure.topological_traversal(filter_func=filter_func, **kwargs)),
+            )
+        for kwargs in ({}, {'start_node': 1}):
+            self.assertEqual(
+                list(block_structure.post_order_traversal(filter_func=filter_func, use_index=True, **kwargs)),
+                list(block_structure.post_order_traversal(filter_func=filter_func, **kwargs)),
+            )
+
+    @ddt.data(
+        *itertools.product(
+            [True, False],
+            [{1}, {2}, {3}, {1, 3}, {2, 3}],
+            [
+                ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+                ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+                ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+            ],
+        )
+    )
+    @ddt.unpack
+    def test_indexed_remove_block_traversal(self, keep_descendants, blocks_to_remove, children_map):
+        expected_structure = self.create_block_structure(children_map)
+        expected_structure.remove_block_traversal(lambda block: block in blocks_to_remove, keep_descendants)
+        expected_structure._prune_unreachable()
+
+        block_structure = self.create_block_structure(children_map)
+        block_structure.remove_block_traversal(
+            lambda block: block in blocks_to_remove, keep_descendants, use_index=True,
+        )
+        block_structure._prune_unreachable()
+
+        self.assertEqual(list(block_structure), list(expected_structure))
+        for block in expected_structure:
+            self.assertEqual(block_structure.get_parents(block), expected_structure.get_parents(block))
+            self.assertEqual(block_structure.get_children(block), expected_structure.get_children(block))
+
+    def test_indexed_traversal_with_changed_relations(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.LINEAR_CHILDREN_MAP)
+        with self.assertRaises(BlockStructureException):
+            for block in block_structure.topological_traversal(use_index=True):
+                block_structure._add_relation(block, 3)
+
+    def test_indexed_traversal_after_copy(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.LINEAR_CHILDREN_MAP)
+        self.assertEqual(list(block_structure.topological_traversal(use_index=True)), [0, 1, 2, 3])
+
+        new_copy = block_structure.copy()
+        self.assertIs(new_copy._block_index, block_structure._block_index)
+
+        new_copy.remove_block(2, keep_descendants=True)
+        self.assertEqual(list(new_copy.topological_traversal(use_index=True)), [0, 1, 3])
+        self.assertEqual(list(block_structure.topological_traversal(use_index=True)), [0, 1, 2, 3])
+
     def test_copy(self):
         def _set_value(structure, value):
             """
@@ -4,13 +4,15 @@ Tests for block_structure/cache.py
 
 
 import ddt
+from django.conf import settings
+from django.test.utils import override_settings
 
 from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 
-from ..config import STORAGE_BACKING_FOR_CACHE, waffle
+from ..config import COMPACT_SERIALIZATION, STORAGE_BACKING_FOR_CACHE, waffle
 from ..config.models import BlockStructureConfiguration
 from ..exceptions import BlockStructureNotFound
-from ..store import BlockStructureStore
+from ..store import BlockStructureStore, collected_block_structure_cache
 from .helpers import ChildrenMapTestMixin, MockCache, MockTransformer, UsageKeyFactoryMixin
 
 
@@ -30,6 +32,8 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
 
         self.mock_cache = MockCache()
         self.store = BlockStructureStore(self.mock_cache)
+        collected_block_structure_cache.clear()
+        self.addCleanup(collected_block_structure_cache.clear)
 
     def add_transformers(self):
         """
@@ -59,6 +63,26 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
             self.assertIsNotNone(stored_value)
             self.assert_block_structure(stored_value, self.children_map)
 
+    @ddt.data(True, False)
+    def test_add_and_get_compact(self, with_storage_backing):
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
+            with waffle().override(COMPACT_SERIALIZATION, active=True):
+                self.store.add(self.block_structure)
+            stored_value = self.store.get(self.block_structure.root_block_usage_key)
+            self.assert_block_structure(stored_value, self.children_map)
+            self.assertEqual(
+                stored_value.get_transformer_block_field(self.block_key_factory(0), MockTransformer, 'test'),
+                u'{} val'.format(MockTransformer.name()),
+            )
+
+    @ddt.data(True, False)
+    def test_get_pickled_with_compact_serialization(self, with_storage_backing):
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
+            self.store.add(self.block_structure)
+            with waffle().override(COMPACT_SERIALIZATION, active=True):
+                stored_value = self.store.get(self.block_structure.root_block_usage_key)
+            self.assert_block_structure(stored_value, self.children_map)
+
     @ddt.data(True, False)
     def test_delete(self, with_storage_backing):
         with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
@@ -90,3 +114,36 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
         assert self.mock_cache.timeout_from_last_call == 0
         self.store.add(self.block_structure)
         assert self.mock_cache.timeout_from_last_call == timeout
+
+    @ddt.data(True, False)
+    def test_collected_cache(self, with_storage_backing):
+        collected_cache_settings = dict(settings.BLOCK_STRUCTURES_SETTINGS, COLLECTED_CACHE_MAX_SIZE=10 ** 6)
+        with override_settings(BLOCK_STRUCTURES_SETTINGS=collected_cache_settings):
+            with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
+                self.store.add(self.block_structure)
+                self.mock_cache.map.clear()
+                hits = collected_block_structure_cache.hits
+                if with_storage_backing:
+                    stored_value = self.store.get(self.block_structure.root_block_usage_key)
+                    self.assertEqual(collected_block_structure_cache.hits, hits + 1)
+                    self.assert_block_structure(stored_value, self.children_map)
+
+                    # each caller gets its own copy of the structure
+                    stored_value.remove_block(self.block_key_factory(1), keep_descendants=False)
+                    self.assert_block_structure(
+                        self.store.get(self.block_structure.root_block_usage_key), self.children_map
+                    )
+                else:
+                    # the cache is not used without versioned keys
+                    with self.assertRaises(BlockStructureNotFound):
+                        self.store.get(self.block_structure.root_block_usage_key)
+
+    def test_collected_cache_eviction(self):
+        collected_cache_settings = dict(settings.BLOCK_STRUCTURES_SETTINGS, COLLECTED_CACHE_MAX_SIZE=1)
+        with override_settings(BLOCK_STRUCTURES_SETTINGS=collected_cache_settings):
+            with waffle().override(STORAGE_BACKING_FOR_CACHE, active=True):
+                self.store.add(self.block_structure)
+                misses = collected_block_structure_cache.misses
+                stored_value = self.store.get(self.block_structure.root_block_usage_key)
+                self.assertEqual(collected_block_structure_cache.misses, misses + 1)
+                self.assert_block_structure(stored_value, self.children_map)
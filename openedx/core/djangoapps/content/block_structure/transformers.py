@@ -5,6 +5,9 @@ Module for a collection of BlockStructureTransformers.
 
 import functools
 from logging import getLogger
+from time import time
+
+from edx_django_utils.cache import RequestCache
 
 from .exceptions import TransformerDataIncompatible, TransformerException
 from .transformer import FilteringTransformerMixin
@@ -12,6 +15,10 @@ from .transformer_registry import TransformerRegistry
 
 logger = getLogger(__name__)  # pylint: disable=C0103
 
+# Namespace of the request cache where the durations, in seconds, of the
+# last collection are kept, keyed by transformer name.
+COLLECT_DURATIONS_NAMESPACE = u'block_structure.transformers.collect_durations'
+
 
 class BlockStructureTransformers(object):
     """
@@ -75,13 +82,22 @@ class BlockStructureTransformers(object):
     def collect(cls, block_structure):
         """
         Collects data for each registered transformer.
+
+        The duration of each transformer's collection is kept in the
+        COLLECT_DURATIONS_NAMESPACE request cache.
         """
+        durations = RequestCache(COLLECT_DURATIONS_NAMESPACE).data
+        durations.clear()
         for transformer in TransformerRegistry.get_registered_transformers():
+            start_time = time()
             block_structure._add_transformer(transformer)  # pylint: disable=protected-access
             transformer.collect(block_structure)
+            durations[transformer.name()] = time() - start_time
 
         # Collect all fields that were requested by the transformers.
+        start_time = time()
         block_structure._collect_requested_xblock_fields()  # pylint: disable=protected-access
+        durations[u'xblock_fields'] = time() - start_time
 
     @classmethod
     def verify_versions(cls, block_structure):
@@ -106,20 +122,24 @@ class BlockStructureTransformers(object):
             )
         return True
 
-    def transform(self, block_structure):
+    def transform(self, block_structure, use_index=False):
         """
         The given block structure is transformed by each transformer in the
         collection. Tranformers with filters are combined and run first in a
         single course tree traversal, then remaining transformers are run in
         the order that they were added.
+
+        If use_index is True, the traversal of the combined filters uses
+        the integer index of the block relations.  See
+        BlockStructureBlockData.filter_topological_traversal.
         """
-        self._transform_with_filters(block_structure)
+        self._transform_with_filters(block_structure, use_index)
         self._transform_without_filters(block_structure)
 
         # Prune the block structure to remove any unreachable blocks.
         block_structure._prune_unreachable()  # pylint: disable=protected-access
 
-    def _transform_with_filters(self, block_structure):
+    def _transform_with_filters(self, block_structure, use_index=False):
         """
         Transforms the given block_structure using the transform_block_filters
         method from the given transformers.
@@ -136,7 +156,7 @@ class BlockStructureTransformers(object):
             filters,
             block_structure.create_universal_filter()
         )
-        block_structure.filter_topological_traversal(combined_filters)
+        block_structure.filter_topological_traversal(combined_filters, use_index=use_index)
 
     def _filter_chain(self, accumulated, additional):
         """
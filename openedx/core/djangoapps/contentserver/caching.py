@@ -1,15 +1,30 @@
 """
 Helper functions for caching course assets.
+
+Small assets are cached in the course_assets cache.  Larger assets may also
+be cached on the local disk of each node, see get_disk_cached_content.
 """
 
 
-import six
+import errno
+import hashlib
+import logging
+import mmap
+import os
+import time
+from threading import Thread
 
+import six
+from django.conf import settings
 from django.core.cache import caches
 from django.core.cache.backends.base import InvalidCacheBackendError
+from edx_django_utils.monitoring import set_custom_metric
 from opaque_keys import InvalidKeyError
 
-from xmodule.contentstore.content import STATIC_CONTENT_VERSION
+from xmodule.assetstore.assetmgr import AssetManager
+from xmodule.contentstore.content import STATIC_CONTENT_VERSION, StaticContentStream
+
+log = logging.getLogger(__name__)
 
 # See if there's a "course_assets" cache configured, and if not, fallback to the default cache.
 CONTENT_CACHE = caches['default']
@@ -52,3 +67,217 @@ def del_cached_content(location):
         pass
 
     CONTENT_CACHE.delete_many(locations, version=STATIC_CONTENT_VERSION)
+
+
+# Prefix of the files of the disk cache being written.
+_DISK_CACHE_TEMP_PREFIX = 'tmp-'
+
+# Number of seconds after which a file being written, which the writer did not write to meanwhile, is
+# considered abandoned by a process that died while writing it.
+_DISK_CACHE_ABANDONED_WRITE_SECONDS = 10 * 60
+
+# Number of bytes read from the contentstore at a time when writing an asset to the disk cache.
+_DISK_CACHE_WRITE_CHUNK_SIZE = 255 * 1024
+
+
+class DiskCachedContent(StaticContentStream):
+    """
+    Course asset whose data is read from the local disk cache, through a memory map
+    of its cached file.
+    """
+    def __init__(self, cached_file, content):
+        super(DiskCachedContent, self).__init__(
+            content.location, content.name, content.content_type,
+            mmap.mmap(cached_file.fileno(), 0, access=mmap.ACCESS_READ),
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked,
+            content_digest=content.content_digest,
+        )
+        self._file = cached_file
+
+    def detach_file(self):
+        """
+        Returns the cached file, which the caller is then responsible for closing, so that
+        it can be sent with sendfile, and releases the memory map.
+        """
+        self._stream.close()
+        cached_file, self._file = self._file, None
+        return cached_file
+
+    def close(self):
+        super(DiskCachedContent, self).close()
+        if self._file is not None:
+            self._file.close()
+
+
+def get_disk_cached_content(content):
+    """
+    Returns the given asset, as found in the contentstore, with its data read from the
+    local disk cache.
+
+    Cached files are keyed by the asset key and the content digest, so that the data of a
+    changed asset is never served from the cache, and are evicted in least recently used
+    order when the cache exceeds COURSE_ASSETS_DISK_CACHE['MAX_SIZE'].
+
+    Returns None if the asset is not to be cached on disk, or if it is not cached yet, in
+    which case it is written to the cache in the background while the caller serves it
+    from the contentstore.
+    """
+    disk_cache_settings = settings.COURSE_ASSETS_DISK_CACHE
+    directory = disk_cache_settings['DIRECTORY']
+    if not directory or not content.content_digest:
+        return None
+    if not content.length or content.length > disk_cache_settings['MAX_ASSET_SIZE']:
+        return None
+
+    path = os.path.join(directory, _get_disk_cache_filename(content.location, content.content_digest))
+    try:
+        cached_file = open(path, 'rb')
+    except (IOError, OSError):
+        cached_file = None
+    set_custom_metric('contentserver.disk_cache_hit', cached_file is not None)
+
+    if cached_file is None:
+        _start_disk_cache_write(directory, path, content, disk_cache_settings['MAX_SIZE'])
+        return None
+
+    # Record the use of the cached file, for the least recently used eviction.
+    try:
+        os.utime(path, None)
+    except OSError:
+        # Evicted by another process since it was opened.
+        pass
+
+    content.close()
+    return DiskCachedContent(cached_file, content)
+
+
+def _get_disk_cache_filename(location, content_digest):
+    """
+    Returns the name of the cached file of the given asset data.
+    """
+    return u'{}-{}'.format(_get_disk_cache_location_prefix(location), content_digest)
+
+
+def _get_disk_cache_location_prefix(location):
+    """
+    Returns the prefix of the names of the cached files of the given asset.
+    """
+    return hashlib.sha1(six.text_type(location).encode('utf-8')).hexdigest()
+
+
+def _start_disk_cache_write(directory, path, content, max_size):
+    """
+    Starts writing the data of the given content to the given cached file in a background
+    thread, unless another thread or process already does.
+
+    The data is written to a temporary file named after the cached file, which is created
+    exclusively so that it also serves as the lock of the cached file, and which is renamed
+    once complete so that other processes never read a partially written file.
+    """
+    temp_path = os.path.join(directory, _DISK_CACHE_TEMP_PREFIX + os.path.basename(path))
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+    except OSError as error:
+        if error.errno != errno.EEXIST:
+            log.exception(u'Failed to create the disk cache directory %s', directory)
+            return
+    try:
+        temp_fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except OSError as error:
+        if error.errno != errno.EEXIST:
+            log.exception(u'Failed to cache %s on disk', content.location)
+        elif _is_abandoned_write(temp_path):
+            # Let the next request write it again.
+            _remove_cached_file(temp_path)
+        return
+
+    thread = Thread(
+        target=_write_to_disk_cache,
+        args=(directory, path, temp_fd, temp_path, content.location, content.content_digest, max_size),
+    )
+    thread.daemon = True
+    thread.start()
+
+
+def _is_abandoned_write(temp_path):
+    """
+    Returns whether the given file being written was not written to for too long.
+    """
+    try:
+        return os.stat(temp_path).st_mtime < time.time() - _DISK_CACHE_ABANDONED_WRITE_SECONDS
+    except OSError:
+        # Completed or removed since.
+        return False
+
+
+def _write_to_disk_cache(directory, path, temp_fd, temp_path, location, content_digest, max_size):
+    """
+    Writes the data of the given asset, read from the contentstore, to the given temporary
+    file, renames it to the given cached file, and removes the cached files of other
+    versions of the asset and the least recently used cached files.
+
+    Runs in a background thread, reading the asset with its own stream rather than with
+    the one of the request being served.
+    """
+    try:
+        with os.fdopen(temp_fd, 'wb') as temp_file:
+            content = AssetManager.find(location, as_stream=True)
+            try:
+                if content.content_digest != content_digest:
+                    raise IOError(u'Changed since requested')
+                for chunk in content.stream_data_in_range(0, content.length - 1, _DISK_CACHE_WRITE_CHUNK_SIZE):
+                    temp_file.write(chunk)
+                if temp_file.tell() != content.length:
+                    raise IOError(u'Read {} bytes of {}'.format(temp_file.tell(), content.length))
+            finally:
+                content.close()
+        os.rename(temp_path, path)
+    except Exception:  # pylint: disable=broad-except
+        log.exception(u'Failed to cache %s on disk', location)
+        _remove_cached_file(temp_path)
+        return
+
+    location_prefix = _get_disk_cache_location_prefix(location)
+    for entry in os.listdir(directory):
+        if entry.startswith(location_prefix) and os.path.join(directory, entry) != path:
+            _remove_cached_file(os.path.join(directory, entry))
+    _evict_from_disk_cache(directory, max_size)
+
+
+def _evict_from_disk_cache(directory, max_size):
+    """
+    Removes the least recently used cached files until the total size of the disk cache
+    does not exceed the given size.
+    """
+    cached_files = []
+    total_size = 0
+    for entry in os.listdir(directory):
+        if entry.startswith(_DISK_CACHE_TEMP_PREFIX):
+            continue
+        path = os.path.join(directory, entry)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # Already evicted by another process.
+            continue
+        cached_files.append((stat.st_mtime, stat.st_size, path))
+        total_size += stat.st_size
+
+    for __, size, path in sorted(cached_files):
+        if total_size <= max_size:
+            break
+        _remove_cached_file(path)
+        total_size -= size
+
+
+def _remove_cached_file(path):
+    """
+    Removes the given cached file, unless another process already did.  Processes which
+    already opened it keep reading it.
+    """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
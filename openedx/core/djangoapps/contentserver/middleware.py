@@ -5,17 +5,21 @@ Middleware to serve assets.
 
 import datetime
 import logging
+import uuid
 
 import six
 from django.http import (
+    FileResponse,
     HttpResponse,
     HttpResponseBadRequest,
     HttpResponseForbidden,
     HttpResponseNotFound,
     HttpResponseNotModified,
-    HttpResponsePermanentRedirect
+    HttpResponsePermanentRedirect,
+    StreamingHttpResponse
 )
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.http import parse_etags, parse_http_date_safe, quote_etag
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
 from six import text_type
@@ -23,12 +27,12 @@ from six import text_type
 from openedx.core.djangoapps.header_control import force_header_for_response
 from student.models import CourseEnrollment
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import XASSET_LOCATION_TAG, StaticContent
+from xmodule.contentstore.content import XASSET_LOCATION_TAG, StaticContent, StaticContentStream
 from xmodule.exceptions import NotFoundError
 from xmodule.modulestore import InvalidLocationError
 from xmodule.modulestore.exceptions import ItemNotFoundError
 
-from .caching import get_cached_content, set_cached_content
+from .caching import DiskCachedContent, get_cached_content, get_disk_cached_content, set_cached_content
 from .models import CdnUserAgentsConfig, CourseAssetCacheTtlConfig
 
 log = logging.getLogger(__name__)
@@ -43,6 +47,18 @@ except ImportError:
 
 HTTP_DATE_FORMAT = u"%a, %d %b %Y %H:%M:%S GMT"
 
+# Number of bytes read from the contentstore at a time when streaming an asset, the GridFS chunk size.
+STREAM_CHUNK_SIZE = 255 * 1024
+
+# Maximum length, in bytes, of the assets cached in the course_assets cache.  We cap this at 1MB
+# because it's the default for memcached and also we don't want to do too much buffering in memory
+# when we're serving an actual request.
+MAX_CACHED_CONTENT_LENGTH = 1048576
+
+# Maximum number of ranges served in a multipart/byteranges response. Requests for more ranges are
+# served the full content, rather than letting clients make us read overlapping ranges over and over.
+MAX_BYTE_RANGES = 20
+
 
 class StaticContentServer(MiddlewareMixin):
     """
@@ -92,6 +108,7 @@ class StaticContentServer(MiddlewareMixin):
             # them to the actual version.
             if requested_digest is not None and actual_digest is not None and (actual_digest != requested_digest):
                 actual_asset_path = StaticContent.add_version_to_asset_path(asset_path, actual_digest)
+                content.close()
                 return HttpResponsePermanentRedirect(actual_asset_path)
 
             # Set the basics for this request. Make sure that the course key for this
@@ -116,28 +133,30 @@ class StaticContentServer(MiddlewareMixin):
 
             # Check that user has access to the content.
             if not self.is_user_authorized(request, content, loc):
+                content.close()
                 return HttpResponseForbidden('Unauthorized')
 
             # Figure out if the client sent us a conditional request, and let them know
-            # if this asset has changed since then.
-            last_modified_at_str = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
-                if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
-                if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
+            # if this asset has changed since then. The data of the asset isn't read yet.
+            if self.is_not_modified(request, content):
+                content.close()
+                response = HttpResponseNotModified()
+                self.set_caching_headers(content, response)
+                return response
+
+            # Assets too large for the cache may be read from the local disk cache instead.
+            if isinstance(content, StaticContentStream):
+                content = get_disk_cached_content(content) or content
 
             # *** File streaming within a byte range ***
             # If a Range is provided, parse Range attribute of the request
             # Add Content-Range in the response if Range is structurally correct
-            # Request -> Range attribute structure: "Range: bytes=first-[last]"
+            # Request -> Range attribute structure: "Range: bytes=first-[last][, first-[last]]*"
             # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
             response = None
+            content_type = content.content_type
             if request.META.get('HTTP_RANGE'):
-                # If we have a StaticContent, get a StaticContentStream.  Can't manipulate the bytes otherwise.
-                if isinstance(content, StaticContent):
-                    content = AssetManager.find(loc, as_stream=True)
-
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -148,40 +167,67 @@ class StaticContentServer(MiddlewareMixin):
                         text_type(exception), header_value, six.text_type(loc)
                     )
                 else:
+                    # Unsatisfiable ranges are ignored, as long as any range is satisfiable.
+                    satisfiable_ranges = [
+                        (first, last) for first, last in ranges if 0 <= first <= last < content.length
+                    ]
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, text_type(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
+                    elif not satisfiable_ranges:
+                        log.warning(
+                            u"Cannot satisfy ranges in Range header: %s for content: %s",
+                            header_value, text_type(loc)
+                        )
+                        content.close()
+                        return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                    elif len(satisfiable_ranges) > MAX_BYTE_RANGES:
                         log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, text_type(loc)
+                            u"More than %d ranges in Range header: %s for content: %s",
+                            MAX_BYTE_RANGES, header_value, text_type(loc)
                         )
+                    elif len(satisfiable_ranges) == 1:
+                        first, last = satisfiable_ranges[0]
+                        response = StreamingHttpResponse(
+                            _stream_and_close(content, content.stream_data_in_range(first, last, STREAM_CHUNK_SIZE))
+                        )
+                        response['Content-Range'] = u'bytes {first}-{last}/{length}'.format(
+                            first=first, last=last, length=content.length
+                        )
+                        response['Content-Length'] = str(last - first + 1)
+                        response.status_code = 206  # Partial Content
                     else:
-                        first, last = ranges[0]
-
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
-                            response['Content-Range'] = u'bytes {first}-{last}/{length}'.format(
-                                first=first, last=last, length=content.length
-                            )
-                            response['Content-Length'] = str(last - first + 1)
-                            response.status_code = 206  # Partial Content
-
-                            if newrelic:
-                                newrelic.agent.add_custom_parameter('contentserver.ranged', True)
-                        else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s",
-                                header_value, text_type(loc)
-                            )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
+                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
+                        boundary = uuid.uuid4().hex
+                        parts = [
+                            (_byterange_part_header(boundary, content, first, last), first, last)
+                            for first, last in satisfiable_ranges
+                        ]
+                        closing_delimiter = u'\r\n--{}--\r\n'.format(boundary).encode('ascii')
+                        response = StreamingHttpResponse(
+                            _stream_and_close(content, _stream_byteranges(content, parts, closing_delimiter))
+                        )
+                        content_type = u'multipart/byteranges; boundary={}'.format(boundary)
+                        response['Content-Length'] = str(
+                            sum(len(part_header) + last - first + 1 for part_header, first, last in parts) +
+                            len(closing_delimiter)
+                        )
+                        response.status_code = 206  # Partial Content
+
+                    if newrelic and response is not None:
+                        newrelic.agent.add_custom_parameter('contentserver.ranged', True)
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                if isinstance(content, DiskCachedContent):
+                    # Let the server send the cached file with sendfile, if it supports it.
+                    response = FileResponse(content.detach_file())
+                    del response['Content-Disposition']
+                else:
+                    response = StreamingHttpResponse(
+                        _stream_and_close(content, content.stream_data(STREAM_CHUNK_SIZE))
+                    )
                 response['Content-Length'] = content.length
 
             if newrelic:
@@ -190,7 +236,7 @@ class StaticContentServer(MiddlewareMixin):
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
+            response['Content-Type'] = content_type
             response['X-Frame-Options'] = 'ALLOW'
 
             # Set any caching headers, and do any response cleanup needed.  Based on how much
@@ -227,12 +273,39 @@ class StaticContentServer(MiddlewareMixin):
             response['Cache-Control'] = "private, no-cache, no-store"
 
         response['Last-Modified'] = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
+        content_digest = getattr(content, "content_digest", None)
+        if content_digest:
+            response['ETag'] = quote_etag(content_digest)
 
         # Force the Vary header to only vary responses on Origin, so that XHR and browser requests get cached
         # separately and don't screw over one another. i.e. a browser request that doesn't send Origin, and
         # caches a version of the response without CORS headers, in turn breaking XHR requests.
         force_header_for_response(response, 'Vary', 'Origin')
 
+    @staticmethod
+    def is_not_modified(request, content):
+        """
+        Returns whether the conditional headers of the given request match the given content,
+        i.e. whether the client's copy of the asset is still valid.
+
+        As per RFC 7232, If-Modified-Since is ignored when If-None-Match is given.
+        """
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            content_digest = getattr(content, "content_digest", None)
+            etags = parse_etags(if_none_match)
+            return '*' in etags or (content_digest is not None and quote_etag(content_digest) in etags)
+
+        if_modified_since = request.META.get('HTTP_IF_MODIFIED_SINCE')
+        if if_modified_since:
+            if if_modified_since == content.last_modified_at.strftime(HTTP_DATE_FORMAT):
+                return True
+            if_modified_since = parse_http_date_safe(if_modified_since)
+            if if_modified_since is not None:
+                last_modified_at = content.last_modified_at.replace(microsecond=0, tzinfo=None)
+                return last_modified_at <= datetime.datetime.utcfromtimestamp(if_modified_since)
+        return False
+
     @staticmethod
     def is_cdn_request(request):
         """
@@ -295,16 +368,54 @@ class StaticContentServer(MiddlewareMixin):
             except (ItemNotFoundError, NotFoundError):
                 raise
 
-            # Now that we fetched it, let's go ahead and try to cache it. We cap this at 1MB
-            # because it's the default for memcached and also we don't want to do too much
-            # buffering in memory when we're serving an actual request.
-            if content.length is not None and content.length < 1048576:
+            # Now that we fetched it, let's go ahead and try to cache it.
+            if content.length is not None and content.length < MAX_CACHED_CONTENT_LENGTH:
                 content = content.copy_to_in_mem()
                 set_cached_content(content)
 
         return content
 
 
+def _stream_and_close(content, chunks):
+    """
+    Yields the given chunks of data of the given content, and closes the content once they are
+    all sent or the response is closed.
+    """
+    try:
+        for chunk in chunks:
+            yield chunk
+    finally:
+        content.close()
+
+
+def _byterange_part_header(boundary, content, first, last):
+    """
+    Returns the delimiter and headers of the part of a multipart/byteranges response holding
+    the given range of the given content.
+    """
+    return (
+        u'\r\n--{boundary}\r\n'
+        u'Content-Type: {content_type}\r\n'
+        u'Content-Range: bytes {first}-{last}/{length}\r\n'
+        u'\r\n'
+    ).format(
+        boundary=boundary, content_type=content.content_type or 'application/octet-stream',
+        first=first, last=last, length=content.length,
+    ).encode('utf-8')
+
+
+def _stream_byteranges(content, parts, closing_delimiter):
+    """
+    Yields the body of a multipart/byteranges response holding the given parts of the given
+    content, each one a tuple of its header and the first and last bytes of its range.
+    """
+    for part_header, first, last in parts:
+        yield part_header
+        for chunk in content.stream_data_in_range(first, last, STREAM_CHUNK_SIZE):
+            yield chunk
+    yield closing_delimiter
+
+
 def parse_range_header(header_value, content_length):
     """
     Returns the unit and a list of (start, end) tuples of ranges.
@@ -7,9 +7,13 @@ import copy
 
 import datetime
 import ddt
+import hashlib
 import logging
+import os
+import shutil
 import six
 import unittest
+from tempfile import mkdtemp
 from uuid import uuid4
 
 from django.conf import settings
@@ -19,17 +23,20 @@ from django.test.utils import override_settings
 from mock import patch
 
 from xmodule.contentstore.django import contentstore
-from xmodule.contentstore.content import StaticContent, VERSIONED_ASSETS_PREFIX
+from xmodule.contentstore.content import StaticContent, StaticContentStream, VERSIONED_ASSETS_PREFIX
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.xml_importer import import_course_from_xml
 from xmodule.assetstore.assetmgr import AssetManager
 from opaque_keys import InvalidKeyError
+from opaque_keys.edx.locator import CourseLocator
 from xmodule.modulestore.exceptions import ItemNotFoundError
 
 from student.models import CourseEnrollment
 from student.tests.factories import UserFactory, AdminFactory
 
+from .. import caching
+from ..caching import get_disk_cached_content
 from ..middleware import parse_range_header, HTTP_DATE_FORMAT, StaticContentServer
 
 log = logging.getLogger(__name__)
@@ -240,17 +247,74 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart/byteranges message with each range.
         """
-        first_byte = self.length_unlocked / 4
-        last_byte = self.length_unlocked / 2
+        first_byte = self.length_unlocked // 4
+        last_byte = self.length_unlocked // 2
         # pylint: disable=unicode-format-string
-        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={first}-{last}, -100'.format(
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={first}-{last}, -10'.format(
             first=first_byte, last=last_byte))
 
-        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
         self.assertNotIn('Content-Range', resp)
-        self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+        content_type, boundary = resp['Content-Type'].split('; boundary=')
+        self.assertEqual(content_type, 'multipart/byteranges')
+
+        body = b''.join(resp.streaming_content)
+        self.assertEqual(resp['Content-Length'], str(len(body)))
+        data = self.contentstore.find(self.unlocked_asset).data
+        parts = body.split(u'\r\n--{}'.format(boundary).encode('ascii'))
+        self.assertEqual(parts[0], b'')
+        self.assertEqual(parts[-1], b'--\r\n')
+        for part, (first, last) in zip(parts[1:-1], [(first_byte, last_byte), (self.length_unlocked - 10, None)]):
+            headers, part_data = part.split(b'\r\n\r\n', 1)
+            last = self.length_unlocked - 1 if last is None else last
+            content_range = u'Content-Range: bytes {}-{}/{}'.format(first, last, self.length_unlocked)
+            self.assertIn(content_range.encode('ascii'), headers)
+            self.assertEqual(part_data, data[first:last + 1])
+
+    def test_range_request_multiple_ranges_unsatisfiable(self):
+        """
+        Test that unsatisfiable ranges are ignored when some range of the request is satisfiable.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-9, {first}-'.format(
+            first=self.length_unlocked))
+
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
+        self.assertEqual(resp['Content-Range'], u'bytes 0-9/{length}'.format(length=self.length_unlocked))
+        self.assertEqual(b''.join(resp.streaming_content), self.contentstore.find(self.unlocked_asset).data[:10])
+
+    def test_if_none_match(self):
+        """
+        Test that a request with the ETag of the asset outputs 304 Not Modified.
+        """
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+        etag = resp['ETag']
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], etag)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"{}"'.format(FAKE_MD5_HASH))
+        self.assertEqual(resp.status_code, 200)
+
+    def test_if_modified_since(self):
+        """
+        Test that a request for an asset not modified since the given date outputs 304 Not Modified.
+        """
+        resp = self.client.get(self.url_unlocked)
+        last_modified = datetime.datetime.strptime(resp['Last-Modified'], HTTP_DATE_FORMAT)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_MODIFIED_SINCE=(
+            last_modified + datetime.timedelta(days=1)
+        ).strftime(HTTP_DATE_FORMAT))
+        self.assertEqual(resp.status_code, 304)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_MODIFIED_SINCE=(
+            last_modified - datetime.timedelta(days=1)
+        ).strftime(HTTP_DATE_FORMAT))
+        self.assertEqual(resp.status_code, 200)
 
     @ddt.data(
         'bytes 0-',
@@ -284,6 +348,28 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
             first=(self.length_unlocked), last=(self.length_unlocked)))
         self.assertEqual(resp.status_code, 416)
 
+    @patch('openedx.core.djangoapps.contentserver.middleware.MAX_CACHED_CONTENT_LENGTH', 0)
+    def test_disk_cache(self):
+        """
+        Test that assets too large for the cache are served from the disk cache.
+        """
+        directory = mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        data = self.contentstore.find(self.unlocked_asset).data
+        disk_cache_settings = dict(DIRECTORY=directory, MAX_SIZE=10 * len(data), MAX_ASSET_SIZE=len(data))
+        with override_settings(COURSE_ASSETS_DISK_CACHE=disk_cache_settings):
+            with patch.object(caching, 'Thread', InlineThread):
+                resp = self.client.get(self.url_unlocked)
+            self.assertEqual(b''.join(resp.streaming_content), data)
+            self.assertEqual(len(os.listdir(directory)), 1)
+
+            with patch('xmodule.contentstore.content.StaticContentStream.stream_data') as mock_stream_data:
+                resp = self.client.get(self.url_unlocked)
+                self.assertEqual(b''.join(resp.streaming_content), data)
+                resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=1-4')
+                self.assertEqual(b''.join(resp.streaming_content), data[1:5])
+            mock_stream_data.assert_not_called()
+
     def test_vary_header_sent(self):
         """
         Tests that we're properly setting the Vary header to ensure browser requests don't get
@@ -446,3 +532,132 @@ class ParseRangeHeaderTestCase(unittest.TestCase):
         self.assertRaisesRegex(
             exception_class, exception_message_regex, parse_range_header, header_value, self.content_length
         )
+
+
+class InlineThread(object):
+    """
+    Thread which runs its target when started, in the calling thread.
+    """
+    def __init__(self, target, args):
+        self.target = target
+        self.args = args
+        self.daemon = False
+
+    def start(self):
+        self.target(*self.args)
+
+
+class DiskCacheTestCase(unittest.TestCase):
+    """
+    Tests for the local disk cache of course assets.
+    """
+    def setUp(self):
+        super(DiskCacheTestCase, self).setUp()
+        self.directory = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.course_key = CourseLocator('edX', 'toy', '2012_Fall')
+        patcher = patch.object(caching, 'Thread', InlineThread)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_content(self, name, data):
+        """
+        Returns the given asset data as streamed from the contentstore.
+        """
+        return StaticContentStream(
+            self.course_key.make_asset_key('asset', name), name, 'text/plain', six.BytesIO(data),
+            length=len(data), content_digest=hashlib.md5(data).hexdigest(),
+        )
+
+    def override_disk_cache_settings(self, **disk_cache_settings):
+        """
+        Returns the settings override of the disk cache for the tests.
+        """
+        disk_cache_settings = dict(
+            dict(DIRECTORY=self.directory, MAX_SIZE=100, MAX_ASSET_SIZE=10), **disk_cache_settings
+        )
+        return override_settings(COURSE_ASSETS_DISK_CACHE=disk_cache_settings)
+
+    def get_disk_cached_content(self, name, data, **disk_cache_settings):
+        """
+        Returns the given asset data as read from the disk cache, after writing it to the cache
+        if it is a miss.
+        """
+        with self.override_disk_cache_settings(**disk_cache_settings):
+            with patch.object(caching.AssetManager, 'find', return_value=self.make_content(name, data)):
+                return (
+                    get_disk_cached_content(self.make_content(name, data)) or
+                    get_disk_cached_content(self.make_content(name, data))
+                )
+
+    def test_miss_written_in_background(self):
+        content = self.make_content('asset.txt', b'0123456789')
+        with self.override_disk_cache_settings(), patch.object(caching, 'Thread') as mock_thread:
+            self.assertIsNone(get_disk_cached_content(content))
+            # A concurrent miss finds the file being written, and leaves it to the first writer.
+            self.assertIsNone(get_disk_cached_content(self.make_content('asset.txt', b'0123456789')))
+        self.assertEqual(mock_thread.call_count, 1)
+        mock_thread.return_value.start.assert_called_once_with()
+        os.close(mock_thread.call_args[1]['args'][2])
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+        # The request keeps reading its own stream from the contentstore.
+        self.assertEqual(b''.join(content.stream_data()), b'0123456789')
+
+    def test_abandoned_write(self):
+        with self.override_disk_cache_settings(), patch.object(caching, 'Thread') as mock_thread:
+            get_disk_cached_content(self.make_content('asset.txt', b'0123456789'))
+            os.close(mock_thread.call_args[1]['args'][2])
+            temp_path = os.path.join(self.directory, os.listdir(self.directory)[0])
+            abandoned_seconds = caching._DISK_CACHE_ABANDONED_WRITE_SECONDS + 1  # pylint: disable=protected-access
+            abandoned_time = os.stat(temp_path).st_mtime - abandoned_seconds
+            os.utime(temp_path, (abandoned_time, abandoned_time))
+
+            self.assertIsNone(get_disk_cached_content(self.make_content('asset.txt', b'0123456789')))
+        self.assertEqual(os.listdir(self.directory), [])
+
+        disk_cached_content = self.get_disk_cached_content('asset.txt', b'0123456789')
+        self.assertEqual(b''.join(disk_cached_content.stream_data()), b'0123456789')
+        disk_cached_content.close()
+
+    def test_changed_while_written(self):
+        changed_content = self.make_content('asset.txt', b'9876543210')
+        with self.override_disk_cache_settings():
+            with patch.object(caching.AssetManager, 'find', return_value=changed_content):
+                self.assertIsNone(get_disk_cached_content(self.make_content('asset.txt', b'0123456789')))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_cached(self):
+        disk_cached_content = self.get_disk_cached_content('asset.txt', b'0123456789')
+        self.assertEqual(b''.join(disk_cached_content.stream_data()), b'0123456789')
+        self.assertEqual(b''.join(disk_cached_content.stream_data_in_range(2, 4)), b'234')
+        disk_cached_content.close()
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+    def test_not_cached(self):
+        self.assertIsNone(self.get_disk_cached_content('asset.txt', b'0123456789', DIRECTORY=None))
+        self.assertIsNone(self.get_disk_cached_content('asset.txt', b'0123456789', MAX_ASSET_SIZE=9))
+        self.assertIsNone(self.get_disk_cached_content('asset.txt', b''))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_replaces_changed_asset(self):
+        self.get_disk_cached_content('asset.txt', b'0123456789').close()
+        disk_cached_content = self.get_disk_cached_content('asset.txt', b'9876543210')
+        self.assertEqual(b''.join(disk_cached_content.stream_data()), b'9876543210')
+        disk_cached_content.close()
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+    def test_evicts_least_recently_used(self):
+        for index in range(3):
+            self.get_disk_cached_content('asset{}.txt'.format(index), b'0123456789').close()
+            # Make the modification times of the cached files distinct.
+            for entry in os.listdir(self.directory):
+                path = os.path.join(self.directory, entry)
+                os.utime(path, (os.stat(path).st_mtime - 10, os.stat(path).st_mtime - 10))
+        self.get_disk_cached_content('asset0.txt', b'0123456789').close()
+
+        self.get_disk_cached_content('asset3.txt', b'0123456789', MAX_SIZE=30).close()
+        with patch('openedx.core.djangoapps.contentserver.caching._write_to_disk_cache') as mock_write:
+            for index in (0, 2, 3):
+                self.get_disk_cached_content('asset{}.txt'.format(index), b'0123456789').close()
+        mock_write.assert_not_called()
+        self.assertEqual(len(os.listdir(self.directory)), 3)
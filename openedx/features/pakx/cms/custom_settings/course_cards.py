@@ -0,0 +1,74 @@
+"""
+Versioned cache of rendered course cards, shared by LMS and CMS so that course updates in either invalidate it
+"""
+from time import time
+
+from django.core.cache import cache
+from django.utils.translation import get_language
+from six import text_type
+
+COURSE_CARD_VERSION_CACHE_KEY = 'pakx.course_card.version.{course_id}'
+COURSE_CARD_CACHE_KEY = 'pakx.course_card.{card_type}.{course_id}.{language}.{version}'
+COURSE_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _get_course_card_versions(course_ids):
+    """
+    return current card versions of the courses, courses without a version are given a new one so that
+    cards cached before an invalidation are never served again
+    """
+    version_keys = {course_id: COURSE_CARD_VERSION_CACHE_KEY.format(course_id=course_id) for course_id in course_ids}
+    cached_versions = cache.get_many(version_keys.values())
+
+    versions, new_versions = {}, {}
+    for course_id, version_key in version_keys.items():
+        version = cached_versions.get(version_key)
+        if version is None:
+            version = new_versions[version_key] = '{:.6f}'.format(time())
+        versions[course_id] = version
+
+    if new_versions:
+        cache.set_many(new_versions, None)
+    return versions
+
+
+def get_course_cards(courses, build_card, card_type, *key_parts):
+    """
+    return course cards of the courses in the given order, cached cards are fetched with a single get_many
+    and only the missing ones are built
+
+    :param courses: (iterable) courses, anything with an id attribute
+    :param build_card: (callable) builds the card dict of a course
+    :param card_type: (str) name of the card layout, cards of different layouts are cached separately
+    :param key_parts: (str) any other values the card depends on, e.g. request host
+    :return: (list<dict>) course cards
+    """
+    courses = list(courses)
+    card_type = '.'.join((card_type,) + key_parts)
+    language = get_language()
+    versions = _get_course_card_versions({text_type(course.id) for course in courses})
+    card_keys = {
+        course_id: COURSE_CARD_CACHE_KEY.format(
+            card_type=card_type, course_id=course_id, language=language, version=version
+        ) for course_id, version in versions.items()
+    }
+    cached_cards = cache.get_many(card_keys.values())
+
+    cards, new_cards = [], {}
+    for course in courses:
+        card_key = card_keys[text_type(course.id)]
+        card = cached_cards.get(card_key)
+        if card is None:
+            card = new_cards[card_key] = build_card(course)
+        cards.append(card)
+
+    if new_cards:
+        cache.set_many(new_cards, COURSE_CARD_CACHE_TIMEOUT)
+    return cards
+
+
+def invalidate_course_cards(course_id):
+    """
+    invalidate cached cards of a course in all layouts and languages by dropping its card version
+    """
+    cache.delete(COURSE_CARD_VERSION_CACHE_KEY.format(course_id=text_type(course_id)))
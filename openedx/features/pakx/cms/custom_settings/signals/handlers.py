@@ -1,14 +1,24 @@
 from logging import getLogger
 
+from celery import current_app
 from django.conf import settings
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
+from opaque_keys.edx.locator import LibraryLocator
+from six import text_type
 
 from course_modes.models import CourseMode
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from openedx.features.pakx.cms.custom_settings.course_cards import invalidate_course_cards
+from openedx.features.pakx.cms.custom_settings.models import CourseOverviewContent
+from xmodule.modulestore.django import SignalHandler
 
 log = getLogger(__name__)
 
+# Name of the LMS task recounting course progress counters, it is sent by name since
+# the overrides app it belongs to is only installed in the LMS
+REFRESH_COURSE_PROGRESS_COUNTERS_TASK = 'refresh_course_progress_counters'
+
 
 @receiver(post_save, sender=CourseOverview, dispatch_uid="custom_settings.signals.handlers.initialize_course_settings")
 def initialize_course_settings(sender, instance, created, **kwargs):  # pylint: disable=unused-argument
@@ -41,3 +51,45 @@ def course_image_change(sender, instance, **kwargs):  # pylint: disable=unused-a
                                                                          instance.course_image_url.endswith(
                                                                              settings.DEFAULT_COURSE_ABOUT_IMAGE_URL)):
         instance.course_image_url = "/static/" + settings.DEFAULT_COURSE_ABOUT_IMAGE_URL
+
+
+@receiver(SignalHandler.course_published)
+def invalidate_course_cards_on_publish(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop cached course cards of a course when it is published
+    """
+    invalidate_course_cards(course_key)
+
+
+@receiver(SignalHandler.course_published)
+def refresh_progress_on_course_publish(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Recount progress counters of a course once its block structure is updated after publish
+    """
+    if isinstance(course_key, LibraryLocator):
+        return
+
+    current_app.send_task(
+        REFRESH_COURSE_PROGRESS_COUNTERS_TASK,
+        args=[text_type(course_key)],
+        countdown=settings.COURSE_PROGRESS_REFRESH_DELAY,
+    )
+
+
+@receiver(post_save, sender=CourseOverview, dispatch_uid="custom_settings.signals.handlers.overview_course_cards")
+def invalidate_course_cards_on_overview_save(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop cached course cards of a course when its overview is refreshed
+    """
+    invalidate_course_cards(instance.id)
+
+
+@receiver(post_save, sender=CourseOverviewContent)
+@receiver(post_delete, sender=CourseOverviewContent)
+@receiver(post_save, sender=CourseMode)
+@receiver(post_delete, sender=CourseMode)
+def invalidate_course_cards_on_course_data_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop cached course cards of a course when its custom settings or course modes change
+    """
+    invalidate_course_cards(instance.course_id)
@@ -1,3 +1,5 @@
+from datetime import date
+
 from django.contrib.auth.models import User
 from django.db.models import Case, When
 from django.urls import reverse
@@ -15,6 +17,7 @@ from lms.djangoapps.courseware.courses import (
 )
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from openedx.core.djangoapps.user_api.accounts.image_helpers import get_profile_image_urls_for_user
+from openedx.features.pakx.cms.custom_settings.course_cards import get_course_cards
 from openedx.features.pakx.lms.overrides.constants import COURSE_SLUG_MAPPING, TRAINING_SLUG_MAPPING
 from openedx.features.pakx.lms.discover.authentications import DiscoverAuthentication
 from openedx.features.pakx.lms.overrides.utils import (
@@ -63,6 +66,23 @@ class CourseDataView(APIView):
 
         return data
 
+    def get_course_cards_data(self, courses, is_upcoming=False):
+        """
+        Get course card data of the given courses, cards are served from the course card cache
+        and only the missing ones are built. Cards are cached per day as discount days are counted
+        from the current date
+
+        :returns (list): list of course card data dicts
+        """
+        return get_course_cards(
+            courses,
+            lambda course: self.get_course_card_data(course, is_upcoming),
+            type(self).__name__,
+            'upcoming' if is_upcoming else 'default',
+            self.request.get_host(),
+            date.today().isoformat(),
+        )
+
     def get_course_card_data(self, course, is_upcoming=False):
         """
         Get course data required for home page course card
@@ -158,8 +178,8 @@ class CoursesListView(CourseDataView):
         featured_courses = self.get_courses(featured_courses_ids)
 
         return Response({
-            'upcoming_courses': [self.get_course_card_data(course, True) for course in upcoming_courses],
-            'featured_courses': [self.get_course_card_data(course) for course in featured_courses]
+            'upcoming_courses': self.get_course_cards_data(upcoming_courses, is_upcoming=True),
+            'featured_courses': self.get_course_cards_data(featured_courses)
         }, status=status.HTTP_200_OK)
 
 
@@ -189,7 +209,7 @@ class BusinessCoursesView(CourseDataView):
         business_courses = self.get_courses(business_courses_ids)
 
         return Response({
-            'courses': [self.get_course_card_data(course) for course in business_courses],
+            'courses': self.get_course_cards_data(business_courses),
         }, status=status.HTTP_200_OK)
 
 
@@ -251,6 +271,6 @@ class CourseAboutPageData(CoursesListView):
         recommended_courses = self.get_courses([course for course in recommended_courses_ids if course != course_id])
 
         return Response({
-            'recommended_courses': [self.get_course_card_data(course) for course in recommended_courses],
+            'recommended_courses': self.get_course_cards_data(recommended_courses),
             'course_data': self.get_course_data(course_id) if course_id else {}
         }, status=status.HTTP_200_OK)
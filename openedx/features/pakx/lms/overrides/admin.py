@@ -60,7 +60,7 @@ class CourseProgressStatsAdmin(admin.ModelAdmin):
     list_display = ['user_email', 'course_title', 'email_reminder_status',
                     'progress', 'grade', 'completion_date']
     search_fields = ['email_reminder_status', 'progress']
-    list_filter = ['email_reminder_status', 'progress', 'enrollment__user__profile__organization',
+    list_filter = ['email_reminder_status', 'progress', 'is_dirty', 'enrollment__user__profile__organization',
                    'enrollment__course__display_name']
     actions = [download_as_csv]
 
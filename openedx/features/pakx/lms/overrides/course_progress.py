@@ -0,0 +1,68 @@
+"""
+Incremental maintenance of the completed/total block counters stored on CourseProgressStats
+"""
+
+from logging import getLogger
+
+from django.db.models import F
+
+from openedx.features.pakx.lms.overrides.models import CourseProgressStats
+from openedx.features.pakx.lms.overrides.utils import get_completed_block_counts, get_course_block_totals
+
+log = getLogger(__name__)
+
+PROGRESS_STATS_BATCH_SIZE = 500
+
+
+def increment_completed_blocks(user_id, course_key, block_key):
+    """
+    Add a newly completed block to the learner's progress counters and mark the record dirty
+    so that the next reconciliation pass recalculates its progress. Blocks that are not part of
+    the completable blocks of the course are not counted, same as in a full recount.
+
+    :param user_id: (int) user id
+    :param course_key: (CourseKey) course key
+    :param block_key: (UsageKey) usage key of the completed block
+    """
+
+    _, block_keys = get_course_block_totals(course_key)
+    if block_key not in block_keys:
+        return
+
+    CourseProgressStats.objects.filter(
+        enrollment__user_id=user_id, enrollment__course_id=course_key
+    ).update(completed_blocks=F('completed_blocks') + 1, is_dirty=True)
+
+
+def refresh_course_progress_counters(course_key, progress_stats=None):
+    """
+    Recount completed and total blocks for progress records of a course. The course block
+    totals are computed once and completions are counted with a single grouped query.
+
+    :param course_key: (CourseKey) course key
+    :param progress_stats: (list) CourseProgressStats of the course to refresh, all records if None
+    """
+
+    total_block_types, block_keys = get_course_block_totals(course_key)
+    total_blocks = sum(total_block_types.values())
+
+    if progress_stats is None:
+        progress_stats = list(CourseProgressStats.objects.filter(
+            enrollment__course_id=course_key
+        ).select_related('enrollment'))
+        completed_counts = get_completed_block_counts(course_key, block_keys)
+    else:
+        completed_counts = {}
+        for index in range(0, len(progress_stats), PROGRESS_STATS_BATCH_SIZE):
+            user_ids = [item.enrollment.user_id for item in progress_stats[index:index + PROGRESS_STATS_BATCH_SIZE]]
+            completed_counts.update(get_completed_block_counts(course_key, block_keys, user_ids))
+
+    for item in progress_stats:
+        item.total_blocks = total_blocks
+        item.completed_blocks = completed_counts.get(item.enrollment.user_id, 0)
+        item.is_dirty = True
+
+    CourseProgressStats.objects.bulk_update(
+        progress_stats, ['total_blocks', 'completed_blocks', 'is_dirty'], batch_size=PROGRESS_STATS_BATCH_SIZE
+    )
+    log.info("Refreshed progress counters of {} records for course:{}".format(len(progress_stats), course_key))
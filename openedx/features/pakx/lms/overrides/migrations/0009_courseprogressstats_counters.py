@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('overrides', '0008_auto_20220421_0837'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseprogressstats',
+            name='completed_blocks',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='courseprogressstats',
+            name='is_dirty',
+            field=models.BooleanField(db_index=True, default=True),
+        ),
+        migrations.AddField(
+            model_name='courseprogressstats',
+            name='total_blocks',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('overrides', '0009_courseprogressstats_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='courseprogressstats',
+            name='next_reminder_date',
+            field=models.DateField(blank=True, db_index=True, default=None, null=True),
+        ),
+    ]
@@ -29,7 +29,10 @@ class CourseProgressStats(models.Model):
     email_reminder_status = models.PositiveSmallIntegerField(db_index=True, choices=REMINDER_STATES,
                                                              default=NO_EMAIL_SENT)
     unlock_subsection_on = models.DateTimeField(null=True, blank=True)
-    next_reminder_date = models.DateField(default=None, null=True, blank=True)
+    next_reminder_date = models.DateField(default=None, null=True, blank=True, db_index=True)
+    completed_blocks = models.PositiveIntegerField(default=0)
+    total_blocks = models.PositiveIntegerField(default=0)
+    is_dirty = models.BooleanField(db_index=True, default=True)
 
     class Meta:
         verbose_name_plural = 'Course Progress Stats'
@@ -1,15 +1,13 @@
+from collections import defaultdict
 from datetime import timedelta
 from logging import getLogger
 
 from django.conf import settings
 from django.contrib.sites.models import Site
-from django.forms.models import model_to_dict
 from django.utils import timezone
 from edx_ace import ace
 from edx_ace.recipient import Recipient
-from milestones import api as milestones_api
-from milestones.exceptions import InvalidMilestoneException
-from opaque_keys.edx.keys import CourseKey
+from milestones.models import UserMilestone
 
 from openedx.core.djangoapps.ace_common.template_context import get_base_template_context
 from openedx.core.lib.celery.task_utils import emulate_http_request
@@ -21,26 +19,81 @@ from .models import CourseProgressStats
 
 log = getLogger(__name__)
 
+MILESTONES_BATCH_SIZE = 1000
 
-def check_and_unlock_user_milestone(user, course_key):
-    """Checks if pre req for locked subsection have been completed."""
 
-    course_key = CourseKey.from_string(course_key)
+def check_and_unlock_course_milestones(course_key, progress_stats):
+    """
+    Check if pre req for locked subsection have been completed by the given learners of a course and unlock it.
+
+    Gating milestones are loaded once for the course, milestones of learners in the final subsection's
+    namespace are fetched in bulk and unlock dates and unlocked milestones are written with bulk queries.
+
+    :param course_key: (CourseKey) course key
+    :param progress_stats: (list) CourseProgressStats of the course with enrollment, user and course loaded
+    """
+
     final_subsection, pre_req_for_final = get_subsections(
         find_gating_milestones(course_key, relationship='requires')
     )
-
     if not final_subsection or not pre_req_for_final:
         log.info('No final milestone found for course:{}'.format(course_key))
         return
 
-    user_milestones = milestones_api.get_user_milestones(model_to_dict(user), final_subsection['namespace'])
+    course_overview_content = CourseOverviewContent.objects.filter(course_id=course_key).first()
+    if not course_overview_content:
+        log.info('Course Overview does not exist for course:{}'.format(course_key))
+        return
+
+    now = timezone.now()
+    date_to_unlock = now + timedelta(days=course_overview_content.days_to_unlock)
+    unlocked_stats = []
+
+    for index in range(0, len(progress_stats), MILESTONES_BATCH_SIZE):
+        stats_batch = progress_stats[index:index + MILESTONES_BATCH_SIZE]
+        user_namespaces = defaultdict(set)
+        for user_id, namespace in UserMilestone.objects.filter(
+            user_id__in=[item.enrollment.user_id for item in stats_batch],
+            milestone__namespace=final_subsection['namespace'],
+            active=True,
+        ).values_list('user_id', 'milestone__namespace'):
+            user_namespaces[user_id].add(namespace)
+
+        stats_to_date = []
+        for item in stats_batch:
+            milestone_namespaces = user_namespaces[item.enrollment.user_id]
+            if pre_req_for_final['namespace'] not in milestone_namespaces:
+                continue
+            if not item.unlock_subsection_on:
+                item.unlock_subsection_on = date_to_unlock
+                stats_to_date.append(item)
+            if now >= item.unlock_subsection_on and final_subsection['namespace'] not in milestone_namespaces:
+                unlocked_stats.append(item)
+
+        CourseProgressStats.objects.bulk_update(stats_to_date, ['unlock_subsection_on'])
+
+    if not unlocked_stats:
+        return
+
+    _bulk_add_user_milestone([item.enrollment.user_id for item in unlocked_stats], final_subsection)
+    log.info('Added Milestone for {} users of course:{}'.format(len(unlocked_stats), course_key))
+    for item in unlocked_stats:
+        send_post_assessment_email(item.enrollment.user, item.enrollment.course, final_subsection['content_id'])
+
 
-    try:
-        if user_has_milestone(user_milestones, pre_req_for_final):
-            unlock_or_add_unlock_date(user, course_key, user_milestones, final_subsection)
-    except InvalidMilestoneException:
-        log.info('User:{} for course:{} have milestone:{}'.format(user.email, course_key, pre_req_for_final))
+def _bulk_add_user_milestone(user_ids, milestone):
+    """Bulk version of milestones_api.add_user_milestone, re-activates existing links and creates missing ones."""
+
+    existing_user_ids = set(UserMilestone.objects.filter(
+        user_id__in=user_ids, milestone_id=milestone['id']
+    ).values_list('user_id', flat=True))
+    UserMilestone.objects.filter(
+        user_id__in=existing_user_ids, milestone_id=milestone['id'], active=False
+    ).update(active=True)
+    UserMilestone.objects.bulk_create([
+        UserMilestone(user_id=user_id, milestone_id=milestone['id'], active=True)
+        for user_id in set(user_ids) - existing_user_ids
+    ], batch_size=MILESTONES_BATCH_SIZE)
 
 
 def get_subsections(milestones):
@@ -56,61 +109,6 @@ def get_subsections(milestones):
     return final_subsection, None
 
 
-def unlock_or_add_unlock_date(user, course_key, milestones, final_milestone):
-    """Check and unlock subsection if unlock date has been specified and fulfilled."""
-
-    course_progress = set_date_and_get_course_progress_stats(user.id, course_key)
-
-    if not course_progress:
-        return
-
-    if (timezone.now() >= course_progress.unlock_subsection_on
-            and not user_has_milestone(milestones, final_milestone)):
-
-        milestones_api.add_user_milestone(model_to_dict(user), final_milestone)
-        send_post_assessment_email(user, course_progress.enrollment.course, final_milestone['content_id'])
-
-        log.info('Added Milestone for user:{} and course:{} where dates were:'.format(user.email, course_key))
-        log.info('date_to_unlock: {}\tdate_now: {}'.format(course_progress.unlock_subsection_on, timezone.now()))
-
-
-def set_date_and_get_course_progress_stats(user_id, course_key):
-    """Set date to unlock if not already set and course progress stats."""
-
-    try:
-        course_overview_content = CourseOverviewContent.objects.get(course_id=course_key)
-        date_to_unlock = timezone.now() + timedelta(days=course_overview_content.days_to_unlock)
-        course_stats = CourseProgressStats.objects.filter(
-            enrollment__user_id=user_id,
-            enrollment__course_id=course_key
-        ).first()
-
-        if not course_stats.unlock_subsection_on:
-            course_stats.unlock_subsection_on = date_to_unlock
-            course_stats.save(update_fields=['unlock_subsection_on'])
-
-        return course_stats
-
-    except (CourseOverviewContent.DoesNotExist, CourseProgressStats.DoesNotExist):
-        log.info(
-            'Course Progress stats or Course Overview does not exist for user:{} and course:{}'.format(
-                user_id,
-                course_key
-            )
-        )
-        return None
-
-
-def user_has_milestone(milestones, milestone):
-    """Check if user has required milestone."""
-
-    for user_milestone in milestones:
-        if user_milestone['namespace'] == milestone['namespace']:
-            return True
-
-    return False
-
-
 def get_final_subsection(milestones):
     """Get final subsection of course that is a pre-req of itself."""
 
@@ -1,57 +1,30 @@
+from collections import defaultdict
 from datetime import timedelta
 from logging import getLogger
 
 from django.conf import settings
 from django.contrib.sites.models import Site
+from django.db.models import Q
 from django.utils import timezone
 from edx_ace import ace
 from edx_ace.recipient import Recipient
-from six import text_type
 
 from openedx.core.djangoapps.ace_common.template_context import get_base_template_context
 from openedx.core.lib.celery.task_utils import emulate_http_request
+from openedx.features.pakx.lms.overrides.models import CourseProgressStats
 from openedx.features.pakx.lms.pakx_admin_app.message_types import CourseReminder
 
 log = getLogger(__name__)
 
+REMINDER_UPDATE_BATCH_SIZE = 1000
 
-def check_reminder_status(user_reminder_date, last_date_for_reminder):
-    """Check reminder email needs to be sent or not to the learner."""
 
-    send_reminder = True
-    reminder_date = None
-    reset_reminder = False
-    today = timezone.now().date()
-
-    if today > last_date_for_reminder:
-        log.info('Last date for reminder have been passed\nToday:{} Last Date:{}'.format(today, last_date_for_reminder))
-        send_reminder = False
-    elif user_reminder_date:
-        if user_reminder_date == today:
-            reminder_date = user_reminder_date
-            log.info('Reminder date is today. Date:{}'.format(user_reminder_date))
-        elif user_reminder_date < today:
-            reset_reminder = True
-            send_reminder = False
-            log.info('Reminder date in the past, resetting it. Date:{}'.format(user_reminder_date))
-        else:
-            send_reminder = False
-            log.info('Reminder date is not today. Date:{}'.format(user_reminder_date))
-    else:
-        log.info("No date found for user. Setting today's date:{}".format(today))
-        reminder_date = today
-    if today == last_date_for_reminder:
-        reset_reminder = True
-
-    return send_reminder, reminder_date, reset_reminder
-
-
-def send_reminder_email(course_key, enrollment):
+def send_reminder_email(course_key, enrollment, site=None):
     """Send reminder email to user."""
 
     user = enrollment.user
     log.info("Sending reminder email to user:{}".format(user))
-    site = Site.objects.get_current()
+    site = site or Site.objects.get_current()
     message_context = get_base_template_context(site, user)
     message_context.update({
         'course_name': enrollment.course.display_name,
@@ -72,31 +45,50 @@ def send_reminder_email(course_key, enrollment):
         ace.send(msg)
 
 
-def check_and_send_emails(progress_stats):
-    """Check if a reminder email should be send according to settings."""
-
-    course_key = text_type(progress_stats.enrollment.course_id)
-    log.info('\n\nChecking reminder email for {}:{}'.format(progress_stats.enrollment.user.id, course_key))
-
-    days_till_next_reminder = progress_stats.enrollment.course.custom_settings.days_till_next_reminder
-    reminder_stop_date = progress_stats.enrollment.course.custom_settings.reminder_stop_date
+def schedule_due_reminders():
+    """
+    Move reminder dates of all due progress stats with bulk updates, dates in the past are reset without
+    sending any email and dates due today, or not set, are moved by the course's days till next reminder
+    or cleared on the reminder stop date.
 
-    send_reminder, old_date, reset_reminder = check_reminder_status(
-        progress_stats.next_reminder_date,
-        reminder_stop_date
-    )
-
-    date_changed = False
+    :returns: (list) ids of CourseProgressStats whose reminder emails should be sent today
+    """
 
-    if send_reminder:
-        progress_stats.next_reminder_date = old_date + timedelta(days=days_till_next_reminder)
-        date_changed = True
-    if reset_reminder:
-        progress_stats.next_reminder_date = None
-        date_changed = True
-    if date_changed:
-        progress_stats.save()
-    if send_reminder:
-        send_reminder_email(course_key, progress_stats.enrollment)
-
-    log.info('\n\n')
+    today = timezone.now().date()
+    due_progress_stats = list(CourseProgressStats.objects.filter(
+        Q(next_reminder_date__isnull=True) | Q(next_reminder_date__lte=today),
+        progress__lt=100,
+        enrollment__course__custom_settings__days_till_next_reminder__gt=0,
+        enrollment__course__custom_settings__reminder_stop_date__gte=today,
+    ).values_list(
+        'id',
+        'next_reminder_date',
+        'enrollment__course__custom_settings__days_till_next_reminder',
+        'enrollment__course__custom_settings__reminder_stop_date',
+    ))
+
+    reset_ids = []
+    next_reminder_dates = defaultdict(list)
+    for progress_stats_id, reminder_date, days_till_next_reminder, reminder_stop_date in due_progress_stats:
+        if reminder_date is not None and reminder_date < today:
+            reset_ids.append(progress_stats_id)
+            continue
+        next_reminder_date = None if today == reminder_stop_date else today + timedelta(days=days_till_next_reminder)
+        next_reminder_dates[next_reminder_date].append(progress_stats_id)
+
+    for index in range(0, len(reset_ids), REMINDER_UPDATE_BATCH_SIZE):
+        CourseProgressStats.objects.filter(
+            id__in=reset_ids[index:index + REMINDER_UPDATE_BATCH_SIZE]
+        ).update(next_reminder_date=None)
+    log.info('Reset {} reminder dates in the past'.format(len(reset_ids)))
+
+    progress_stats_ids = []
+    for next_reminder_date, ids in next_reminder_dates.items():
+        for index in range(0, len(ids), REMINDER_UPDATE_BATCH_SIZE):
+            CourseProgressStats.objects.filter(
+                id__in=ids[index:index + REMINDER_UPDATE_BATCH_SIZE]
+            ).update(next_reminder_date=next_reminder_date)
+        progress_stats_ids.extend(ids)
+
+    log.info('Found {} due reminder emails'.format(len(progress_stats_ids)))
+    return progress_stats_ids
@@ -2,16 +2,25 @@
 Progress Email related signal handlers.
 """
 
+from logging import getLogger
+
+from completion.models import BlockCompletion
+from django.db import transaction
+from django.db.models.signals import post_save
 from django.dispatch import receiver
+from six import text_type
 
 from openedx.features.pakx.lms.overrides.tasks import (
     add_enrollment_record,
+    increment_completed_blocks_task,
     remove_enrollment_record,
     verify_user_and_change_enrollment
 )
 from student.models import EnrollStatusChange
 from student.signals import ENROLL_STATUS_CHANGE
 
+log = getLogger(__name__)
+
 
 @receiver(ENROLL_STATUS_CHANGE)
 def copy_active_course_enrollment(sender, event=None, user=None, **kwargs):  # pylint: disable=unused-argument
@@ -24,3 +33,24 @@ def copy_active_course_enrollment(sender, event=None, user=None, **kwargs):  # p
         verify_user_and_change_enrollment(user, course_key)
     elif event == EnrollStatusChange.unenroll:
         remove_enrollment_record(user.id, course_key)
+
+
+@receiver(post_save, sender=BlockCompletion, dispatch_uid="pakx.overrides.update_progress_on_block_completion")
+def update_progress_on_block_completion(sender, instance, created, **kwargs):  # pylint: disable=unused-argument
+    """
+    Add newly completed blocks to the learner's course progress counters
+    """
+    if not created or not instance.context_key.is_course:
+        return
+
+    # The counters are incremented in a task, after the completion is committed, so that neither loading
+    # the course blocks nor a failure to count delays or breaks the completion save.
+    task_args = [instance.user_id, text_type(instance.context_key), text_type(instance.full_block_key)]
+
+    def queue_increment():
+        try:
+            increment_completed_blocks_task.apply_async(args=task_args)
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Unable to queue progress counters update for block completion:{}".format(task_args))
+
+    transaction.on_commit(queue_increment)
@@ -1,6 +1,10 @@
 """Celery tasks for to update user progress and send reminder emails"""
 
+from collections import defaultdict
+from datetime import timedelta
+from itertools import groupby
 from logging import getLogger
+from time import sleep
 
 from celery import task
 from django.conf import settings
@@ -11,28 +15,36 @@ from django.urls import reverse
 from django.utils import timezone
 from edx_ace import ace
 from edx_ace.recipient import Recipient
+from opaque_keys.edx.keys import CourseKey, UsageKey
 from six import text_type
 
 from course_modes.models import CourseMode
 from grades.api import CourseGradeFactory
 from lms.djangoapps.verify_student.models import ManualVerification
 from openedx.core.djangoapps.ace_common.template_context import get_base_template_context
+from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from openedx.core.djangoapps.lang_pref import LANGUAGE_KEY
 from openedx.core.djangoapps.site_configuration import helpers as configuration_helpers
 from openedx.core.djangoapps.user_api.preferences.api import get_user_preference
 from openedx.core.lib.celery.task_utils import emulate_http_request
-from openedx.features.pakx.lms.overrides.constants import SKIP_UPDATE_COURSE_PROGRESS_COURSE_IDS 
+from openedx.features.pakx.lms.overrides.constants import SKIP_UPDATE_COURSE_PROGRESS_COURSE_IDS
+from openedx.features.pakx.lms.overrides.course_progress import (
+    increment_completed_blocks,
+    refresh_course_progress_counters
+)
 from openedx.features.pakx.lms.overrides.message_types import ContactUs, CourseProgress
 from openedx.features.pakx.lms.overrides.models import CourseProgressStats
-from openedx.features.pakx.lms.overrides.post_assessment import check_and_unlock_user_milestone
-from openedx.features.pakx.lms.overrides.reminder_email import check_and_send_emails
+from openedx.features.pakx.lms.overrides.post_assessment import check_and_unlock_course_milestones
+from openedx.features.pakx.lms.overrides.reminder_email import schedule_due_reminders
+from openedx.features.pakx.lms.overrides.reminder_email import send_reminder_email as send_course_reminder_email
 from openedx.features.pakx.lms.overrides.utils import (
-    create_dummy_request,
-    get_course_progress_percentage,
-    get_date_diff_in_days
+    calculate_progress_percentage,
+    get_date_diff_in_days,
+    refresh_course_block_data
 )
 from student.models import CourseEnrollment
+from xmodule.modulestore.django import modulestore
 
 log = getLogger(__name__)
 
@@ -146,27 +158,86 @@ def copy_active_course_enrollments():
         CourseProgressStats.objects.get_or_create(enrollment=enrollment)
 
 
+@task(name='increment_completed_blocks')
+def increment_completed_blocks_task(user_id, course_id, block_id):
+    """
+    A task that adds a newly completed block to the learner's progress counters, outside of the completion request
+    :param user_id: (int) user id
+    :param course_id: (str) course key
+    :param block_id: (str) usage key of the completed block
+    """
+
+    increment_completed_blocks(user_id, CourseKey.from_string(course_id), UsageKey.from_string(block_id))
+
+
+@task(bind=True, name='refresh_course_progress_counters')
+def refresh_course_progress_counters_task(self, course_id):
+    """
+    A task that recounts completed & total blocks of all progress records of a course, i.e after it is re-published
+    :param course_id: (str) course key
+    """
+
+    course_key = CourseKey.from_string(course_id)
+    # the collected block structure is updated after publish by the block structure app, retry until it holds
+    # the published version rather than collecting the course again
+    course_block_structure = get_course_in_cache(course_key)
+    root_block_key = course_block_structure.root_block_usage_key
+    course = modulestore().get_course(course_key, depth=0)
+    for field_name in ['course_version', 'subtree_edited_on']:
+        if course_block_structure.get_xblock_field(root_block_key, field_name) != getattr(course, field_name, None):
+            log.info("Block structure of course:{} is not updated yet, retrying progress refresh".format(course_id))
+            raise self.retry(countdown=settings.COURSE_PROGRESS_REFRESH_DELAY)
+
+    refresh_course_block_data(course_key, course_block_structure)
+    refresh_course_progress_counters(course_key)
+
+
+def _initialize_progress_counters(progress_models):
+    """
+    Initialize counters of progress records that have never been counted, course by course
+    :param progress_models: (list) CourseProgressStats records
+    """
+
+    uninitialized_stats = defaultdict(list)
+    for item in progress_models:
+        if not item.total_blocks:
+            uninitialized_stats[item.enrollment.course_id].append(item)
+
+    for course_id, stats in uninitialized_stats.items():
+        try:
+            refresh_course_progress_counters(course_id, stats)
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Unable to initialize progress counters for course:{}".format(course_id))
+
+
 @task(name='update_course_progress_stats')
 def update_course_progress_stats():
     """
-    A task that checks all the current progress models & sends course completion or reminder emails
+    A reconciliation task that updates progress of dirty progress models from their block counters
+    & sends course completion or reminder emails
     """
 
     email_status_to_filter = [CourseProgressStats.NO_EMAIL_SENT, CourseProgressStats.REMINDER_SENT]
-    progress_models = CourseProgressStats.objects.filter(
+    reminder_end_date = timezone.now() + timedelta(days=settings.COURSE_PROGRESS_REMINDER_EMAIL_DAYS + 1)
+    progress_models = list(CourseProgressStats.objects.filter(
         Q(email_reminder_status__in=email_status_to_filter) | Q(progress__lt=100)
-    ).select_related('enrollment', 'enrollment__user')
-    log.info("Fetching records, found {} active models".format(len(progress_models)))
-
+    ).filter(
+        Q(is_dirty=True) |
+        Q(email_reminder_status=CourseProgressStats.NO_EMAIL_SENT, enrollment__course__end__lte=reminder_end_date)
+    ).select_related('enrollment', 'enrollment__user'))
+    log.info("Fetching records, found {} dirty models".format(len(progress_models)))
+
+    _initialize_progress_counters(progress_models)
+    course_overviews = {}
     for item in progress_models:
         user = item.enrollment.user
         course_id = item.enrollment.course_id
         # if course_id in SKIP_UPDATE_COURSE_PROGRESS_COURSE_IDS:
         #     continue
-        course_progress = float(
-            get_course_progress_percentage(create_dummy_request(Site.objects.get_current(), user),
-                                           text_type(course_id)))
-        course_overview = CourseOverview.get_from_id(course_id)
+        course_progress = calculate_progress_percentage(item.completed_blocks, item.total_blocks)
+        if course_id not in course_overviews:
+            course_overviews[course_id] = CourseOverview.get_from_id(course_id)
+        course_overview = course_overviews[course_id]
         grades = CourseGradeFactory().read(user=user, course_key=course_id)
         completed = course_progress >= 100
         fields_list = ['progress', 'grade']
@@ -195,30 +266,74 @@ def update_course_progress_stats():
                 item.email_reminder_status = CourseProgressStats.REMINDER_SENT
                 fields_list.append('email_reminder_status')
         item.save(update_fields=fields_list)
+        # counters may have moved while reconciling, keep the record dirty in that case
+        CourseProgressStats.objects.filter(
+            id=item.id, completed_blocks=item.completed_blocks, total_blocks=item.total_blocks
+        ).update(is_dirty=False)
 
 
 @task(name='unlock_subsections')
 def unlock_subsections():
     """Start checking and unlocking milestones"""
 
-    progress_models = CourseProgressStats.objects.filter(progress__lt=100).select_related('enrollment')
-    log.info("Fetching records, found {} active models".format(len(progress_models)))
-    for item in progress_models:
-        check_and_unlock_user_milestone(item.enrollment.user, text_type(item.enrollment.course_id))
+    progress_models = CourseProgressStats.objects.filter(progress__lt=100).select_related(
+        'enrollment', 'enrollment__user', 'enrollment__course'
+    ).order_by('enrollment__course_id')
+    log.info("Fetching records, found {} active models".format(progress_models.count()))
+    course_groups = groupby(progress_models.iterator(), lambda item: item.enrollment.course_id)
+    for course_id, course_progress_models in course_groups:
+        try:
+            check_and_unlock_course_milestones(course_id, list(course_progress_models))
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Unable to check and unlock milestones for course:{}".format(course_id))
+
+
+@task(
+    bind=True,
+    name='send_reminder_email_batch',
+    default_retry_delay=settings.REMINDER_EMAIL_DEFAULT_RETRY_DELAY,
+    max_retries=settings.REMINDER_EMAIL_MAX_RETRIES,
+    rate_limit=settings.REMINDER_EMAIL_TASK_RATE_LIMIT,
+)
+def send_reminder_email_batch(self, progress_stats_ids):
+    """
+    Send reminder emails for a batch of progress stats, retrying the ones that failed.
+    Reminder dates are moved before sending, so a retry only sends the failed emails again.
+    :param progress_stats_ids: (list) CourseProgressStats ids
+    """
+
+    progress_models = CourseProgressStats.objects.filter(id__in=progress_stats_ids).select_related(
+        'enrollment', 'enrollment__user', 'enrollment__course'
+    )
+    site = Site.objects.get_current()
+    failed_ids = []
+    last_exc = None
+    for email_num, item in enumerate(progress_models):
+        if email_num:
+            sleep(settings.REMINDER_EMAIL_DELAY_BETWEEN_SENDS)
+        try:
+            send_course_reminder_email(text_type(item.enrollment.course_id), item.enrollment, site)
+        except Exception as exc:  # pylint: disable=broad-except
+            log.exception("Unable to send reminder email for progress stats:{}".format(item.id))
+            failed_ids.append(item.id)
+            last_exc = exc
+
+    if failed_ids:
+        log.info("Retrying {} failed reminder emails of the batch".format(len(failed_ids)))
+        raise self.retry(args=[failed_ids], exc=last_exc)
 
 
 @task(name='send_reminder_emails')
 def send_reminder_emails():
-    """Start checking and sending reminder emails"""
-
-    progress_models = CourseProgressStats.objects.filter(
-        progress__lt=100,
-        enrollment__course__custom_settings__days_till_next_reminder__gt=0,
-        enrollment__course__custom_settings__reminder_stop_date__isnull=False
-    ).select_related('enrollment')
-    log.info("Fetching records, found {} active models\n\n".format(len(progress_models)))
-    for item in progress_models:
-        check_and_send_emails(item)
+    """Move reminder dates of due learners and fan out reminder emails to subtasks"""
+
+    progress_stats_ids = schedule_due_reminders()
+    emails_per_task = settings.REMINDER_EMAILS_PER_TASK
+    for index in range(0, len(progress_stats_ids), emails_per_task):
+        send_reminder_email_batch.apply_async(
+            args=[progress_stats_ids[index:index + emails_per_task]],
+            routing_key=settings.REMINDER_EMAIL_ROUTING_KEY,
+        )
 
 
 @task(name='verify_user_and_change_enrollment')
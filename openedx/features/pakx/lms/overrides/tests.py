@@ -1,2 +1,49 @@
+from datetime import timedelta
 
-# Create your tests here.
+import mock
+from django.test import TestCase
+from django.utils import timezone
+
+from openedx.features.pakx.cms.custom_settings.tests.factories import CourseOverviewContentFactory
+from openedx.features.pakx.lms.overrides.models import CourseProgressStats
+from openedx.features.pakx.lms.overrides.tasks import send_reminder_emails
+from student.tests.factories import CourseEnrollmentFactory
+
+
+class SendReminderEmailsTests(TestCase):
+
+    def setUp(self):
+        super(SendReminderEmailsTests, self).setUp()
+        self.today = timezone.now().date()
+        self.custom_settings = CourseOverviewContentFactory(
+            days_till_next_reminder=7, reminder_stop_date=self.today + timedelta(days=30)
+        )
+
+    def create_progress_stats(self, next_reminder_date):
+        enrollment = CourseEnrollmentFactory(course=self.custom_settings.course)
+        progress_stats, __ = CourseProgressStats.objects.get_or_create(enrollment=enrollment)
+        CourseProgressStats.objects.filter(id=progress_stats.id).update(next_reminder_date=next_reminder_date)
+        return progress_stats
+
+    @mock.patch('openedx.features.pakx.lms.overrides.tasks.send_reminder_email_batch.apply_async')
+    def test_past_reminder_date_is_reset_without_email(self, mock_apply_async):
+        progress_stats = self.create_progress_stats(self.today - timedelta(days=3))
+
+        send_reminder_emails()
+
+        mock_apply_async.assert_not_called()
+        progress_stats.refresh_from_db()
+        assert progress_stats.next_reminder_date is None
+
+    @mock.patch('openedx.features.pakx.lms.overrides.tasks.send_reminder_email_batch.apply_async')
+    def test_due_reminder_is_sent_and_rescheduled(self, mock_apply_async):
+        past_progress_stats = self.create_progress_stats(self.today - timedelta(days=3))
+        due_progress_stats = self.create_progress_stats(self.today)
+
+        send_reminder_emails()
+
+        mock_apply_async.assert_called_once_with(args=[[due_progress_stats.id]], routing_key=mock.ANY)
+        due_progress_stats.refresh_from_db()
+        assert due_progress_stats.next_reminder_date == self.today + timedelta(days=7)
+        past_progress_stats.refresh_from_db()
+        assert past_progress_stats.next_reminder_date is None
@@ -1,6 +1,6 @@
 """ Overrides app util functions """
 
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from datetime import date, datetime
 from logging import getLogger
 from re import compile as re_compile
@@ -9,9 +9,10 @@ from re import findall
 from completion.models import BlockCompletion
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.validators import MinLengthValidator, RegexValidator
-from django.db.models import Avg, Case, Count, IntegerField, Sum, When
+from django.db.models import Avg, Case, Count, IntegerField, Q, Sum, When
 from django.db.models.functions import Coalesce
 from django.test import RequestFactory
 from django.urls import reverse
@@ -25,6 +26,7 @@ from course_modes.models import CourseMode, format_course_price
 from lms.djangoapps.commerce.utils import EcommerceService
 from lms.djangoapps.course_api.blocks.serializers import BlockDictSerializer
 from lms.djangoapps.course_api.blocks.transformers.blocks_api import BlocksAPITransformer
+from lms.djangoapps.courseware.access import has_access
 from lms.djangoapps.courseware.courses import get_courses, sort_by_announcement, sort_by_start_date
 from lms.djangoapps.courseware.model_data import FieldDataCache
 from lms.djangoapps.courseware.module_render import toc_for_course
@@ -35,11 +37,14 @@ from openedx.core.djangoapps.crawlers.models import CrawlersConfig
 from openedx.core.djangoapps.site_configuration import helpers as configuration_helpers
 from openedx.core.lib.request_utils import get_request_or_stub
 from openedx.features.course_experience.utils import get_course_outline_block_tree, get_resume_block
+from openedx.features.pakx.cms.custom_settings.course_cards import get_course_cards
 from openedx.features.pakx.cms.custom_settings.models import CourseOverviewContent
 from pakx_feedback.feedback_app.models import UserFeedbackModel
 from student.models import CourseEnrollment
 from util.organizations_helpers import get_organization_by_short_name
 from xmodule import course_metadata_utils
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.exceptions import ItemNotFoundError
 
 log = getLogger(__name__)
 
@@ -52,6 +57,10 @@ BLOCK_TYPES_TO_FILTER = [
     'pb-message', 'pakx_microlearning', 'pakx_completion', 'google_drive', 'google-drive', 'google_document',
     'google-document'
 ]
+# Incrementally update this value whenever the format of the cached course block data changes.
+COURSE_BLOCK_DATA_FORMAT_VERSION = 2
+COURSE_BLOCK_TOTALS_CACHE_KEY = 'pakx.overrides.course_block_totals.v{format_version}.{course_key}.{course_version}'
+COURSE_BLOCK_TOTALS_CACHE_TIMEOUT = 60 * 60 * 24
 
 
 def get_or_create_course_overview_content(course_key, custom_setting=None):
@@ -150,7 +159,7 @@ def get_featured_course_set():
     ).prefetch_related(
         'custom_settings__course_set__publisher_org',
     )
-    return [get_course_card_data(course, org_prefetched=True) for course in courses]
+    return get_course_cards(courses, lambda course: get_course_card_data(course, org_prefetched=True), 'featured')
 
 
 def get_active_campaign_data():
@@ -272,6 +281,96 @@ def get_resume_course_info(request, course_id, are_future_start_dates_allowed=Fa
     return has_visited_course, resume_course_url, resume_course_title
 
 
+def get_courses_progress_information(request, course_keys):
+    """
+    Get enrollment, progress and resume information of the request user for many courses at once.
+
+    Enrollments are resolved with one query, the cached completable blocks of all courses are read
+    with one cache lookup, and completions of all courses are read with one query and counted against
+    those blocks. The resume block of a course is the unit of the latest completed block, same as in
+    the course outline, as long as the learner still has access to it.
+
+    :param request: (HttpRequest) request object
+    :param course_keys: [CourseKey] list of course keys
+
+    :return: (dict) progress information against course key i.e
+             {CourseKey: {'is_enrolled': True, 'user_progress': '70', 'has_visited_course': True,
+                          'resume_course_url': 'https://...', 'resume_course_title': 'Unit 1'}}
+    """
+    user = request.user
+    courses_information = {
+        course_key: {
+            'is_enrolled': False,
+            'user_progress': '0',
+            'has_visited_course': False,
+            'resume_course_url': None,
+            'resume_course_title': None,
+        } for course_key in course_keys
+    }
+    if not user.is_authenticated or not course_keys:
+        return courses_information
+
+    enrolled_course_keys = set(CourseEnrollment.objects.filter(
+        user=user, course_id__in=course_keys, is_active=True
+    ).values_list('course_id', flat=True))
+    if not enrolled_course_keys:
+        return courses_information
+
+    courses_block_data = _get_courses_block_data(enrolled_course_keys)
+    completed_counts = defaultdict(int)
+    latest_completions = {}
+    for block_completion in BlockCompletion.objects.filter(user=user, context_key__in=enrolled_course_keys):
+        course_key = block_completion.context_key
+        block_key = block_completion.full_block_key
+        if block_key not in courses_block_data[course_key]['block_keys']:
+            continue
+        completed_counts[course_key] += 1
+        latest_completion = latest_completions.get(course_key)
+        if latest_completion is None or block_completion.modified > latest_completion.modified:
+            latest_completions[course_key] = block_completion
+
+    for course_key in enrolled_course_keys:
+        block_data = courses_block_data[course_key]
+        latest_completion = latest_completions.get(course_key)
+        resume_block_key = block_data['units'].get(latest_completion.full_block_key) if latest_completion else None
+        if resume_block_key and _can_access_block(user, resume_block_key):
+            resume_course_title = block_data['unit_display_names'][resume_block_key]
+        else:
+            resume_block_key = modulestore().make_course_usage_key(course_key)
+            resume_course_title = None
+        courses_information[course_key].update({
+            'is_enrolled': True,
+            'user_progress': _calculate_percentage(
+                completed_counts[course_key], sum(block_data['total_block_types'].values())
+            ),
+            'has_visited_course': latest_completion is not None,
+            'resume_course_url': request.build_absolute_uri(reverse(
+                'jump_to', kwargs={'course_id': text_type(course_key), 'location': text_type(resume_block_key)}
+            )),
+            'resume_course_title': resume_course_title,
+        })
+
+    return courses_information
+
+
+def _can_access_block(user, usage_key):
+    """
+    Check whether the user can load the given block, i.e it is visible to them and not denied by a content group.
+    Only the block itself is loaded from the modulestore, rather than transforming the whole course for the user.
+
+    :param user: (User) user object
+    :param usage_key: (UsageKey) usage key of the block
+
+    :return: (bool) True if the user can access the block
+    """
+    try:
+        block = modulestore().get_item(usage_key, depth=0)
+    except ItemNotFoundError:
+        return False
+
+    return bool(has_access(user, 'load', block, course_key=usage_key.course_key))
+
+
 def add_course_progress_to_enrolled_courses(request, courses_list):
     """
     Adds a tag enrolled to the course in which user is enrolled
@@ -279,19 +378,17 @@ def add_course_progress_to_enrolled_courses(request, courses_list):
     :param request: (HttpRequest) request object
     :param courses_list: [CourseView] list of course view objects
     """
+    courses_information = get_courses_progress_information(request, [course.id for course in courses_list])
     for course in courses_list:
-        is_enrolled = CourseEnrollment.is_enrolled(request.user, course.id)
-        course.user_progress = '0'
-        if is_enrolled:
-            course_id = text_type(course.id)
-            has_visited_course, resume_course_url, resume_course_title = get_resume_course_info(
-                request, course_id, True
+        course_information = courses_information[course.id]
+        course.user_progress = course_information['user_progress']
+        if course_information['is_enrolled']:
+            course.resume_course_url = course_information['resume_course_url']
+            course.has_visited_course = course_information['has_visited_course']
+            course.resume_course_title = (
+                course_information['resume_course_title'] or course.display_name_with_default
             )
-            course.user_progress = get_course_progress_percentage(request, course_id)
-            course.resume_course_url = resume_course_url
-            course.has_visited_course = has_visited_course
-            course.resume_course_title = resume_course_title
-        course.enrolled = is_enrolled
+        course.enrolled = course_information['is_enrolled']
         course.dir = 'rtl' if is_rtl_language(course.language) else ''
 
 
@@ -404,15 +501,156 @@ def create_dummy_request(site, user):
     return request
 
 
-def get_progress_information(request, course_key):
-    course_key = CourseKey.from_string(course_key)
-    course_block_structure = get_course_in_cache(course_key)
+def _course_block_totals_cache_key(course_overview):
+    """
+    Get the cache key of the completable block data of a course, by its overview, which is refreshed on every publish
+    """
+    return COURSE_BLOCK_TOTALS_CACHE_KEY.format(
+        format_version=COURSE_BLOCK_DATA_FORMAT_VERSION,
+        course_key=text_type(course_overview.id),
+        course_version=course_overview.modified.strftime('%Y%m%d%H%M%S%f'),
+    )
+
+
+def _get_unit_key(course_block_structure, block_key):
+    """
+    Get the key of the unit (vertical) containing the given block in the course block structure, if any
+    """
+    while block_key is not None:
+        if course_block_structure.get_xblock_field(block_key, 'category') == 'vertical':
+            return block_key
+        parents = course_block_structure.get_parents(block_key)
+        block_key = parents[0] if parents else None
+
+    return None
+
+
+def _compute_course_block_data(course_block_structure):
+    """
+    Compute completable block data of a course with a single transformer pass over its collected block structure.
+
+    :param course_block_structure: (BlockStructureBlockData) collected block structure of the course
+
+    :returns: (dict) with total_block_types and block_keys of completable blocks, units of completable
+              blocks and display names of those units
+    """
     serialized_course_block_structure, course_blocks_keys = _serialize_course_block_structure(
-        request, course_block_structure)
+        get_request_or_stub(), course_block_structure)
     blocks = serialized_course_block_structure.get('blocks')
-    total_block_types = _accumulate_total_block_counts(
-        blocks.get(list(blocks.keys())[0]).get('block_counts')
+    units = {}
+    for block_key in course_blocks_keys:
+        unit_key = _get_unit_key(course_block_structure, block_key)
+        if unit_key:
+            units[block_key] = unit_key
+    return {
+        'total_block_types': _accumulate_total_block_counts(
+            blocks.get(list(blocks.keys())[0]).get('block_counts')
+        ),
+        'block_keys': course_blocks_keys,
+        'units': units,
+        'unit_display_names': {
+            unit_key: course_block_structure.get_xblock_field(unit_key, 'display_name')
+            for unit_key in set(units.values())
+        },
+    }
+
+
+def _get_course_block_data(course_key):
+    """
+    Get cached completable block data of a course, computing it from the collected block structure on a cache miss.
+    The data is cached per publish of the course, as recorded by its overview, so a cache hit never loads the
+    block structure. Data computed from a structure not yet updated after a publish is replaced by
+    refresh_course_block_data.
+
+    :param course_key: (CourseKey) course key
+
+    :returns: (dict) see _compute_course_block_data
+    """
+    cache_key = _course_block_totals_cache_key(CourseOverview.get_from_id(course_key))
+    block_data = cache.get(cache_key)
+    if block_data is None:
+        block_data = _compute_course_block_data(get_course_in_cache(course_key))
+        cache.set(cache_key, block_data, COURSE_BLOCK_TOTALS_CACHE_TIMEOUT)
+    return block_data
+
+
+def _get_courses_block_data(course_keys):
+    """
+    Get cached completable block data of many courses, with a single cache read for all of them, computing it only
+    for the courses missing from the cache.
+
+    :param course_keys: (iterable) course keys
+
+    :returns: (dict) block data against course key, see _compute_course_block_data
+    """
+    cache_keys = {
+        course_key: _course_block_totals_cache_key(course_overview)
+        for course_key, course_overview in CourseOverview.get_from_ids(course_keys).items()
+    }
+    cached_block_data = cache.get_many(list(cache_keys.values()))
+
+    courses_block_data = {}
+    missing_block_data = {}
+    for course_key, cache_key in cache_keys.items():
+        block_data = cached_block_data.get(cache_key)
+        if block_data is None:
+            block_data = missing_block_data[cache_key] = _compute_course_block_data(get_course_in_cache(course_key))
+        courses_block_data[course_key] = block_data
+    if missing_block_data:
+        cache.set_many(missing_block_data, COURSE_BLOCK_TOTALS_CACHE_TIMEOUT)
+
+    return courses_block_data
+
+
+def refresh_course_block_data(course_key, course_block_structure):
+    """
+    Recompute and cache completable block data of a course from its up to date collected block structure, i.e after
+    it is published
+
+    :param course_key: (CourseKey) course key
+    :param course_block_structure: (BlockStructureBlockData) collected block structure of the published course
+    """
+    cache.set(
+        _course_block_totals_cache_key(CourseOverview.get_from_id(course_key)),
+        _compute_course_block_data(course_block_structure),
+        COURSE_BLOCK_TOTALS_CACHE_TIMEOUT,
     )
+
+
+def get_course_block_totals(course_key):
+    """
+    Get accumulated completable block type totals and completable block keys of a course.
+    These are identical for every learner enrolled in the course, so they are cached per published
+    version of the course.
+
+    :param course_key: (CourseKey) course key
+
+    :returns: (dict, set) accumulated block type totals and completable block keys
+    """
+    block_data = _get_course_block_data(course_key)
+    return block_data['total_block_types'], block_data['block_keys']
+
+
+def get_completed_block_counts(course_key, block_keys, user_ids=None):
+    """
+    Count completed blocks of a course for many learners with a single grouped query
+
+    :param course_key: (CourseKey) course key
+    :param block_keys: (set) completable block keys of the course
+    :param user_ids: (list) ids of the learners to count for, all learners if None
+
+    :returns: (dict) completed block count against user id i.e {12: 40}
+    """
+    completions = BlockCompletion.objects.filter(context_key=course_key, block_key__in=block_keys)
+    if user_ids is not None:
+        completions = completions.filter(user_id__in=user_ids)
+
+    return dict(completions.values_list('user_id').annotate(completed=Count('id')).order_by())
+
+
+def get_progress_information(request, course_key):
+    course_key = CourseKey.from_string(course_key)
+    total_block_types, course_blocks_keys = get_course_block_totals(course_key)
     total_blocks = sum(total_block_types.values())
     completions = BlockCompletion.objects.filter(user=request.user, context_key=course_key,
                                                  block_key__in=course_blocks_keys)
@@ -462,6 +700,16 @@ def _calculate_percentage(completed_count, total_count):
     return format((completed_count / total_count) * 100, '.0f') if total_count > 0 else total_count
 
 
+def calculate_progress_percentage(completed_blocks, total_blocks):
+    """
+    Calculate progress percentage from completed and total block counters
+
+    :returns: (float) progress percentage i.e 70.0
+    """
+
+    return min(float(_calculate_percentage(completed_blocks, total_blocks)), 100.0)
+
+
 def _calculate_progress_for_block(block_info):
     total_blocks = block_info['total_blocks']
     total_completed_blocks = block_info['total_completed_blocks']
@@ -0,0 +1 @@
+default_app_config = 'openedx.features.pakx.lms.pakx_admin_app.apps.PakxAdminAppConfig'
@@ -5,3 +5,9 @@ class PakxAdminAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'openedx.features.pakx.lms.pakx_admin_app'
     verbose_name = 'PakistanX Admin Panel App'
+
+    def ready(self):
+        """
+        Connect signal handlers.
+        """
+        import openedx.features.pakx.lms.pakx_admin_app.signals.handlers  # pylint: disable=unused-import
@@ -0,0 +1,148 @@
+"""
+Bulk enrollment engine, enrolls a set of users in courses with batched inserts instead of one enroll call per pair
+"""
+from logging import getLogger
+
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models.signals import post_save
+from six import text_type
+
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from openedx.core.djangoapps.enrollments.api import _default_course_mode
+from student.models import (
+    EVENT_NAME_ENROLLMENT_ACTIVATED,
+    CourseEnrollment,
+    CourseEnrollmentAllowed,
+    EnrollStatusChange
+)
+
+log = getLogger(__name__)
+
+BULK_ENROLLMENT_BATCH_SIZE = 500
+COURSE_NOT_FOUND_REASON = 'Course does not exist'
+ENROLLMENT_CLOSED_REASON = 'Enrollment is closed'
+COURSE_FULL_REASON = 'Course has reached its maximum enrollment'
+ALREADY_ENROLLED_REASON = 'User is already enrolled'
+ENROLLMENT_ERROR_REASON = 'Enrollment could not be saved'
+ENROLLMENT_NOTIFICATION_ERROR_REASON = 'Enrollment was saved but its event or signal could not be sent'
+
+
+def _enrollment_failure(user, course_key, reason):
+    return {'user_id': user.id, 'course_key': text_type(course_key), 'reason': reason}
+
+
+def _link_course_enrollment_allowed(users, course_key):
+    """
+    link unlinked CourseEnrollmentAllowed records of the users, as done by CourseEnrollment.get_or_create_enrollment
+    """
+    users_by_email = {user.email: user for user in users}
+    allowed_enrollments = list(CourseEnrollmentAllowed.objects.filter(
+        email__in=users_by_email, course_id=course_key, user__isnull=True
+    ))
+    for cea in allowed_enrollments:
+        cea.user = users_by_email[cea.email]
+    CourseEnrollmentAllowed.objects.bulk_update(allowed_enrollments, ['user'])
+
+
+@transaction.atomic()
+def _create_enrollments(users, course_key, mode):
+    """
+    insert active enrollments for a batch of users and send the post_save signal for each of them,
+    bulk_create skips the receivers (history, schedules, forum roles, cohorts) that CourseEnrollment.save triggers
+    """
+    CourseEnrollment.objects.bulk_create([
+        CourseEnrollment(user=user, course_id=course_key, mode=mode, is_active=True) for user in users
+    ])
+    _link_course_enrollment_allowed(users, course_key)
+
+    # bulk_create does not set primary keys on MySQL, fetch the created enrollments back
+    users_by_id = {user.id: user for user in users}
+    enrollments = list(CourseEnrollment.objects.filter(course_id=course_key, user_id__in=users_by_id))
+    using = router.db_for_write(CourseEnrollment)
+    for enrollment in enrollments:
+        enrollment.user = users_by_id[enrollment.user_id]
+        enrollment._old_mode = None  # pylint: disable=protected-access
+        post_save.send(
+            sender=CourseEnrollment, instance=enrollment, created=True, update_fields=None, raw=False, using=using
+        )
+
+    cache.delete_many([CourseEnrollment.enrollment_status_hash_cache_key(user) for user in users])
+    return enrollments
+
+
+def bulk_enroll_users_in_course(users, course_key):
+    """
+    enroll users in a course, access checks and existing enrollments are resolved once for the whole set
+    and the missing enrollments are created in batches, each batch committed in its own transaction
+
+    :param users: (list<User>) users to enroll
+    :param course_key: (CourseKey) course key
+    :return: (list<User>, list<dict>) enrolled users and failures with user_id, course_key and reason
+    """
+    failures = []
+    course = CourseOverview.objects.filter(id=course_key).first()
+    if course is None:
+        return [], [_enrollment_failure(user, course_key, COURSE_NOT_FOUND_REASON) for user in users]
+
+    existing_enrollments = {
+        enrollment.user_id: enrollment
+        for enrollment in CourseEnrollment.objects.filter(course_id=course_key, user__in=users)
+    }
+
+    users_to_enroll = []
+    for user in users:
+        enrollment = existing_enrollments.get(user.id)
+        if enrollment and enrollment.is_active:
+            failures.append(_enrollment_failure(user, course_key, ALREADY_ENROLLED_REASON))
+        elif CourseEnrollment.is_enrollment_closed(user, course):
+            failures.append(_enrollment_failure(user, course_key, ENROLLMENT_CLOSED_REASON))
+        else:
+            users_to_enroll.append(user)
+
+    if course.max_student_enrollments_allowed is not None:
+        capacity = course.max_student_enrollments_allowed
+        available_seats = max(capacity - CourseEnrollment.objects.num_enrolled_in_exclude_admins(course_key), 0)
+        failures += [
+            _enrollment_failure(user, course_key, COURSE_FULL_REASON) for user in users_to_enroll[available_seats:]
+        ]
+        users_to_enroll = users_to_enroll[:available_seats]
+
+    mode = _default_course_mode(text_type(course_key))
+    enrolled_users, new_users = [], []
+    for user in users_to_enroll:
+        if user.id in existing_enrollments:
+            # inactive enrollments are reactivated through the regular path, there is an existing row to update
+            try:
+                CourseEnrollment.enroll(user, course_key, mode=mode)
+            except Exception:  # pylint: disable=broad-except
+                log.exception('Failed to reactivate enrollment of user:{} in course:{}'.format(user.id, course_key))
+                failures.append(_enrollment_failure(user, course_key, ENROLLMENT_ERROR_REASON))
+                continue
+            enrolled_users.append(user)
+        else:
+            new_users.append(user)
+
+    for index in range(0, len(new_users), BULK_ENROLLMENT_BATCH_SIZE):
+        batch = new_users[index:index + BULK_ENROLLMENT_BATCH_SIZE]
+        try:
+            enrollments = _create_enrollments(batch, course_key, mode)
+        except Exception:  # pylint: disable=broad-except
+            # post_save receivers run inside the batch transaction, any of them failing rolls the batch back
+            log.exception('Failed to enroll a batch of {} users in course:{}'.format(len(batch), course_key))
+            failures += [_enrollment_failure(user, course_key, ENROLLMENT_ERROR_REASON) for user in batch]
+            continue
+
+        for enrollment in enrollments:
+            try:
+                enrollment.emit_event(EVENT_NAME_ENROLLMENT_ACTIVATED)
+                enrollment.send_signal(EnrollStatusChange.enroll)
+            except Exception:  # pylint: disable=broad-except
+                log.exception('Failed to notify enrollment of user:{} in course:{}'.format(
+                    enrollment.user_id, course_key
+                ))
+                failures.append(_enrollment_failure(enrollment.user, course_key, ENROLLMENT_NOTIFICATION_ERROR_REASON))
+                continue
+            enrolled_users.append(enrollment.user)
+
+    return enrolled_users, failures
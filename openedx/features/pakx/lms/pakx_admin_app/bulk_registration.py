@@ -0,0 +1,210 @@
+"""
+Bulk user registration engine, validates a whole registration file up front and creates its users in chunks
+"""
+from uuid import uuid4
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from organizations.models import Organization
+from rest_framework import serializers
+
+from openedx.core.djangoapps.site_configuration import helpers as configuration_helpers
+from student.models import (
+    ALLOWEDTOENROLL_TO_ENROLLED,
+    CourseEnrollment,
+    CourseEnrollmentAllowed,
+    LanguageProficiency,
+    ManualEnrollmentAudit,
+    Registration,
+    UserProfile,
+    UserSignupSource
+)
+
+from .constants import GROUP_ORGANIZATION_ADMIN, GROUP_TRAINING_MANAGERS, ORG_ADMIN, TRAINING_MANAGER
+from .serializers import UserProfileSerializer, UserSerializer
+
+BULK_REGISTRATION_CHUNK_SIZE = 500
+EMAIL_EXISTS_ERROR_MSG = 'Email already exists'
+USERNAME_EXISTS_ERROR_MSG = 'A user with that username already exists.'
+DUPLICATE_EMAIL_ERROR_MSG = 'Email is used by another row of the file'
+DUPLICATE_USERNAME_ERROR_MSG = 'Username is used by another row of the file'
+INVALID_ORGANIZATION_ERROR_MSG = 'Organization does not exist'
+CHUNK_CREATION_ERROR_MSG = 'User could not be created, please try again'
+
+
+class BulkUserProfileSerializer(UserProfileSerializer):
+    """
+    Profile serializer for bulk registration, organization existence is checked for the whole file at once
+    """
+    organization = serializers.IntegerField()
+
+
+class BulkUserSerializer(UserSerializer):
+    """
+    User serializer for bulk registration, it only validates a row and leaves the uniqueness checks
+    to set based queries over the whole file, users are created with create_bulk_registration_users
+    """
+    profile = BulkUserProfileSerializer(required=True)
+
+    class Meta(UserSerializer.Meta):
+        extra_kwargs = {'username': {'validators': [User.username_validator]}}
+
+    def validate_email(self, value):
+        if not value.strip():
+            raise serializers.ValidationError('This field required!')
+
+        return value.lower()
+
+
+def _add_row_error(error_map, index, user_data, field, message, profile_field=False):
+    errors = error_map.setdefault(index, {'response_errors': {}, 'req_data': user_data})['response_errors']
+    if profile_field:
+        errors = errors.setdefault('profile', {})
+    errors.setdefault(field, []).append(message)
+
+
+def validate_bulk_registration_data(users_data):
+    """
+    validate all rows of a bulk registration file, uniqueness of emails/usernames and existence of
+    organizations are checked with one query each instead of per row
+
+    :param users_data: (list<dict>) users data as returned by get_user_data_from_bulk_registration_file
+    :return: (list, dict) list of (index, validated data) of valid rows and error map of invalid rows by index
+    """
+    rows, error_map = [], {}
+    for idx, user_data in enumerate(users_data, start=1):
+        user_data['password'] = uuid4().hex[:8]
+        user_serializer = BulkUserSerializer(data=user_data)
+        if user_serializer.is_valid():
+            rows.append((idx, user_data, user_serializer.validated_data))
+        else:
+            error_map[idx] = {'response_errors': {**user_serializer.errors}, 'req_data': user_data}
+
+    emails = {data['email'] for _, _, data in rows}
+    usernames = {data['username'] for _, _, data in rows}
+    org_ids = {data['profile']['organization'] for _, _, data in rows}
+
+    existing_emails = {email.lower() for email in User.objects.filter(
+        email__in=emails
+    ).values_list('email', flat=True)}
+    existing_usernames = {username.lower() for username in User.objects.filter(
+        username__in=usernames
+    ).values_list('username', flat=True)}
+    existing_org_ids = set(Organization.objects.filter(id__in=org_ids).values_list('id', flat=True))
+
+    seen_emails, seen_usernames = set(), set()
+    for idx, user_data, data in rows:
+        email, username = data['email'], data['username'].lower()
+        if email in existing_emails:
+            _add_row_error(error_map, idx, user_data, 'email', EMAIL_EXISTS_ERROR_MSG)
+        elif email in seen_emails:
+            _add_row_error(error_map, idx, user_data, 'email', DUPLICATE_EMAIL_ERROR_MSG)
+        if username in existing_usernames:
+            _add_row_error(error_map, idx, user_data, 'username', USERNAME_EXISTS_ERROR_MSG)
+        elif username in seen_usernames:
+            _add_row_error(error_map, idx, user_data, 'username', DUPLICATE_USERNAME_ERROR_MSG)
+        if data['profile']['organization'] not in existing_org_ids:
+            _add_row_error(error_map, idx, user_data, 'organization', INVALID_ORGANIZATION_ERROR_MSG, True)
+
+        seen_emails.add(email)
+        seen_usernames.add(username)
+
+    valid_rows = [(idx, data) for idx, _, data in rows if idx not in error_map]
+    return valid_rows, error_map
+
+
+def get_role_group_ids():
+    return dict(Group.objects.filter(
+        name__in=[GROUP_ORGANIZATION_ADMIN, GROUP_TRAINING_MANAGERS]
+    ).values_list('name', 'id'))
+
+
+def _auto_enroll_allowed_users(users):
+    """
+    enroll new users in courses they are allowed to auto enroll, bulk created users skip the
+    post_save handler of User which does this for users created one at a time
+    """
+    users_by_email = {user.email: user for user in users}
+    allowed_enrollments = CourseEnrollmentAllowed.objects.filter(email__in=users_by_email, auto_enroll=True)
+    for cea in allowed_enrollments:
+        user = users_by_email[cea.email]
+        enrollment = CourseEnrollment.enroll(user, cea.course_id)
+
+        manual_enrollment_audit = ManualEnrollmentAudit.get_manual_enrollment_by_email(user.email)
+        if manual_enrollment_audit is not None:
+            ManualEnrollmentAudit.create_manual_enrollment_audit(
+                manual_enrollment_audit.enrolled_by,
+                user.email,
+                ALLOWEDTOENROLL_TO_ENROLLED,
+                manual_enrollment_audit.reason,
+                enrollment
+            )
+
+
+@transaction.atomic()
+def create_bulk_registration_users(rows, role_group_ids=None):
+    """
+    bulk create users, their registrations, roles, profiles and language proficiencies for a chunk
+    of validated rows in one transaction
+
+    :param rows: (list<dict>) validated data of rows
+    :param role_group_ids: (dict) group ids by name for roles, fetched if None
+    :return: (list<tuple>) list of (user, password) of the created users
+    """
+    if role_group_ids is None:
+        role_group_ids = get_role_group_ids()
+
+    new_users = []
+    for data in rows:
+        f_name, *l_names = data['profile']['name'].split()
+        new_users.append(User(
+            username=data['username'],
+            email=data['email'],
+            first_name=f_name,
+            last_name=' '.join(l_names),
+            password=make_password(data['password']),
+            is_active=True,
+        ))
+
+    User.objects.bulk_create(new_users, batch_size=BULK_REGISTRATION_CHUNK_SIZE)
+    # bulk_create does not set primary keys on MySQL, fetch the created users back
+    users = {user.username: user for user in User.objects.filter(
+        username__in=[data['username'] for data in rows]
+    )}
+
+    Registration.objects.bulk_create(
+        [Registration(user=user, activation_key=uuid4().hex) for user in users.values()]
+    )
+
+    role_groups = {ORG_ADMIN: GROUP_ORGANIZATION_ADMIN, TRAINING_MANAGER: GROUP_TRAINING_MANAGERS}
+    User.groups.through.objects.bulk_create([
+        User.groups.through(user_id=users[data['username']].id, group_id=role_group_ids[role_groups[data['role']]])
+        for data in rows if data['role'] in role_groups
+    ])
+
+    UserProfile.objects.bulk_create([
+        UserProfile(
+            user=users[data['username']],
+            name=data['profile']['name'],
+            employee_id=data['profile'].get('employee_id') or '',
+            organization_id=data['profile']['organization'],
+        ) for data in rows
+    ])
+    profile_ids = dict(UserProfile.objects.filter(
+        user__in=users.values()
+    ).values_list('user__username', 'id'))
+
+    LanguageProficiency.objects.bulk_create([
+        LanguageProficiency(
+            user_profile_id=profile_ids[data['username']], code=data['profile']['language_code']['code']
+        ) for data in rows if data['profile'].get('language_code')
+    ])
+
+    site = configuration_helpers.get_value('SITE_NAME')
+    if site:
+        UserSignupSource.objects.bulk_create([UserSignupSource(user=user, site=site) for user in users.values()])
+
+    _auto_enroll_allowed_users(users.values())
+
+    return [(users[data['username']], data['password']) for data in rows]
@@ -4,6 +4,11 @@ Constants for the need of Admin Panel
 GROUP_TRAINING_MANAGERS = 'Training Manager'
 GROUP_ORGANIZATION_ADMIN = 'Organization Admins'
 BULK_REGISTRATION_TASK_SUCCESS_MSG = 'Task has been started successfully. You will receive the stats email shortly.'
+BULK_REGISTRATION_PROGRESS_MSG = 'Processed chunk {chunk_number} of {chunks_count}, ' \
+                                 '{created_count} of {total_count} users have been created so far.'
+CSV_EXPORT_TASK_SUCCESS_MSG = 'Export has been started successfully. ' \
+                              'You will receive the download link via email shortly.'
+CSV_EXPORT_CHUNK_SIZE = 500
 SELF_ACTIVE_STATUS_CHANGE_ERROR_MSG = "User can't change their own activation status."
 ENROLLMENT_COURSE_EXPIRED_MSG = 'Enrollment date is passed for selected courses. ' \
                                 'Refresh the page to get the updated course list.'
@@ -0,0 +1,36 @@
+"""
+Management command to materialize organization course stats for the admin panel analytics.
+"""
+from logging import getLogger
+
+from django.core.management.base import BaseCommand
+
+from openedx.features.pakx.lms.pakx_admin_app.tasks import (
+    refresh_organization_course_stats,
+    rollup_daily_organization_course_stats
+)
+
+log = getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    A management command that rolls up organization course stats for today, or only refreshes dirty stats.
+    """
+
+    help = 'Rollup organization course stats for today or refresh only dirty stats'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dirty-only',
+            action='store_true',
+            help='Only recount stats marked dirty by learner progress changes',
+        )
+
+    def handle(self, *args, **options):
+        if options['dirty_only']:
+            log.info('Starting command to refresh dirty organization course stats')
+            refresh_organization_course_stats()
+        else:
+            log.info('Starting command to rollup organization course stats')
+            rollup_daily_organization_course_stats()
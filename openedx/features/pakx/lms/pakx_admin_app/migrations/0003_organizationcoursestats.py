@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16 on 2026-10-18 10:41
+
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course_overviews', '0022_courseoverviewtab_is_hidden'),
+        ('organizations', '0001_squashed_0007_historicalorganization'),
+        ('pakx_admin_app', '0002_auto_20210616_1624'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrganizationCourseStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('date', models.DateField(db_index=True)),
+                ('in_progress', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('is_dirty', models.BooleanField(db_index=True, default=True)),
+                ('course', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='organization_stats', to='course_overviews.CourseOverview')),
+                ('organization', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='course_stats', to='organizations.Organization')),
+            ],
+            options={
+                'verbose_name_plural': 'Organization Course Stats',
+                'unique_together': {('organization', 'course', 'date')},
+            },
+        ),
+    ]
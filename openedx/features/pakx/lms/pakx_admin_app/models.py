@@ -1,2 +1,34 @@
+"""
+Models for Admin Panel app
+"""
 
-# Create your models here.
+from django.db import models
+from model_utils.models import TimeStampedModel
+from organizations.models import Organization
+
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+
+
+class OrganizationCourseStats(TimeStampedModel):
+    """
+    Daily rollup of learner progress counts per organization and course, read by the admin panel analytics APIs.
+    Rows of the latest date are kept up to date incrementally from CourseProgressStats changes.
+    """
+
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name='course_stats', null=True, blank=True
+    )
+    course = models.ForeignKey(
+        CourseOverview, db_constraint=False, on_delete=models.DO_NOTHING, related_name='organization_stats'
+    )
+    date = models.DateField(db_index=True)
+    in_progress = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    is_dirty = models.BooleanField(db_index=True, default=True)
+
+    class Meta:
+        unique_together = ('organization', 'course', 'date')
+        verbose_name_plural = 'Organization Course Stats'
+
+    def __str__(self):
+        return '{} - {} ({})'.format(self.organization_id, self.course_id, self.date)
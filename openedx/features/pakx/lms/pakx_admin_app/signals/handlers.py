@@ -0,0 +1,44 @@
+"""
+Admin panel analytics related signal handlers.
+"""
+
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from openedx.features.pakx.lms.overrides.models import CourseProgressStats
+from openedx.features.pakx.lms.pakx_admin_app.utils import mark_organization_course_stats_dirty
+
+
+@receiver(post_init, sender=CourseProgressStats, dispatch_uid="pakx_admin_app.track_progress_email_reminder_status")
+def track_progress_email_reminder_status(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Remember the loaded completion status of a progress record, so that saves can tell if it has changed
+    """
+    # pylint: disable=protected-access
+    instance._loaded_email_reminder_status = instance.__dict__.get('email_reminder_status')
+
+
+@receiver(post_save, sender=CourseProgressStats, dispatch_uid="pakx_admin_app.mark_stats_dirty_on_progress_save")
+def mark_stats_dirty_on_progress_save(sender, instance, created, **kwargs):  # pylint: disable=unused-argument
+    """
+    Mark organization course stats dirty when a learner is enrolled or their completion status changes
+    """
+    update_fields = kwargs.get('update_fields')
+    if not created and update_fields and 'email_reminder_status' not in update_fields:
+        return
+
+    # pylint: disable=protected-access
+    loaded_status = instance._loaded_email_reminder_status
+    instance._loaded_email_reminder_status = instance.email_reminder_status
+    if not created and loaded_status == instance.email_reminder_status:
+        return
+
+    mark_organization_course_stats_dirty(instance.enrollment_id, create_missing=created)
+
+
+@receiver(post_delete, sender=CourseProgressStats, dispatch_uid="pakx_admin_app.mark_stats_dirty_on_progress_delete")
+def mark_stats_dirty_on_progress_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Mark organization course stats dirty when a learner is unenrolled
+    """
+    mark_organization_course_stats_dirty(instance.enrollment_id)
@@ -1,25 +1,44 @@
 """Celery tasks to enroll users in courses and send registration email"""
 
+from io import TextIOWrapper
 from logging import getLogger
+from tempfile import TemporaryFile
 
 from celery import task
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.sites.models import Site
+from django.core.files import File
 from django.core.mail.message import EmailMultiAlternatives
-from django.db import DatabaseError, transaction
+from django.db import DatabaseError
+from django.test import RequestFactory
 from django.urls import reverse
+from django.utils import timezone
 from edx_ace import Recipient, ace
 from opaque_keys.edx.keys import CourseKey
 
+from lms.djangoapps.instructor_task.models import ReportStore
 from openedx.core.djangoapps.ace_common.template_context import get_base_template_context
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from openedx.core.djangoapps.site_configuration import helpers as configuration_helpers
 from openedx.core.lib.celery.task_utils import emulate_http_request
-from student.models import CourseEnrollment
 
+from .bulk_enrollment import bulk_enroll_users_in_course
+from .bulk_registration import (
+    BULK_REGISTRATION_CHUNK_SIZE,
+    CHUNK_CREATION_ERROR_MSG,
+    create_bulk_registration_users,
+    get_role_group_ids,
+    validate_bulk_registration_data
+)
+from .constants import BULK_REGISTRATION_PROGRESS_MSG
 from .message_types import EnrolmentNotification
-from .utils import create_user, get_org_users_qs
+from .utils import (
+    get_org_users_qs,
+    refresh_dirty_organization_course_stats,
+    rollup_organization_course_stats,
+    send_registration_email
+)
 
 log = getLogger(__name__)
 
@@ -49,9 +68,9 @@ def send_course_enrolment_email(request_user_id, email_context_map):
             ace.send(message)
 
 
-def send_bulk_registration_stats_email(email_msg, recipient):
+def send_bulk_registration_stats_email(email_msg, recipient, subject='User Bulk Registration Stats'):
     email_msg = EmailMultiAlternatives(
-        to=[recipient], body=email_msg, subject='User Bulk Registration Stats',
+        to=[recipient], body=email_msg, subject=subject,
     )
     try:
         email_msg.send()
@@ -59,6 +78,26 @@ def send_bulk_registration_stats_email(email_msg, recipient):
         log.exception('Failed to send registration stats email to {}'.format(recipient))
 
 
+def send_registration_emails(request_user, created_users, request_url_scheme):
+    """
+    send registration emails to a chunk of newly registered users, emails are sent in process so that
+    their passwords never leave the bulk registration task
+    :param request_user: (User) user who registered the users
+    :param created_users: (list<tuple>) list of (user, password) pairs
+    :param request_url_scheme: variable containing http or https
+    """
+    site = Site.objects.get_current()
+    passwords = {user.id: password for user, password in created_users}
+    users = User.objects.filter(id__in=passwords).select_related('profile')
+    next_url = reverse('account_settings')
+    with emulate_http_request(site, request_user):
+        for user in users:
+            try:
+                send_registration_email(user, passwords[user.id], request_url_scheme, next_url=next_url)
+            except Exception:  # pylint: disable=broad-except
+                log.exception('Failed to send registration email to user:{}'.format(user.id))
+
+
 @task(name='bulk_user_registration')
 def bulk_user_registration(users_data, recipient, request_url_scheme):
     def get_formatted_error_msg(errors, index):
@@ -82,21 +121,41 @@ def bulk_user_registration(users_data, recipient, request_url_scheme):
         user_key = req_data['email'] or req_data['username'] or profile_req_data.get('name') or index
         return {'msg': '\n'.join(formatted_errors), 'user_key': user_key}
 
-    error_map = {}
     created_emails = []
-    site = Site.objects.get_current()
     req_user = User.objects.get(email=recipient)
+    valid_rows, error_map = validate_bulk_registration_data(users_data)
+    role_group_ids = get_role_group_ids()
 
-    for idx, user in enumerate(users_data, start=1):
-        with emulate_http_request(site, req_user):
-            is_created, user_data = create_user(user, request_url_scheme, next_url=reverse('account_settings'))
-        if is_created:
-            created_emails.append(user_data.email)
-        else:
-            error_map[idx] = {'response_errors': user_data, 'req_data': user}
+    chunk_size = BULK_REGISTRATION_CHUNK_SIZE
+    chunks_count = (len(valid_rows) + chunk_size - 1) // chunk_size
+    for chunk_number, index in enumerate(range(0, len(valid_rows), chunk_size), start=1):
+        chunk = valid_rows[index:index + chunk_size]
+        try:
+            created_users = create_bulk_registration_users([data for _, data in chunk], role_group_ids)
+        except DatabaseError:
+            log.exception('Failed to create users chunk {} of bulk registration by {}'.format(chunk_number, recipient))
+            for idx, data in chunk:
+                error_map[idx] = {
+                    'response_errors': {'email': [CHUNK_CREATION_ERROR_MSG]},
+                    'req_data': users_data[idx - 1],
+                }
+            created_users = []
+
+        created_emails += [user.email for user, _ in created_users]
+        send_registration_emails(req_user, created_users, request_url_scheme)
+
+        if chunks_count > 1:
+            send_bulk_registration_stats_email(
+                BULK_REGISTRATION_PROGRESS_MSG.format(
+                    chunk_number=chunk_number, chunks_count=chunks_count,
+                    created_count=len(created_emails), total_count=len(users_data)
+                ),
+                recipient,
+                subject='User Bulk Registration Progress'
+            )
 
     err_msg_t = "User's email/username/name or index in file: {user_key}\n{msg}"
-    errors_msg = [err_msg_t.format(**get_formatted_error_msg(err, index)) for index, err in error_map.items()]
+    errors_msg = [err_msg_t.format(**get_formatted_error_msg(err, index)) for index, err in sorted(error_map.items())]
 
     success_msg_t = 'The following users have been created:\n{}'
     success_msg = success_msg_t.format('\n'.join(['email: {}'.format(email) for email in created_emails] or ['N/A']))
@@ -112,32 +171,107 @@ def enroll_users(request_user_id, user_ids, course_keys_string):
     :param request_user_id: (int) request user id
     :param user_ids: (list<int>) user ids
     :param course_keys_string: (list<string>) course key
+    :return: (list<dict>) failed enrollments with user_id, course_key and reason
     """
     request_user = User.objects.filter(id=request_user_id).first()
-    if request_user:
-        enrolled_email_data = []
-        site = Site.objects.get_current()
-        users_to_enroll = get_org_users_qs(request_user).filter(id__in=user_ids)
-        try:
-            with transaction.atomic():
-                for course_key_string in course_keys_string:
-                    course_key = CourseKey.from_string(course_key_string)
-                    course_overview = CourseOverview.objects.get(id=CourseKey.from_string(course_key_string))
-                    email_context = {
-                        'course': course_overview.display_name,
-                        'image_url': 'https://' + site.domain + course_overview.course_image_url,
-                        'url': "https://{}/courses/{}/overview".format(site.domain, course_key_string),
-                    }
-                    for user in users_to_enroll:
-                        try:
-                            CourseEnrollment.enroll(user, course_key, check_access=True)
-                            context = get_base_template_context(site, user=user)
-                            context.update(email_context)
-                            enrolled_email_data.append(context)
-                        except Exception:  # pylint: disable=broad-except
-                            pass
-            send_course_enrolment_email.delay(request_user_id, enrolled_email_data)
-        except DatabaseError:
-            log.info("Task terminated!")
-    else:
+    if not request_user:
         log.info("Invalid request user id - Task terminated!")
+        return []
+
+    enrolled_email_data, failures = [], []
+    site = Site.objects.get_current()
+    users_to_enroll = list(
+        get_org_users_qs(request_user).filter(id__in=user_ids).select_related('profile__organization')
+    )
+    user_contexts = {}
+    for course_key_string in course_keys_string:
+        course_key = CourseKey.from_string(course_key_string)
+        enrolled_users, course_failures = bulk_enroll_users_in_course(users_to_enroll, course_key)
+        failures += course_failures
+        if not enrolled_users:
+            continue
+
+        course_overview = CourseOverview.objects.get(id=course_key)
+        email_context = {
+            'course': course_overview.display_name,
+            'image_url': 'https://' + site.domain + course_overview.course_image_url,
+            'url': "https://{}/courses/{}/overview".format(site.domain, course_key_string),
+        }
+        for user in enrolled_users:
+            if user.id not in user_contexts:
+                user_contexts[user.id] = get_base_template_context(site, user=user)
+            context = dict(user_contexts[user.id])
+            context.update(email_context)
+            enrolled_email_data.append(context)
+
+    if enrolled_email_data:
+        send_course_enrolment_email.delay(request_user_id, enrolled_email_data)
+    if failures:
+        log.info("Failed to create {} enrollments requested by user:{}".format(len(failures), request_user_id))
+    return failures
+
+
+@task(name='rollup_daily_organization_course_stats')
+def rollup_daily_organization_course_stats():
+    """
+    Materialize organization course stats of all organizations & courses for today,
+    scheduled daily through CELERYBEAT_SCHEDULE
+    """
+    rollup_organization_course_stats()
+
+
+@task(name='refresh_organization_course_stats')
+def refresh_organization_course_stats():
+    """
+    Recount organization course stats marked dirty by learner progress changes,
+    scheduled every ORGANIZATION_COURSE_STATS_REFRESH_MINUTES through CELERYBEAT_SCHEDULE
+    """
+    refresh_dirty_organization_course_stats()
+
+
+@task(name='export_csv_report')
+def export_csv_report(request_user_id, mode_name, query_params):
+    """
+    Write a learner or course stats CSV to report storage and email its download link to the requester
+    :param request_user_id: (int) request user id
+    :param mode_name: (str) export mode i.e learner or course
+    :param query_params: (dict) query params of the download request, containing search & progress filters
+    """
+    from .views import DownloadCSVView
+
+    request_user = User.objects.filter(id=request_user_id).first()
+    if not request_user:
+        log.info("Invalid request user id - Task terminated!")
+        return
+
+    request = RequestFactory().get('/', query_params)
+    request.user = request_user
+    view = DownloadCSVView()
+    view.request = request
+    mode = view.modes[mode_name]
+
+    report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+    report_path = report_store.path_to(
+        'pakx_admin_app/{}'.format(request_user.profile.organization_id),
+        '{}_{}'.format(timezone.now().strftime('%Y-%m-%d-%H%M%S'), mode['filename'].replace(' ', '_')),
+    )
+    with TemporaryFile() as report_file:
+        text_file = TextIOWrapper(report_file, encoding='utf-8-sig', newline='')
+        for _ in view.write_rows(mode, text_file):
+            pass
+        text_file.flush()
+        report_file.seek(0)
+        report_path = report_store.storage.save(report_path, File(report_file))
+        text_file.detach()
+
+    email_msg = EmailMultiAlternatives(
+        to=[request_user.email],
+        body='Your requested {} is ready, download it from: {}'.format(
+            mode['filename'], report_store.storage.url(report_path)
+        ),
+        subject=mode['filename'],
+    )
+    try:
+        email_msg.send()
+    except Exception:  # pylint: disable=broad-except
+        log.exception('Failed to send CSV export email to {}'.format(request_user.email))
@@ -9,8 +9,10 @@ import pytz
 from django.conf import settings
 from django.contrib.auth.models import Group, User
 from django.contrib.sites.models import Site
-from django.db.models import Count, Q
+from django.db.models import Count, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.urls import reverse
+from django.utils import timezone
 from edx_ace import ace
 from edx_ace.recipient import Recipient
 
@@ -18,10 +20,13 @@ from openedx.core.djangoapps.ace_common.template_context import get_base_templat
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from openedx.core.djangoapps.site_configuration import helpers as configuration_helpers
 from openedx.features.pakx.lms.overrides.models import CourseProgressStats
-from student.models import Registration
+from student.models import CourseEnrollment, Registration
 
 from .constants import GROUP_ORGANIZATION_ADMIN, GROUP_TRAINING_MANAGERS, LEARNER, ORG_ADMIN, TRAINING_MANAGER
 from .message_types import RegistrationNotification
+from .models import OrganizationCourseStats
+
+ORGANIZATION_COURSE_STATS_BATCH_SIZE = 500
 
 
 def get_user_org_filter(user):
@@ -49,11 +54,14 @@ def get_user_same_org_filter(user):
     return Q(profile__organization__short_name__iregex=get_user_org(user))
 
 
+def get_dummy_emails_filter(prefix=''):
+    """get filter matching dummy emails of users, fields are looked up through given prefix"""
+    return Q(**{prefix + 'email__icontains': 'fake'}) | Q(**{prefix + 'email__icontains': 'example'})
+
+
 def get_learners_filter():
     """get learners filter, excludes dummy emails & add org condition """
-    return Q(
-        Q(is_superuser=False) & Q(is_staff=False) & ~(Q(email__icontains='fake') | Q(email__icontains='example'))
-    )
+    return Q(Q(is_superuser=False) & Q(is_staff=False) & ~get_dummy_emails_filter())
 
 
 def get_user_enrollment_same_org_filter(user):
@@ -170,7 +178,7 @@ def get_registration_email_message_context(user, password, protocol, is_public_r
     return message_context
 
 
-def get_completed_course_count_filters(exclude_staff_superuser=True, req_user=None):
+def get_completed_course_count_filters(exclude_staff_superuser=True, req_user=None, exclude_dummy_emails=False):
     completed = Q(
         Q(courseenrollment__enrollment_stats__email_reminder_status=CourseProgressStats.COURSE_COMPLETED) &
         Q(courseenrollment__is_active=True)
@@ -182,6 +190,8 @@ def get_completed_course_count_filters(exclude_staff_superuser=True, req_user=No
 
     is_exclude = not exclude_staff_superuser
     learners = Q(courseenrollment__user__is_staff=is_exclude) & Q(courseenrollment__user__is_superuser=is_exclude)
+    if exclude_dummy_emails:
+        learners = Q(learners & ~get_dummy_emails_filter('courseenrollment__user__'))
 
     if req_user and not req_user.is_superuser:
         learners = Q(learners & get_user_enrollment_same_org_filter(req_user))
@@ -278,3 +288,162 @@ def send_registration_email(user, password, protocol, is_public_registration=Fal
         ),
     )
     ace.send(message)
+
+
+def get_latest_organization_course_stats_date():
+    """
+    return the latest day that organization course stats are materialized for
+    """
+    return OrganizationCourseStats.objects.aggregate(latest=Max('date'))['latest']
+
+
+def get_organization_course_stats_qs(user, date):
+    """
+    return organization course stats of the given day visible to the given user, same org filter as
+    get_completed_course_count_filters is applied for non superusers
+    """
+    queryset = OrganizationCourseStats.objects.filter(date=date)
+    if not user.is_superuser:
+        user_org = get_user_org(user)
+        queryset = queryset.filter(organization__short_name__iregex=user_org, course__org__iregex=user_org)
+
+    return queryset
+
+
+def get_course_stats_totals(user):
+    """
+    return completed & in progress learners enrollments totals visible to the given user, read from the latest
+    organization course stats, or counted from enrollments until the first rollup materializes them
+
+    :return: (dict) {'completions': 1, 'pending': 3}
+    """
+    latest_date = get_latest_organization_course_stats_date()
+    if latest_date is None:
+        completed_count, in_progress_count = get_completed_course_count_filters(req_user=user)
+        return get_org_users_qs(user).aggregate(completions=completed_count, pending=in_progress_count)
+
+    return get_organization_course_stats_qs(user, latest_date).aggregate(
+        completions=Sum('completed'), pending=Sum('in_progress')
+    )
+
+
+def get_course_stats_annotations(user):
+    """
+    return in progress & completed annotations for CourseOverview queryset read from the latest organization
+    course stats, or counted from enrollments until the first rollup materializes them
+    """
+    latest_date = get_latest_organization_course_stats_date()
+    if latest_date is None:
+        completed_count, in_progress_count = get_completed_course_count_filters(
+            req_user=user, exclude_dummy_emails=True
+        )
+        return in_progress_count, completed_count
+
+    stats_qs = get_organization_course_stats_qs(user, latest_date).filter(course=OuterRef('pk')).values('course')
+    in_progress = stats_qs.annotate(total=Sum('in_progress')).values('total')
+    completed = stats_qs.annotate(total=Sum('completed')).values('total')
+    return Coalesce(Subquery(in_progress), 0), Coalesce(Subquery(completed), 0)
+
+
+def compute_organization_course_stats(enrollments=None):
+    """
+    count completed & in progress learners enrollments grouped by organization & course, learners are
+    counted the same way as get_org_users_qs i.e. active enrollments of non staff users without dummy emails
+    :param enrollments: CourseEnrollment queryset to count, all enrollments if None
+
+    :return: (dict) {(organization_id, course_id): {'completed': 1, 'in_progress': 3}}
+    """
+    enrollments = CourseEnrollment.objects.all() if enrollments is None else enrollments
+    enrollments = enrollments.filter(
+        is_active=True, user__is_staff=False, user__is_superuser=False
+    ).exclude(get_dummy_emails_filter('user__'))
+    course_stats = enrollments.values('user__profile__organization_id', 'course_id').annotate(
+        completed=Count(
+            'id', filter=Q(enrollment_stats__email_reminder_status=CourseProgressStats.COURSE_COMPLETED)
+        ),
+        in_progress=Count(
+            'id', filter=Q(enrollment_stats__email_reminder_status__lt=CourseProgressStats.COURSE_COMPLETED)
+        ),
+    ).order_by()
+
+    return {
+        (stats['user__profile__organization_id'], stats['course_id']): {
+            'completed': stats['completed'], 'in_progress': stats['in_progress']
+        } for stats in course_stats
+    }
+
+
+def rollup_organization_course_stats(date=None):
+    """
+    materialize organization course stats of all organizations & courses for the given day
+    :param date: (date) day of the rollup, today if None
+    """
+    date = date or timezone.now().date()
+    course_stats = compute_organization_course_stats()
+    existing_stats = {
+        (stats.organization_id, stats.course_id): stats
+        for stats in OrganizationCourseStats.objects.filter(date=date)
+    }
+
+    stats_to_create = []
+    for (organization_id, course_id), counts in course_stats.items():
+        if (organization_id, course_id) not in existing_stats:
+            stats_to_create.append(OrganizationCourseStats(
+                organization_id=organization_id, course_id=course_id, date=date, is_dirty=False, **counts
+            ))
+
+    # existing stats of organizations & courses without any learner left are reset to zero
+    for key, stats in existing_stats.items():
+        counts = course_stats.get(key, {'completed': 0, 'in_progress': 0})
+        stats.completed, stats.in_progress, stats.is_dirty = counts['completed'], counts['in_progress'], False
+
+    OrganizationCourseStats.objects.bulk_create(stats_to_create, batch_size=ORGANIZATION_COURSE_STATS_BATCH_SIZE)
+    OrganizationCourseStats.objects.bulk_update(
+        list(existing_stats.values()), ['completed', 'in_progress', 'is_dirty'],
+        batch_size=ORGANIZATION_COURSE_STATS_BATCH_SIZE
+    )
+
+
+def refresh_dirty_organization_course_stats():
+    """
+    recount only organization course stats that were marked dirty by learners progress changes
+    """
+    dirty_stats = list(OrganizationCourseStats.objects.filter(is_dirty=True))
+    for index in range(0, len(dirty_stats), ORGANIZATION_COURSE_STATS_BATCH_SIZE):
+        stats_batch = dirty_stats[index:index + ORGANIZATION_COURSE_STATS_BATCH_SIZE]
+        organization_ids = {stats.organization_id for stats in stats_batch}
+        organizations_filter = Q(user__profile__organization_id__in=[org for org in organization_ids if org])
+        if None in organization_ids:
+            organizations_filter |= Q(user__profile__organization__isnull=True)
+
+        course_stats = compute_organization_course_stats(CourseEnrollment.objects.filter(
+            organizations_filter, course_id__in={stats.course_id for stats in stats_batch}
+        ))
+        for stats in stats_batch:
+            counts = course_stats.get((stats.organization_id, stats.course_id), {'completed': 0, 'in_progress': 0})
+            stats.completed, stats.in_progress, stats.is_dirty = counts['completed'], counts['in_progress'], False
+
+        OrganizationCourseStats.objects.bulk_update(stats_batch, ['completed', 'in_progress', 'is_dirty'])
+
+
+def mark_organization_course_stats_dirty(enrollment_id, create_missing=False):
+    """
+    mark latest organization course stats of an enrollment's organization & course dirty
+    :param enrollment_id: (int) CourseEnrollment id
+    :param create_missing: (bool) create the stats if the organization & course has none yet on the latest date
+    """
+    enrollment = CourseEnrollment.objects.filter(id=enrollment_id).values(
+        'user__profile__organization_id', 'course_id'
+    ).first()
+    latest_date = get_latest_organization_course_stats_date()
+    if not enrollment or not latest_date:
+        return
+
+    stats_filter = {
+        'organization_id': enrollment['user__profile__organization_id'],
+        'course_id': enrollment['course_id'],
+        'date': latest_date,
+    }
+    updated = OrganizationCourseStats.objects.filter(**stats_filter).update(is_dirty=True)
+    if not updated and create_missing:
+        OrganizationCourseStats.objects.get_or_create(defaults={'is_dirty': True}, **stats_filter)
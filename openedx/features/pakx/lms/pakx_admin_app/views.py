@@ -10,8 +10,8 @@ import six
 from dateutil.parser import parse
 from django.conf import settings
 from django.contrib.auth.models import Group
-from django.db.models import ExpressionWrapper, F, IntegerField, Prefetch, Q, Sum
-from django.http import Http404, HttpResponse
+from django.db.models import F, Prefetch, Q
+from django.http import Http404, StreamingHttpResponse
 from django.middleware import csrf
 from django.urls import reverse
 from django.utils.decorators import method_decorator
@@ -28,6 +28,8 @@ from student.models import CourseAccessRole, CourseEnrollment, LanguageProficien
 
 from .constants import (
     BULK_REGISTRATION_TASK_SUCCESS_MSG,
+    CSV_EXPORT_CHUNK_SIZE,
+    CSV_EXPORT_TASK_SUCCESS_MSG,
     ENROLLMENT_COURSE_DIFF_ORG_ERROR_MSG,
     ENROLLMENT_COURSE_EXPIRED_MSG,
     ENROLLMENT_SUCCESS_MESSAGE,
@@ -48,13 +50,15 @@ from .serializers import (
     UserListingSerializer,
     UserSerializer
 )
-from .tasks import bulk_user_registration, enroll_users
+from .tasks import bulk_user_registration, enroll_users, export_csv_report
 from .utils import (
     create_user,
     do_user_and_courses_have_same_org,
     extract_filters_and_search,
     get_completed_course_count_filters,
     get_course_overview_same_org_filter,
+    get_course_stats_annotations,
+    get_course_stats_totals,
     get_enroll_able_course_qs,
     get_org_users_qs,
     get_request_user_org_id,
@@ -338,21 +342,10 @@ class AnalyticsStats(views.APIView):
         """
         get analytics quick stats about learner and their assigned courses
         """
-        user_qs = get_org_users_qs(self.request.user)
-        user_ids = user_qs.values_list('id', flat=True)
-
-        completed_count, in_progress_count = get_completed_course_count_filters(
-            exclude_staff_superuser=True, req_user=self.request.user
-        )
-        course_stats = user_qs.annotate(
-            passed=ExpressionWrapper(completed_count, output_field=IntegerField()),
-            in_progress=ExpressionWrapper(in_progress_count, output_field=IntegerField())
-        ).aggregate(
-            completions=Sum(F('passed')), pending=Sum(F('in_progress'))
-        )
+        course_stats = get_course_stats_totals(self.request.user)
 
         data = {
-            'learner_count': len(user_ids),
+            'learner_count': get_org_users_qs(self.request.user).count(),
             'course_in_progress': course_stats.get('pending') or 0,
             'completed_course_count': course_stats.get('completions') or 0
         }
@@ -404,9 +397,7 @@ class CourseStatsListAPI(generics.ListAPIView):
     def get_queryset(self):
         search_text, progress_filters = extract_filters_and_search(self.request)
 
-        completed_count, in_progress_count = get_completed_course_count_filters(
-            exclude_staff_superuser=True, req_user=self.request.user
-        )
+        in_progress_count, completed_count = get_course_stats_annotations(self.request.user)
         overview_qs = CourseOverview.objects.filter(
             display_name__icontains=search_text
         ) if search_text else CourseOverview.objects.all()
@@ -512,8 +503,21 @@ class LearnerListAPI(generics.ListAPIView):
         )
 
 
+class Echo:
+    """An object that implements just the write method of the file-like interface, for streaming CSV rows."""
+
+    def write(self, value):
+        """Write the value by returning it, instead of storing in a buffer."""
+        return value
+
+
 class DownloadCSVView(LearnerListAPI, CourseStatsListAPI):
-    """API for downloading CSV files according to role."""
+    """
+    API for downloading CSV files according to role.
+
+    Rows are streamed to the client in chunks of the queryset, pass `async=1` to
+    export very large files to report storage and receive a download link via email instead.
+    """
 
     def __init__(self):
         """Create a dict for handling multiple modes."""
@@ -521,14 +525,20 @@ class DownloadCSVView(LearnerListAPI, CourseStatsListAPI):
         super().__init__()
         self.modes = {
             'learner': {
-                'func': self.write_learner_data,
+                'queryset': self.get_learner_queryset,
+                'serializer': LearnersSerializer,
+                'row': self.get_learner_row,
+                'ordering': 'profile__name',
                 'filename': 'Learner Stats.csv',
                 'field_names': [
                     'Name', 'Email', 'Last Login', 'Assigned Courses', 'Incomplete Courses', 'Completed Courses'
                 ]
             },
             'course': {
-                'func': self.write_course_data,
+                'queryset': self.get_course_queryset,
+                'serializer': CourseStatsListSerializer,
+                'row': self.get_course_row,
+                'ordering': 'display_name',
                 'filename': 'Course Stats.csv',
                 'field_names': [
                     'Course Title', 'Assigned', 'In Progress', 'Completed', 'Completion Rate'
@@ -544,57 +554,93 @@ class DownloadCSVView(LearnerListAPI, CourseStatsListAPI):
         local_timezone = utc_time + timedelta(hours=float(offset))
         return " {}".format(local_timezone.strftime('%I:%M %P, %d %b %Y'))
 
-    def prepare_learner_data(self):
-        """Get learner data."""
-
-        queryset = LearnerListAPI.get_queryset(self)
-        serializer = LearnersSerializer(queryset, many=True)
-        return serializer.data
-
-    def write_learner_data(self, csv_writer):
-        """Write learners data to CSV."""
-
-        learner_data = self.prepare_learner_data()
-        csv_writer.writeheader()
-        for row in learner_data:
-            csv_writer.writerow({
-                'Name': row['name'],
-                'Email': row['email'],
-                'Last Login': self.convert_to_localtime(row['last_login'], self.request.GET.get('offset', '0')),
-                'Assigned Courses': row['assigned_courses'],
-                'Incomplete Courses': row['incomplete_courses'],
-                'Completed Courses': row['completed_courses']
-            })
-
-    def prepare_course_data(self):
-        """Get course data."""
-
-        queryset = CourseStatsListAPI.get_queryset(self)
-        serializer = CourseStatsListSerializer(queryset, many=True)
-        return serializer.data
-
-    def write_course_data(self, csv_writer):
-        """Write course data to CSV."""
-
-        course_data = self.prepare_course_data()
-        csv_writer.writeheader()
-        for row in course_data:
-            csv_writer.writerow({
-                'Course Title': row['display_name'],
-                'Assigned': row['enrolled'],
-                'In Progress': row['in_progress'],
-                'Completed': row['completed'],
-                'Completion Rate': '{} %'.format(row['completion_rate']),
-            })
+    def get_learner_queryset(self):
+        """Get learners queryset."""
+
+        return LearnerListAPI.get_queryset(self)
+
+    def get_learner_row(self, row):
+        """Get CSV row of a serialized learner."""
+
+        return {
+            'Name': row['name'],
+            'Email': row['email'],
+            'Last Login': self.convert_to_localtime(row['last_login'], self.request.GET.get('offset', '0')),
+            'Assigned Courses': row['assigned_courses'],
+            'Incomplete Courses': row['incomplete_courses'],
+            'Completed Courses': row['completed_courses']
+        }
+
+    def get_course_queryset(self):
+        """Get courses queryset."""
+
+        return CourseStatsListAPI.get_queryset(self)
+
+    @staticmethod
+    def get_course_row(row):
+        """Get CSV row of a serialized course."""
+
+        return {
+            'Course Title': row['display_name'],
+            'Assigned': row['enrolled'],
+            'In Progress': row['in_progress'],
+            'Completed': row['completed'],
+            'Completion Rate': '{} %'.format(row['completion_rate']),
+        }
+
+    @staticmethod
+    def get_after_row_filter(ordering, row):
+        """Get filter for the rows after the given row, ordered by the given field with nulls first, then id."""
+
+        if row.export_ordering is None:
+            return Q(**{ordering + '__isnull': False}) | Q(**{ordering + '__isnull': True, 'id__gt': row.id})
+        return Q(**{ordering + '__gt': row.export_ordering}) | Q(**{ordering: row.export_ordering, 'id__gt': row.id})
+
+    def iter_rows(self, mode):
+        """
+        Serialize the queryset of given mode chunk by chunk and yield CSV rows, so the
+        whole queryset is never held in memory.
+
+        Rows are exported in the same order as the list API of the mode, with ties broken
+        by id. Chunks are paged by that (ordering field, id) key instead of offset, so every
+        chunk query seeks straight to its first row.
+        """
+
+        ordering = mode['ordering']
+        queryset = mode['queryset']().annotate(export_ordering=F(ordering)).order_by(
+            F(ordering).asc(nulls_first=True), 'id'
+        )
+        last_row = None
+        while True:
+            chunk_qs = queryset if last_row is None else queryset.filter(self.get_after_row_filter(ordering, last_row))
+            chunk = list(chunk_qs[:CSV_EXPORT_CHUNK_SIZE])
+            if not chunk:
+                break
+            last_row = chunk[-1]
+            for row in mode['serializer'](chunk, many=True).data:
+                yield mode['row'](row)
+
+    def write_rows(self, mode, csv_file):
+        """
+        Write header and all rows of the given mode to csv file like object, yielding the output of each write.
+        """
+
+        csv_writer = DictWriter(csv_file, fieldnames=mode['field_names'])
+        yield csv_writer.writerow(dict(zip(mode['field_names'], mode['field_names'])))
+        for row in self.iter_rows(mode):
+            yield csv_writer.writerow(row)
 
     def get(self, request, *args, **kwargs):
-        """Get function for download API. Returns a CSV File with applied filters."""
+        """Get function for download API. Streams a CSV File with applied filters."""
+
+        mode_name = request.GET.get('mode', 'learner')
+        mode = self.modes[mode_name]
+        if request.GET.get('async'):
+            export_csv_report.delay(request.user.id, mode_name, request.GET.dict())
+            return Response(CSV_EXPORT_TASK_SUCCESS_MSG, status=status.HTTP_200_OK)
 
-        mode = self.modes[request.GET.get('mode', 'learner')]
-        response = HttpResponse(content_type='text/csv; charset=UTF-8-sig')
+        response = StreamingHttpResponse(self.write_rows(mode, Echo()), content_type='text/csv; charset=UTF-8-sig')
         response['Content-Disposition'] = 'attachment; filename="{}"'.format(mode['filename'])
-        csv_writer = DictWriter(response, fieldnames=mode['field_names'])
-        mode['func'](csv_writer)
         return response
 
 